@@ -1,13 +1,39 @@
 # API - External service integrations
+from .errors import APIError, LLMError, ASRError
+from .http import get_client_session, close_client_session, run_async
 from .asr import asr_transcribe
-from .llm import llm_streaming_chat_completion, run_async
-from .prompts import format_note_writing_prompt, format_note_edit_prompt, format_note_synthesis_prompt
+from .llm import llm_stream_chat_completion, llm_streaming_chat_completion, llm_config_kwargs
+from .generation import Generation, start_generation, get_generation, cancel_generation, pop_finished_generation
+from .prompts import format_note_writing_prompt, format_note_edit_prompt, format_note_synthesis_prompt, estimate_tokens
+from .guards import RepetitionDetector
+from .budget import output_budget, note_generation_kwargs, note_stop_reason, record_note_output
+from .routing import route_llm_config
+from .sse import SSEDecoder, ChatStreamState
+from .warmup import warmup_kwargs, schedule_warmup, warmup_pending, use_warmup
+from .transcript import normalize_transcript
+from .dedup import dedupe_sources
+from .grammar import template_headings, template_grammar
 
 __all__ = [
+    'APIError', 'LLMError', 'ASRError',
+    'get_client_session',
+    'close_client_session',
+    'run_async',
     'asr_transcribe',
+    'llm_stream_chat_completion',
     'llm_streaming_chat_completion',
-    'run_async',
+    'llm_config_kwargs',
+    'Generation', 'start_generation', 'get_generation', 'cancel_generation', 'pop_finished_generation',
     'format_note_writing_prompt',
     'format_note_edit_prompt',
     'format_note_synthesis_prompt',
+    'estimate_tokens',
+    'RepetitionDetector',
+    'output_budget', 'note_generation_kwargs', 'note_stop_reason', 'record_note_output',
+    'route_llm_config',
+    'SSEDecoder', 'ChatStreamState',
+    'warmup_kwargs', 'schedule_warmup', 'warmup_pending', 'use_warmup',
+    'normalize_transcript',
+    'dedupe_sources',
+    'template_headings', 'template_grammar',
 ]
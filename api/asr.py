@@ -1,17 +1,127 @@
-"""ASR (Speech-to-Text) Functions"""
+"""ASR (Speech-to-Text) Functions
 
-import aiohttp
-import streamlit as st
+Audio is streamed to the server as a multipart upload, so a long recording is
+never held in memory more than once (or at all, when given as a path, file
+object or async byte stream). Bytes, paths and seekable files have a known
+length and are sent with Content-Length; only async byte streams use chunked
+transfer encoding, which some servers and proxies do not accept.
+"""
+
+import asyncio
+import io
+import mimetypes
+import os
+import time
+import wave
+from typing import Optional, Callable, AsyncIterator
+
+from core.metrics import observe
+from core.profiler import profiled
+
+from .errors import ASRError
+from .http import get_client_session
 
 # OpenAI-compatible endpoint paths
 ASR_PATH = "/v1/audio/transcriptions"
+# Bytes read from disk / sent per upload chunk
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+def _audio_duration_seconds(audio_file) -> Optional[float]:
+    """Duration of WAV audio from its header, or None for other formats and streams"""
+    position = None
+    try:
+        if isinstance(audio_file, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(audio_file)
+        elif isinstance(audio_file, (str, os.PathLike)):
+            source = audio_file
+        elif hasattr(audio_file, 'seek'):
+            source = audio_file
+            position = audio_file.tell()
+        else:
+            return None
+        with wave.open(source, 'rb') as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except Exception:
+        return None
+    finally:
+        if position is not None:
+            audio_file.seek(position)
+
+
+def _upload_size(audio_file) -> Optional[int]:
+    if isinstance(audio_file, (bytes, bytearray, memoryview)):
+        return len(audio_file)
+    if isinstance(audio_file, (str, os.PathLike)):
+        return os.path.getsize(audio_file)
+    try:
+        return os.fstat(audio_file.fileno()).st_size - audio_file.tell()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+async def _upload_chunks(audio_file, progress: Optional[Callable[[int, Optional[int]], None]]) -> AsyncIterator[bytes]:
+    """Yield the audio in chunks, reading files in a worker thread and reporting bytes sent"""
+    total = _upload_size(audio_file)
+    sent = 0
+    if progress is not None:
+        progress(sent, total)
+
+    if isinstance(audio_file, (bytes, bytearray, memoryview)):
+        view = memoryview(audio_file)
+        chunks = (view[i:i + UPLOAD_CHUNK_SIZE] for i in range(0, len(view), UPLOAD_CHUNK_SIZE))
+        for chunk in chunks:
+            yield chunk
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent, total)
+        return
 
+    if hasattr(audio_file, '__aiter__'):
+        async for chunk in audio_file:
+            yield chunk
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent, total)
+        return
 
+    handle = open(audio_file, 'rb') if isinstance(audio_file, (str, os.PathLike)) else audio_file
+    try:
+        while True:
+            chunk = await asyncio.to_thread(handle.read, UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent, total)
+    finally:
+        if handle is not audio_file:
+            handle.close()
+
+
+def _upload_payload(audio_file, progress: Optional[Callable[[int, Optional[int]], None]],
+                    filename: str, content_type: str):
+    """The file part of the upload: sized when the audio's length is known, so the request is not chunked"""
+    from aiohttp.payload import AsyncIterablePayload
+
+    size = None if hasattr(audio_file, '__aiter__') else _upload_size(audio_file)
+
+    class UploadPayload(AsyncIterablePayload):
+        @property
+        def size(self) -> Optional[int]:
+            return size
+
+    return UploadPayload(_upload_chunks(audio_file, progress), filename=filename, content_type=content_type)
+
+
+@profiled('api')
 async def asr_transcribe(
     audio_file,
     endpoint: str,
     model: str = "google/medasr",
-    api_key: str = ''
+    api_key: str = '',
+    progress: Optional[Callable[[int, Optional[int]], None]] = None
 ) -> str:
     """
     Generic ASR function - transcribe audio using OpenAI-compatible endpoint.
@@ -21,16 +131,26 @@ async def asr_transcribe(
     - Optional: language, prompt, response_format, temperature
     
     Args:
-        audio_file: Audio file data
+        audio_file: Audio as bytes, a file path, a binary file object or an async iterable of bytes
         endpoint: Base ASR endpoint URL (e.g., http://localhost:8000)
         model: ASR model name (default: google/medasr)
         api_key: Bearer token for authentication (optional)
+        progress: Called on the event loop with (bytes sent, total bytes or None) as the upload proceeds
     
     Returns:
-        Transcribed text or empty string on error
+        Transcribed text
+    
+    Raises:
+        ASRError: The request failed or the server returned an error status
     """
+    import aiohttp
+    
     # Append OpenAI-compatible path
     full_endpoint = f"{endpoint.rstrip('/')}{ASR_PATH}"
+    # Read before the upload consumes a file object
+    duration = _audio_duration_seconds(audio_file)
+    started = time.perf_counter()
+    status = 'error'
     
     try:
         # Build headers with authorization if API key provided
@@ -38,19 +158,28 @@ async def asr_transcribe(
         if api_key:
             headers['Authorization'] = f'Bearer {api_key}'
         
-        async with aiohttp.ClientSession() as session:
-            form = aiohttp.FormData()
-            form.add_field('file', audio_file, filename='audio.wav', content_type='audio/wav')
-            form.add_field('model', model)
-            
-            async with session.post(full_endpoint, data=form, headers=headers, timeout=aiohttp.ClientTimeout(total=120)) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    return result.get("text", "")
-                else:
-                    error_text = await resp.text()
-                    st.error(f"ASR Error: {resp.status} - {error_text}")
-                    return ""
+        filename, content_type = 'audio.wav', 'audio/wav'
+        if isinstance(audio_file, (str, os.PathLike)):
+            filename = os.path.basename(audio_file)
+            content_type = mimetypes.guess_type(filename)[0] or content_type
+        form = aiohttp.FormData()
+        form.add_field('file', _upload_payload(audio_file, progress, filename, content_type),
+                       filename=filename, content_type=content_type)
+        form.add_field('model', model)
+        
+        async with get_client_session().post(full_endpoint, data=form, headers=headers, timeout=aiohttp.ClientTimeout(total=120)) as resp:
+            if resp.status != 200:
+                error_text = await resp.text()
+                raise ASRError(f"ASR Error: {resp.status} - {error_text}", status=resp.status)
+            result = await resp.json()
+            status = 'ok'
+            return result.get("text", "")
+    except ASRError:
+        raise
     except Exception as e:
-        st.error(f"ASR Error: {e}")
-        return ""
+        raise ASRError(f"ASR Error: {e}") from e
+    finally:
+        elapsed = time.perf_counter() - started
+        observe('asr_request_seconds', elapsed, model=model, status=status)
+        if status == 'ok' and duration and elapsed > 0:
+            observe('asr_realtime_factor', duration / elapsed, model=model)
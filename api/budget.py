@@ -0,0 +1,119 @@
+"""Output Budgets
+
+Per-template max_tokens and stop sequences, so a degenerate completion ends in
+seconds instead of running to the server's context limit:
+- Declared: max_tokens / stop from the template's .yaml sidecar (or config entry)
+- Automatic: a multiple of the template length, of any text the output is
+  expected to reproduce (e.g. the note being edited) and of the largest recent
+  outputs for the template, within [MIN_BUDGET, MAX_BUDGET]
+- A positive llm.max_tokens in config.yaml caps every budget
+- Streams are also cut short by the repetition detector (see guards.py);
+  note_stop_reason() tells whether a note was cut short and why
+- With llm.grammar_constrained, the template's heading grammar is sent too
+  (see grammar.py)
+"""
+
+import math
+from typing import Optional, Dict, Any, List
+
+from core.output_stats import get_output_history, record_output
+
+from .grammar import template_grammar, grammar_supported
+from .guards import RepetitionDetector
+from .llm import llm_config_kwargs
+from .prompts import estimate_tokens
+from .sse import ChatStreamState
+from .routing import route_llm_config
+
+MIN_BUDGET = 1024
+MAX_BUDGET = 8192
+# Filled-in notes run a few times longer than their template skeleton
+TEMPLATE_FACTOR = 4
+# Headroom over reproduced text and over the largest recent outputs
+HEADROOM = 1.5
+# Samples needed before history is used
+MIN_HISTORY = 5
+
+
+def _template_key(template: Dict[str, Any]) -> str:
+    return template.get('id') or template['name']
+
+
+def _recent_high(samples: List[int]) -> int:
+    """95th percentile of recent output sizes"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(0.95 * len(ordered)) - 1)]
+
+
+def output_budget(template: Dict[str, Any], reproduced_text: str = "") -> int:
+    """
+    max_tokens for a note generated from a template.
+
+    Args:
+        template: Template dict (from load_templates)
+        reproduced_text: Input the output is expected to largely repeat (e.g. the note being edited)
+    """
+    if template.get('max_tokens'):
+        return int(template['max_tokens'])
+
+    budget = max(
+        MIN_BUDGET,
+        estimate_tokens(template.get('system_prompt', '')) * TEMPLATE_FACTOR,
+        int(estimate_tokens(reproduced_text) * HEADROOM)
+    )
+    history = get_output_history(_template_key(template))
+    if len(history) >= MIN_HISTORY:
+        budget = max(budget, int(_recent_high(history) * HEADROOM))
+    return min(budget, MAX_BUDGET)
+
+
+def note_generation_kwargs(config_llm: dict, template: Dict[str, Any], task: str, prompt: str,
+                           reproduced_text: str = "") -> Dict[str, Any]:
+    """
+    llm_stream_chat_completion arguments for a note: settings of the route the
+    task and prompt map to (see routing.py) plus the template's output budget,
+    stop sequences and a fresh repetition detector.
+    Set llm.auto_budget: false to keep config max_tokens (-1 = unlimited) as is.
+    With llm.grammar_constrained the template's grammar is added to extra_api_params,
+    unless they already carry a grammar or the server has rejected one.
+    """
+    config_llm, route = route_llm_config(config_llm, task, prompt)
+    kwargs = llm_config_kwargs(config_llm)
+    kwargs['route'] = route
+    if config_llm.get('auto_budget', True):
+        budget = output_budget(template, reproduced_text)
+        configured = kwargs['max_tokens']
+        kwargs['max_tokens'] = min(budget, configured) if configured and configured > 0 else budget
+    if template.get('stop'):
+        kwargs['stop'] = list(template['stop'])
+    extra = kwargs['extra_api_params'] or {}
+    if config_llm.get('grammar_constrained') and not ({'grammar', 'json_schema'} & extra.keys()) \
+            and grammar_supported(kwargs['endpoint']):
+        grammar = template_grammar(template)
+        if grammar:
+            kwargs['extra_api_params'] = {**extra, 'grammar': grammar}
+    kwargs['repetition_detector'] = RepetitionDetector()
+    kwargs['stream_state'] = ChatStreamState()
+    return kwargs
+
+
+def note_stop_reason(llm_kwargs: Dict[str, Any]) -> Optional[str]:
+    """
+    Why a finished note_generation_kwargs() completion ended early:
+    'repetition' (looping output), 'length' (hit max_tokens) or None (complete)
+    """
+    detector = llm_kwargs.get('repetition_detector')
+    if detector is not None and detector.triggered:
+        return 'repetition'
+    state = llm_kwargs.get('stream_state')
+    if state is not None and state.finish_reasons.get(0) == 'length':
+        return 'length'
+    return None
+
+
+def record_note_output(template: Dict[str, Any], text: str, usage: Optional[Dict[str, Any]] = None) -> None:
+    """Feed the size of a completed note back into the template's budget (server-reported usage if available)"""
+    if usage and usage.get('completion_tokens'):
+        record_output(_template_key(template), usage['completion_tokens'])
+    elif text:
+        record_output(_template_key(template), estimate_tokens(text))
@@ -0,0 +1,172 @@
+"""Copy-Forward De-duplication
+
+Synthesize sources are mostly copy-forwarded text: the same HPI, PMH and
+medication list repeated in the H&P, every consult and every progress note.
+dedupe_sources() collapses near-duplicate paragraphs before the synthesis
+prompt is built:
+- Paragraphs (blank-line separated) are shingled into word 3-grams and
+  MinHash-signed; LSH banding finds candidate pairs, which are confirmed by
+  the exact Jaccard similarity of their shingles (>= threshold)
+- Only the most recent instance is kept; an older paragraph is collapsed
+  only when it is similar to the kept copy itself, not merely through a chain
+  of intermediate edits. Sources are ordered hp, consults, studies, progress,
+  each in document order (later text is newer unless newest_first)
+- Paragraphs whose numbers differ (labs, vitals, study results) are never
+  collapsed into each other, so a trend is not hidden behind its last value
+- Each run of collapsed paragraphs is replaced by a short marker naming the
+  source that holds the kept copy, and whether it is above or below
+- Paragraphs under MIN_WORDS words (headings, "No acute events overnight")
+  are never collapsed
+"""
+
+import random
+import re
+import zlib
+from functools import lru_cache
+from typing import Optional, Dict, List, Tuple
+
+from core.metrics import observe
+from core.profiler import profiled
+
+from .prompts import estimate_tokens
+
+SOURCE_LABELS = {
+    'hp': 'History and Physical',
+    'consults': 'Consult Notes',
+    'studies': 'Studies and Procedures',
+    'progress': 'Progress Notes',
+}
+
+DEFAULT_THRESHOLD = 0.8
+MIN_WORDS = 12
+SHINGLE_WORDS = 3
+NUM_PERM = 32
+# 8 bands of 4 rows: pairs at Jaccard 0.8 become candidates ~98% of the time, at 0.5 ~40%
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240917)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_PARAGRAPH_RE = re.compile(r'\n[ \t]*\n')
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_NUMBER_RE = re.compile(r'\d+(?:[.,]\d+)?')
+
+
+def _shingles(text: str) -> frozenset:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < MIN_WORDS:
+        return frozenset()
+    return frozenset(
+        zlib.crc32(' '.join(words[i:i + SHINGLE_WORDS]).encode())
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    )
+
+
+def _signature(shingles: frozenset) -> Tuple[int, ...]:
+    return tuple(min((a * h + b) % _PRIME for h in shingles) for a, b in _PERMUTATIONS)
+
+
+def _marker(count: int, kept: Tuple[str, bool]) -> str:
+    kept_field, below = kept
+    what = "paragraph" if count == 1 else f"{count} paragraphs"
+    where = "later" if below else "earlier"
+    return f"[{what} omitted: repeated {where} in {SOURCE_LABELS.get(kept_field, kept_field)}]"
+
+
+@lru_cache(maxsize=16)
+def _dedupe(items: Tuple[Tuple[str, str], ...], threshold: float, newest_first: bool):
+    # Paragraphs in recency order: (field, index within field, text)
+    paragraphs = []
+    for field, text in items:
+        parts = [p for p in _PARAGRAPH_RE.split(text) if p.strip()]
+        order = list(enumerate(parts))
+        if newest_first:
+            order.reverse()
+        paragraphs.extend((field, i, part) for i, part in order)
+
+    shingles = [_shingles(text) for _, _, text in paragraphs]
+    numbers = [_NUMBER_RE.findall(text) for _, _, text in paragraphs]
+    # Position in the prompt (source order, then document order), for the marker wording
+    field_order = {field: n for n, (field, _) in enumerate(items)}
+    buckets: Dict[tuple, List[int]] = {}
+    for idx, sh in enumerate(shingles):
+        if not sh:
+            continue
+        signature = _signature(sh)
+        for band in range(BANDS):
+            buckets.setdefault((band, signature[band * ROWS:(band + 1) * ROWS]), []).append(idx)
+
+    candidates: Dict[int, set] = {}
+    for members in buckets.values():
+        for a in members:
+            candidates.setdefault(a, set()).update(b for b in members if b > a)
+
+    # Newest first: a paragraph collapses only into a kept newer paragraph it is itself
+    # similar to, so chains of small edits never collapse text far from the kept copy
+    kept = set()
+    collapsed = {}
+    for idx in reversed(range(len(paragraphs))):
+        match = next((
+            b for b in sorted(candidates.get(idx, set()) & kept, reverse=True)
+            if numbers[idx] == numbers[b]
+            and len(shingles[idx] & shingles[b]) >= threshold * len(shingles[idx] | shingles[b])
+        ), None)
+        if match is None:
+            kept.add(idx)
+        else:
+            field, i, _ = paragraphs[idx]
+            kept_field, kept_i, _ = paragraphs[match]
+            below = (field_order[kept_field], kept_i) > (field_order[field], i)
+            collapsed[(field, i)] = (kept_field, below)
+
+    result = []
+    for field, text in items:
+        out = []
+        run_count, run_kept = 0, None
+        for i, part in enumerate(p for p in _PARAGRAPH_RE.split(text) if p.strip()):
+            kept = collapsed.get((field, i))
+            if kept is not None and (run_count == 0 or kept == run_kept):
+                run_count, run_kept = run_count + 1, kept
+                continue
+            if run_count:
+                out.append(_marker(run_count, run_kept))
+                run_count, run_kept = 0, None
+            if kept is not None:
+                run_count, run_kept = 1, kept
+            else:
+                out.append(part.strip('\n'))
+        if run_count:
+            out.append(_marker(run_count, run_kept))
+        result.append((field, '\n\n'.join(out)))
+
+    before = sum(estimate_tokens(text) for _, text in items)
+    after = sum(estimate_tokens(text) for _, text in result)
+    stats = (
+        ('paragraphs', len(paragraphs)), ('collapsed', len(collapsed)),
+        ('tokens_before', before), ('tokens_after', after), ('tokens_saved', before - after),
+    )
+    return tuple(result), stats
+
+
+@profiled('api')
+def dedupe_sources(sources: Dict[str, str], threshold: Optional[float] = None,
+                   newest_first: bool = False) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """
+    Collapse near-duplicate paragraphs within and across synthesize sources.
+
+    Args:
+        sources: Source texts by field, oldest source first (hp, consults, studies, progress)
+        threshold: Shingle Jaccard similarity at which two paragraphs count as duplicates
+            (default DEFAULT_THRESHOLD)
+        newest_first: Texts list their newest entry first (otherwise last)
+
+    Returns:
+        (de-duplicated sources, stats: paragraphs, collapsed, tokens_before, tokens_after, tokens_saved)
+    """
+    threshold = DEFAULT_THRESHOLD if threshold is None else float(threshold)
+    result, stats = _dedupe(tuple(sources.items()), threshold, newest_first)
+    stats = dict(stats)
+    if stats['tokens_before']:
+        observe('synthesize_dedup_ratio', stats['tokens_after'] / stats['tokens_before'])
+    return dict(result), stats
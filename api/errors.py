@@ -0,0 +1,24 @@
+"""API Errors
+
+Failures talking to the LLM/ASR backends are raised as exceptions so each
+caller decides how to surface them (st.error in the UI, an HTTP status in the
+API server, a manifest entry in batch runs).
+"""
+
+from typing import Optional
+
+
+class APIError(Exception):
+    """Base class for backend request failures"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class LLMError(APIError):
+    """Text generation request failed"""
+
+
+class ASRError(APIError):
+    """Transcription request failed"""
@@ -0,0 +1,229 @@
+"""Background Generations
+
+Note generations run as tasks on the shared background loop instead of
+blocking a Streamlit rerun, so they can be watched and cancelled:
+- Generations are keyed by (session_id, mode); starting a new one for a key
+  cancels the one still running for it
+- Cancelling closes the HTTP stream, so the LLM server frees the slot
+- Partial output is readable while the generation runs
+- A generation cut short by its repetition detector or output budget still
+  finishes as 'done', with stop_reason 'repetition' or 'length'
+- Several candidates can be generated at once, either as parallel requests
+  (continuous batching servers such as llama.cpp share the slots) or with the
+  OpenAI `n` parameter; candidate 0 is the generation's text and the one
+  passed to on_complete
+- on_complete(text) runs in a worker thread when a generation finishes normally
+- on_checkpoint(text) receives candidate 0's text every CHECKPOINT_SECONDS
+  while it streams, and once more if the stream fails, so the caller can
+  persist it; a generation started with llm_kwargs['assistant_prefix'] resumes
+  from that text (it is included in the generation's text)
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional, Callable, Dict, Any, List, Tuple
+
+from core.profiler import detach_from_rerun
+
+from .http import get_background_loop
+from .budget import note_stop_reason
+from .guards import RepetitionDetector
+from .llm import llm_stream_chat_completion
+from .sse import ChatStreamState
+
+# Finished generations kept until their owner picks them up (oldest dropped first)
+MAX_FINISHED = 200
+
+GenerationKey = Tuple[str, str]
+
+CANDIDATE_MODES = ('parallel', 'n')
+# Minimum seconds between on_checkpoint calls
+CHECKPOINT_SECONDS = 2.0
+
+
+class Generation:
+    """One streamed completion running on the background loop"""
+
+    def __init__(self, key: GenerationKey, prefix: str = ""):
+        self.key = key
+        self.prefix = prefix  # text being continued
+        self.chunks: List[str] = [prefix] if prefix else []  # candidate 0
+        self.status = 'running'  # running | done | cancelled | error
+        # Set by cancel(); callbacks already running in a worker thread check it before writing
+        self.cancel_requested = False
+        self.error: Optional[str] = None
+        self.stop_reason: Optional[str] = None  # 'repetition' or 'length' if the output was cut short
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._future = None
+        # (stream state, choice index) per candidate
+        self._candidates: List[Tuple[ChatStreamState, int]] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+    @property
+    def candidate_texts(self) -> List[str]:
+        """Text so far of every candidate, in order"""
+        return [self.prefix + state.text(index) for state, index in self._candidates]
+
+    @property
+    def running(self) -> bool:
+        return self.status == 'running'
+
+    def cancel(self) -> None:
+        """Stop the generation (no-op once finished)"""
+        if self._future is not None and self.running:
+            self.cancel_requested = True
+            self._future.cancel()
+
+    def wait(self, timeout: Optional[float] = None) -> 'Generation':
+        """Block until the generation finishes"""
+        try:
+            self._future.result(timeout)
+        except BaseException:
+            pass
+        return self
+
+
+_generations: Dict[GenerationKey, Generation] = {}
+_lock = threading.Lock()
+
+
+async def _consume(prompt: str, llm_kwargs: Dict[str, Any], chunks: List[str],
+                   on_checkpoint: Optional[Callable[[str], None]] = None) -> None:
+    last_checkpoint = time.monotonic()
+    async for chunk in llm_stream_chat_completion(prompt, **llm_kwargs):
+        chunks.append(chunk)
+        if on_checkpoint is not None and time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+            await asyncio.to_thread(on_checkpoint, "".join(chunks))
+            last_checkpoint = time.monotonic()
+
+
+async def _run(generation: Generation, prompt: str, streams: List[Dict[str, Any]],
+               on_complete: Optional[Callable[[str], None]],
+               on_checkpoint: Optional[Callable[[str], None]]) -> None:
+    # Outlives the rerun that started it
+    detach_from_rerun()
+    try:
+        results = await asyncio.gather(
+            _consume(prompt, streams[0], generation.chunks, on_checkpoint),
+            *(_consume(prompt, kwargs, []) for kwargs in streams[1:]),
+            return_exceptions=True
+        )
+        # Other candidates that failed keep whatever text they produced
+        if isinstance(results[0], BaseException):
+            raise results[0]
+    except asyncio.CancelledError:
+        generation.status = 'cancelled'
+        raise
+    except Exception as e:
+        # Persist what arrived before reporting the failure
+        if on_checkpoint is not None and generation.chunks:
+            try:
+                await asyncio.to_thread(on_checkpoint, generation.text)
+            except Exception:
+                pass
+        generation.error = str(e)
+        generation.status = 'error'
+    else:
+        generation.stop_reason = note_stop_reason(streams[0])
+        if on_complete is not None and generation.chunks:
+            try:
+                await asyncio.to_thread(on_complete, generation.text)
+            except Exception as e:
+                generation.status = 'error'
+                generation.error = f"Generated, but saving failed: {e}"
+                return
+        generation.status = 'done'
+    finally:
+        generation.finished_at = time.time()
+
+
+def _candidate_streams(generation: Generation, llm_kwargs: Dict[str, Any], candidates: int,
+                       candidates_mode: str) -> List[Dict[str, Any]]:
+    """Request arguments per stream; the first stream keeps the caller's detector and stream state"""
+    if candidates_mode not in CANDIDATE_MODES:
+        raise ValueError(f"candidates_mode must be one of {', '.join(CANDIDATE_MODES)}")
+    first = {**llm_kwargs, 'stream_state': llm_kwargs.get('stream_state') or ChatStreamState()}
+    if candidates > 1 and candidates_mode == 'n':
+        first['n'] = candidates
+        generation._candidates = [(first['stream_state'], i) for i in range(candidates)]
+        return [first]
+
+    streams = [first]
+    for _ in range(candidates - 1):
+        streams.append({
+            **llm_kwargs,
+            'stream_state': ChatStreamState(),
+            'repetition_detector': RepetitionDetector() if llm_kwargs.get('repetition_detector') else None,
+        })
+    generation._candidates = [(kwargs['stream_state'], 0) for kwargs in streams]
+    return streams
+
+
+def start_generation(key: GenerationKey, prompt: str, llm_kwargs: Dict[str, Any],
+                     on_complete: Optional[Callable[[str], None]] = None,
+                     candidates: int = 1, candidates_mode: str = 'parallel',
+                     on_checkpoint: Optional[Callable[[str], None]] = None) -> Generation:
+    """
+    Start a streamed completion in the background, superseding any generation for the same key.
+
+    Args:
+        key: (session_id, mode)
+        prompt: User prompt
+        llm_kwargs: Arguments for llm_stream_chat_completion (see llm_config_kwargs)
+        on_complete: Called with the full text of candidate 0 if the generation finishes without error
+        candidates: Number of alternative completions to generate
+        candidates_mode: 'parallel' (one request per candidate) or 'n' (one request with the n parameter)
+        on_checkpoint: Called with the text so far while the generation streams (see module docstring)
+
+    Returns:
+        The new Generation
+    """
+    generation = Generation(key, prefix=llm_kwargs.get('assistant_prefix', ''))
+    streams = _candidate_streams(generation, llm_kwargs, candidates, candidates_mode)
+    with _lock:
+        previous = _generations.get(key)
+        if previous is not None:
+            previous.cancel()
+        _generations[key] = generation
+        finished = [k for k, g in _generations.items() if not g.running]
+        for old_key in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            del _generations[old_key]
+        generation._future = asyncio.run_coroutine_threadsafe(
+            _run(generation, prompt, streams, on_complete, on_checkpoint), get_background_loop()
+        )
+    generation._future.add_done_callback(lambda future: _mark_cancelled(generation, future))
+    return generation
+
+
+def _mark_cancelled(generation: Generation, future) -> None:
+    # Cancelled before the task started running, so _run never saw it
+    if future.cancelled() and generation.running:
+        generation.status = 'cancelled'
+        generation.finished_at = time.time()
+
+
+def get_generation(key: GenerationKey) -> Optional[Generation]:
+    """Current (running or unclaimed finished) generation for a key"""
+    with _lock:
+        return _generations.get(key)
+
+
+def cancel_generation(key: GenerationKey) -> None:
+    """Cancel the running generation for a key, if any"""
+    generation = get_generation(key)
+    if generation is not None:
+        generation.cancel()
+
+
+def pop_finished_generation(key: GenerationKey) -> Optional[Generation]:
+    """Remove and return the generation for a key once it has finished"""
+    with _lock:
+        generation = _generations.get(key)
+        if generation is None or generation.running:
+            return None
+        return _generations.pop(key)
@@ -0,0 +1,83 @@
+"""Template Grammars
+
+Compiles a note template into a GBNF grammar (llama.cpp `grammar` request
+parameter) so the model cannot add a preamble, drop a section or reorder
+headings (llm.grammar_constrained):
+- Headings are the template's standalone "Heading:" lines, plus a plain title
+  line the template starts with ("Internal Medicine Progress Note")
+- The note must start with the first heading and contain every heading, in
+  template order, each at the start of a line; the text of each section is free
+- Grammars are compiled once per template text and cached
+- A template's .yaml sidecar can set `grammar:` to its own GBNF, or false to
+  send none
+- Servers that reject the parameter (HTTP 400/422 with an error about the
+  grammar or parsing) are remembered for the rest of the process;
+  llm_stream_chat_completion retries such a request once without it. Other
+  errors (e.g. an oversized prompt) are raised as usual
+"""
+
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Fewer headings than this leave nothing worth constraining
+MIN_HEADINGS = 2
+# Statuses with which servers reject an unknown or invalid grammar
+GRAMMAR_REJECTED_STATUSES = (400, 422)
+# Error text that marks the rejection as about the grammar (not e.g. the context length)
+_GRAMMAR_ERROR_RE = re.compile(r'grammar|gbnf|pars(?:e|ing)|unrecognized request argument', re.IGNORECASE)
+
+_HEADING_RE = re.compile(r'^[ \t]*([A-Za-z][^:\n\[\]<>#]{0,60}):[ \t]*$', re.MULTILINE)
+_TITLE_RE = re.compile(r'^[A-Za-z][^:\n\[\]<>#]{0,80}$')
+
+_unsupported_endpoints = set()
+
+
+def template_headings(template_prompt: str) -> List[str]:
+    """Headings a note from this template must contain, in order (including the colon)"""
+    headings = [f"{m.group(1).strip()}:" for m in _HEADING_RE.finditer(template_prompt)]
+    lines = [line.strip() for line in template_prompt.strip().splitlines()]
+    if lines and _TITLE_RE.match(lines[0]):
+        headings.insert(0, lines[0])
+    return headings
+
+
+@lru_cache(maxsize=64)
+def _compile(template_prompt: str) -> Optional[str]:
+    headings = template_headings(template_prompt)
+    if len(headings) < MIN_HEADINGS:
+        return None
+    sequence = ' body "\\n" '.join(json.dumps(heading) for heading in headings)
+    return (
+        f'root ::= "\\n"* {sequence} body\n'
+        'body ::= [^\\n]* ("\\n" [^\\n]*)*\n'
+    )
+
+
+def template_grammar(template: Dict[str, Any]) -> Optional[str]:
+    """GBNF grammar for notes from a template, or None if it has too few headings or opts out"""
+    if 'grammar' in template:
+        return template['grammar'] or None
+    return _compile(template.get('system_prompt', ''))
+
+
+def is_grammar_rejection(status: int, error_text: str) -> bool:
+    """Whether an error response to a request with a grammar is about the grammar itself"""
+    return status in GRAMMAR_REJECTED_STATUSES and bool(_GRAMMAR_ERROR_RE.search(error_text))
+
+
+def grammar_supported(endpoint: str) -> bool:
+    """False once the server at endpoint has rejected a grammar"""
+    return endpoint not in _unsupported_endpoints
+
+
+def mark_grammar_unsupported(endpoint: str, error_text: str = '') -> None:
+    """Stop sending grammars to endpoint (it rejected one)"""
+    if endpoint not in _unsupported_endpoints:
+        logger.warning("LLM server %s rejected the note grammar; sending notes unconstrained: %s",
+                       endpoint, error_text[:200])
+        _unsupported_endpoints.add(endpoint)
@@ -0,0 +1,60 @@
+"""Generation Guards
+
+Online checks applied to a completion while it streams, so a degenerate
+generation is cut short instead of running to the context limit.
+"""
+
+
+class RepetitionDetector:
+    """
+    Detects a completion stuck in a loop: the tail of the output is periodic
+    (the same unit of text repeated back to back) over a long enough span.
+
+    Args:
+        min_period: Shortest repeating unit considered, in characters
+        max_period: Longest repeating unit considered, in characters
+        min_repeats: Repetitions of the unit required
+        min_span: Minimum length of the repeated region, in characters
+            (keeps short legitimate repeats like '----' or '[...]' from triggering)
+        check_every: Characters of new output between checks
+    """
+
+    def __init__(self, min_period: int = 2, max_period: int = 300, min_repeats: int = 4,
+                 min_span: int = 240, check_every: int = 32):
+        self.min_period = min_period
+        self.max_period = max_period
+        self.min_repeats = min_repeats
+        self.min_span = min_span
+        self.check_every = check_every
+        self.window = max_period * (min_repeats + 1) + min_span
+        self.triggered = False
+        self.period = None
+        self._tail = ""
+        self._pending = 0
+
+    def feed(self, text: str) -> bool:
+        """Add streamed text; returns True once the output is looping"""
+        if self.triggered:
+            return True
+        self._tail = (self._tail + text)[-self.window:]
+        self._pending += len(text)
+        if self._pending < self.check_every:
+            return False
+        self._pending = 0
+        self.period = self._find_period()
+        self.triggered = self.period is not None
+        return self.triggered
+
+    def _find_period(self):
+        tail = self._tail
+        probe = min(16, self.min_span)
+        for period in range(self.min_period, self.max_period + 1):
+            span = max(period * self.min_repeats, self.min_span)
+            if span + period > len(tail):
+                continue
+            # Cheap rejection before comparing the whole span
+            if tail[-probe:] != tail[-probe - period:-period]:
+                continue
+            if tail[-span:] == tail[-span - period:-period]:
+                return period
+        return None
@@ -0,0 +1,93 @@
+"""Shared HTTP Client and Event Loop
+
+- One aiohttp ClientSession (one connection pool) per event loop, reused across
+  requests so keep-alive connections to the LLM/ASR backends are not re-opened
+  for every call
+- A persistent background event loop for synchronous callers (Streamlit reruns),
+  so their requests share that loop's pool instead of a fresh asyncio.run() each time
+
+aiohttp is imported on first request, not at import time.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+import weakref
+from typing import TYPE_CHECKING, Optional, Callable
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Max simultaneous connections per pool (all hosts)
+POOL_LIMIT = 100
+KEEPALIVE_SECONDS = 60
+
+_client_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
+_background_loop = None
+_background_loop_lock = threading.Lock()
+
+
+def get_client_session() -> "aiohttp.ClientSession":
+    """Shared ClientSession for the running event loop (created on first use)"""
+    import aiohttp
+
+    loop = asyncio.get_running_loop()
+    session = _client_sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=POOL_LIMIT, keepalive_timeout=KEEPALIVE_SECONDS)
+        )
+        _client_sessions[loop] = session
+    return session
+
+
+async def close_client_session() -> None:
+    """Close the running loop's shared ClientSession (call before the loop shuts down)"""
+    session = _client_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop running forever on a daemon thread, started on first use"""
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name='api-event-loop', daemon=True).start()
+            atexit.register(_close_background_session)
+    return _background_loop
+
+
+def _close_background_session() -> None:
+    try:
+        asyncio.run_coroutine_threadsafe(close_client_session(), _background_loop).result(timeout=5)
+    except Exception:
+        pass
+
+
+def run_async(coro, on_wait: Optional[Callable[[], None]] = None, poll_seconds: float = 0.1):
+    """
+    Run a coroutine on the shared background loop and block until it finishes.
+    Context variables of the calling thread (e.g. the profiled rerun) are
+    visible to the coroutine. Exceptions are re-raised in the caller.
+    on_wait, if given, is called in the calling thread every poll_seconds
+    while waiting (e.g. to update a progress bar).
+    """
+    loop = get_background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coro.close()
+        raise RuntimeError("run_async() called from the background loop; await the coroutine instead")
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    while on_wait is not None:
+        try:
+            return future.result(timeout=poll_seconds)
+        except concurrent.futures.TimeoutError:
+            on_wait()
+    return future.result()
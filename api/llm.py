@@ -1,40 +1,57 @@
 """LLM (Text Generation) Functions"""
 
 import asyncio
-import json
+import time
+from typing import AsyncIterator
 
-import aiohttp
-import streamlit as st
+from core.metrics import observe
+from core.profiler import profiled
+
+from .errors import LLMError
+from .grammar import GRAMMAR_REJECTED_STATUSES, is_grammar_rejection, mark_grammar_unsupported
+from .guards import RepetitionDetector
+from .http import get_client_session
+from .sse import sse_event_batches, ChatStreamState, DONE, json_loads
 
 # OpenAI-compatible endpoint paths
 LLM_PATH = "/v1/chat/completions"
 
 
-def run_async(coro):
-    """Run async coroutine in Streamlit and return result"""
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = None
-    
-    if loop and loop.is_running():
-        # Already in async context, need to await the task
-        async def await_task():
-            return await coro
-        
-        # Create a new event loop for this task
-        new_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(new_loop)
-        try:
-            return new_loop.run_until_complete(await_task())
-        finally:
-            new_loop.close()
-    else:
-        # Synchronous context - use asyncio.run
-        return asyncio.run(coro)
+def llm_config_kwargs(config_llm: dict) -> dict:
+    """Keyword arguments for llm_streaming_chat_completion from the `llm` config section"""
+    return {
+        'system_prompt': config_llm.get('system_prompt', ''),
+        'endpoint': config_llm.get('endpoint', ''),
+        'model': config_llm.get('model', ''),
+        'api_key': config_llm.get('api_key', ''),
+        'max_tokens': config_llm.get('max_tokens', -1),
+        'temperature': config_llm.get('temperature', 0.8),
+        'top_k': config_llm.get('top_k', 40),
+        'top_p': config_llm.get('top_p', 0.95),
+        'min_p': config_llm.get('min_p', 0.05),
+        'extra_api_params': config_llm.get('extra_api_params'),
+    }
+
 
+async def _post_completion(endpoint: str, url: str, payload: dict, headers: dict):
+    """POST a completion request; if the server rejects the grammar, remember that and retry without it"""
+    import aiohttp
+    timeout = aiohttp.ClientTimeout(total=300)
+    resp = await get_client_session().post(url, json=payload, headers=headers, timeout=timeout)
+    if resp.status in GRAMMAR_REJECTED_STATUSES and 'grammar' in payload:
+        # The body stays cached, so the caller can still report any other error
+        error_text = await resp.text()
+        if not is_grammar_rejection(resp.status, error_text):
+            return resp
+        resp.release()
+        mark_grammar_unsupported(endpoint, error_text)
+        payload = {k: v for k, v in payload.items() if k != 'grammar'}
+        resp = await get_client_session().post(url, json=payload, headers=headers, timeout=timeout)
+    return resp
 
-async def llm_streaming_chat_completion(
+
+@profiled('api')
+async def llm_stream_chat_completion(
     prompt: str,
     system_prompt: str,
     endpoint: str,
@@ -45,15 +62,24 @@ async def llm_streaming_chat_completion(
     top_k: int = 40,
     top_p: float = 0.95,
     min_p: float = 0.05,
-    extra_api_params: dict | None = None
-) -> list:
+    extra_api_params: dict | None = None,
+    stop: list | None = None,
+    repetition_detector: RepetitionDetector | None = None,
+    route: str = '',
+    n: int = 1,
+    stream_state: ChatStreamState | None = None,
+    assistant_prefix: str = ''
+) -> AsyncIterator[str]:
     """
-    Generic LLM streaming chat completion - collects all chunks into a list.
+    Generic LLM streaming chat completion - yields text chunks as they arrive.
     
     Per OpenAI API spec (POST /chat/completions with stream=True):
     - Set stream=True in request body
     - Server sends Server-Sent Events (SSE) format
-    - Each event contains delta content
+    - Each event contains delta content (per choice when n > 1)
+    
+    Closing the generator early, or cancelling the task consuming it, closes
+    the HTTP connection so the server aborts decoding.
     
     Args:
         prompt: User prompt
@@ -67,66 +93,135 @@ async def llm_streaming_chat_completion(
         top_p: Top-p sampling parameter
         min_p: Minimum probability sampling parameter
         extra_api_params: Additional parameters to pass to the API (e.g., {"repeat_penalty": 1.1})
+        stop: Stop sequences
+        repetition_detector: Ends the stream early (closing the connection) once it
+            reports the output is looping; check its `triggered` attribute afterwards
+        route: Routing rule that chose this model (added as a label to latency metrics)
+        n: Number of completions to sample; only choice 0 is yielded, all of
+            them accumulate in stream_state
+        stream_state: Receives per-choice text, finish reasons and token usage
+        assistant_prefix: Partial reply to continue; sent as a trailing assistant
+            message, which llama.cpp and similar servers complete (prefill).
+            Only the continuation is yielded
     
-    Returns:
-        List of text chunks from the stream
+    Yields:
+        Text chunks of choice 0 from the stream
+    
+    Raises:
+        LLMError: The request failed or the server returned an error status
     """
     # Append OpenAI-compatible path
     full_endpoint = f"{endpoint.rstrip('/')}{LLM_PATH}"
     
-    chunks = []
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ] + ([{"role": "assistant", "content": assistant_prefix}] if assistant_prefix else []),
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "top_k": top_k,
+        "top_p": top_p,
+        "min_p": min_p,
+        "stream": True,
+        "stream_options": {"include_usage": True}
+    }
+    if n > 1:
+        payload["n"] = n
+    if stop:
+        payload["stop"] = stop
+    
+    if extra_api_params:
+        payload.update(extra_api_params)
+    if assistant_prefix:
+        # A grammar would apply to the continuation alone and make it restart the note
+        payload.pop('grammar', None)
+    
+    # Build headers with authorization if API key provided
+    headers = {}
+    if api_key:
+        headers['Authorization'] = f'Bearer {api_key}'
+    
+    labels = {'model': model, 'route': route} if route else {'model': model}
+    started = time.perf_counter()
+    first_token_at = None
+    num_chunks = 0
+    state = None
+    status = 'error'
     try:
-        payload = {
-            "model": model,
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": max_tokens,
-            "temperature": temperature,
-            "top_k": top_k,
-            "top_p": top_p,
-            "min_p": min_p,
-            "stream": True
-        }
-        
-        if extra_api_params:
-            payload.update(extra_api_params)
-        
-        # Build headers with authorization if API key provided
-        headers = {}
-        if api_key:
-            headers['Authorization'] = f'Bearer {api_key}'
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                full_endpoint,
-                json=payload,
-                headers=headers,
-                timeout=aiohttp.ClientTimeout(total=300)
-            ) as resp:
-                if resp.status == 200:
-                    async for line in resp.content:
-                        line = line.strip()
-                        if not line:
+        async with await _post_completion(endpoint, full_endpoint, payload, headers) as resp:
+            observe('llm_queue_seconds', time.perf_counter() - started, **labels)
+            if resp.status != 200:
+                error_text = await resp.text()
+                raise LLMError(f"LLM Streaming Error: {resp.status} - {error_text}", status=resp.status)
+            
+            status = 'ok'
+            completed = False
+            state = stream_state if stream_state is not None else ChatStreamState()
+            ended = False
+            try:
+                async for events in sse_event_batches(resp.content.iter_any()):
+                    for event, data in events:
+                        if data == DONE:
+                            ended = True
+                            break
+                        try:
+                            chunk = json_loads(data)
+                        except ValueError:
                             continue
-                        if line.startswith(b'data: '):
-                            data = line[6:]
-                            if data == b'[DONE]':
+                        if not isinstance(chunk, dict):
+                            continue
+                        if event == 'error' or 'error' in chunk:
+                            status = 'error'
+                            raise LLMError(f"LLM Streaming Error: {chunk.get('error', chunk)}")
+                        content = state.add(chunk)
+                        if content:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                observe('llm_ttft_seconds', first_token_at - started, **labels)
+                            num_chunks += 1
+                            yield content
+                            if repetition_detector is not None and repetition_detector.feed(content):
+                                status = 'repetition'
+                                ended = True
                                 break
-                            try:
-                                chunk = json.loads(data)
-                                if chunk.get('choices'):
-                                    delta = chunk['choices'][0].get('delta', {})
-                                    content = delta.get('content', '')
-                                    if content:
-                                        chunks.append(content)
-                            except json.JSONDecodeError:
-                                continue
-                else:
-                    error_text = await resp.text()
-                    st.error(f"LLM Streaming Error: {resp.status} - {error_text}")
+                    if ended:
+                        break
+                # Cut short by the repetition guard: drop the connection below
+                completed = status != 'repetition'
+                if state.usage and state.usage.get('completion_tokens'):
+                    observe('llm_completion_tokens', state.usage['completion_tokens'], **labels)
+            finally:
+                if not completed:
+                    # Abandoned mid-stream (cancelled or closed): drop the connection
+                    # so the server stops decoding instead of finishing the completion
+                    resp.close()
+    except (asyncio.CancelledError, GeneratorExit):
+        status = 'cancelled'
+        raise
+    except LLMError:
+        raise
     except Exception as e:
-        st.error(f"LLM Streaming Error: {e}")
+        status = 'error'
+        raise LLMError(f"LLM Streaming Error: {e}") from e
+    finally:
+        finished = time.perf_counter()
+        observe('llm_request_seconds', finished - started, status=status, **labels)
+        # Server-reported tokens when the stream ended with usage; content chunks otherwise
+        usage = state.usage if state is not None else None
+        tokens = usage['completion_tokens'] if usage and usage.get('completion_tokens') else num_chunks
+        if first_token_at is not None and tokens > 1 and finished > first_token_at:
+            observe('llm_output_tokens_per_second', (tokens - 1) / (finished - first_token_at), **labels)
+
+
+@profiled('api')
+async def llm_streaming_chat_completion(prompt: str, **kwargs) -> list:
+    """
+    Collect a streaming chat completion into a list of text chunks.
+    Accepts the same arguments as llm_stream_chat_completion.
     
-    return chunks
+    Raises:
+        LLMError: The request failed or the server returned an error status
+    """
+    return [chunk async for chunk in llm_stream_chat_completion(prompt, **kwargs)]
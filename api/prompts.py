@@ -1,6 +1,17 @@
 """Prompt Formatting Functions"""
 
+from core.profiler import profiled
 
+# Rough characters per token for English clinical text with common tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token count estimate (no tokenizer needed)"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@profiled('api')
 def format_note_writing_prompt(transcript: str, template_prompt: str, context: str = "") -> str:
     """
     Format prompt for writing a new clinical note from transcript.
@@ -32,6 +43,7 @@ Respond only with the complete note in plain text, adhering to the NOTE TEMPLATE
 """
 
 
+@profiled('api')
 def format_note_edit_prompt(original_note: str, instructions: str, template_prompt: str) -> str:
     """
     Format prompt for editing/revising an existing clinical note.
@@ -65,6 +77,7 @@ Respond only with the complete edited note in plain text, adhering to the NOTE T
 """
 
 
+@profiled('api')
 def format_note_synthesis_prompt(
     instructions: str,
     template_prompt: str,
@@ -0,0 +1,72 @@
+"""Model Routing
+
+Picks the backend and model for each note generation from rules in the `llm`
+config section, so small jobs go to a fast model and the large one stays free
+for long work:
+
+    llm:
+      model: google/medgemma-27b-text-it    # default route
+      routes:
+        - name: fast-edit
+          tasks: [edit]                     # scribe | edit | synthesize (any if omitted)
+          max_prompt_tokens: 3000           # optional bounds on the estimated prompt size
+          endpoint: http://localhost:8081   # everything else overrides llm settings
+          model: google/medgemma-4b-it
+
+The first matching rule wins; requests matching none use the `llm` settings.
+Decisions are logged and counted in the llm_route_prompt_tokens histogram, and
+latency metrics of routed requests carry a `route` label.
+"""
+
+import logging
+from typing import Dict, Any, Tuple
+
+from core.metrics import observe
+
+from .prompts import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROUTE = 'default'
+# Rule keys that select requests rather than override settings
+MATCH_KEYS = ('name', 'tasks', 'min_prompt_tokens', 'max_prompt_tokens')
+
+
+def _matches(rule: Dict[str, Any], task: str, prompt_tokens: int) -> bool:
+    tasks = rule.get('tasks')
+    if tasks and task not in tasks:
+        return False
+    if prompt_tokens < rule.get('min_prompt_tokens', 0):
+        return False
+    max_tokens = rule.get('max_prompt_tokens')
+    return max_tokens is None or prompt_tokens <= max_tokens
+
+
+def route_llm_config(config_llm: dict, task: str, prompt: str, record: bool = True) -> Tuple[dict, str]:
+    """
+    Apply the first matching routing rule to the `llm` config section.
+
+    Args:
+        config_llm: `llm` config section (with optional `routes`)
+        task: scribe, edit or synthesize
+        prompt: User prompt that will be sent
+        record: Log and count the decision (off for auxiliary requests such as warm-ups)
+
+    Returns:
+        (llm settings for this request, route name)
+    """
+    prompt_tokens = estimate_tokens(prompt) + estimate_tokens(config_llm.get('system_prompt', ''))
+    routed, route = config_llm, DEFAULT_ROUTE
+    for index, rule in enumerate(config_llm.get('routes') or []):
+        if not isinstance(rule, dict):
+            logger.warning("Ignoring llm route #%d: expected a mapping", index + 1)
+            continue
+        if _matches(rule, task, prompt_tokens):
+            overrides = {key: value for key, value in rule.items() if key not in MATCH_KEYS}
+            routed, route = {**config_llm, **overrides}, rule.get('name') or f"route{index + 1}"
+            break
+
+    if record:
+        logger.info("Routing %s (~%d prompt tokens) to %s: %s", task, prompt_tokens, route, routed.get('model', ''))
+        observe('llm_route_prompt_tokens', prompt_tokens, task=task, route=route, model=routed.get('model', ''))
+    return routed, route
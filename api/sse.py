@@ -0,0 +1,119 @@
+"""Server-Sent Events Decoding
+
+Incremental decoding of OpenAI-compatible chat completion streams:
+- SSEDecoder takes raw bytes as they arrive off the socket (events may be split
+  across reads or span several `data:` lines) and returns complete events;
+  sse_event_batches() drives it over a byte stream, including a final event
+  the server did not terminate with a blank line
+- Payloads stay bytes until parsed; orjson is used when installed
+- ChatStreamState accumulates chat.completion.chunk objects per choice
+  (n > 1), with finish reasons and token usage
+"""
+
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    import json
+    json_loads = json.loads
+
+DONE = b'[DONE]'
+
+
+class SSEDecoder:
+    """
+    Incremental text/event-stream decoder (lines end in \\n or \\r\\n).
+
+    feed() returns (event type, data) pairs for every event completed by the
+    bytes given; a partial trailing event is kept until the next call.
+    """
+
+    def __init__(self):
+        self._buffer = b''
+        self._data: List[bytes] = []
+        self._event = ''
+
+    def feed(self, chunk: bytes) -> List[Tuple[str, bytes]]:
+        buffer = self._buffer + chunk if self._buffer else chunk
+        events = []
+        find = buffer.find
+        start = 0
+        while True:
+            end = find(b'\n', start)
+            if end < 0:
+                break
+            line = buffer[start:end]
+            start = end + 1
+            if line[-1:] == b'\r':
+                line = line[:-1]
+            if not line:
+                self._dispatch(events)
+            elif line[:5] == b'data:':
+                self._data.append(line[6:] if line[5:6] == b' ' else line[5:])
+            elif line[:1] != b':':  # lines starting with ':' are comments
+                name, _, value = line.partition(b':')
+                if name == b'event':
+                    self._event = value.strip().decode('utf-8', 'replace')
+        self._buffer = buffer[start:]
+        return events
+
+    def flush(self) -> List[Tuple[str, bytes]]:
+        """Events left at end of stream (servers may omit the final blank line)"""
+        events = []
+        if self._buffer:
+            events = self.feed(b'\n')
+        self._dispatch(events)
+        return events
+
+    def _dispatch(self, events: list) -> None:
+        data = self._data
+        if data:
+            events.append((self._event or 'message', data[0] if len(data) == 1 else b'\n'.join(data)))
+            self._data = []
+        self._event = ''
+
+
+async def sse_event_batches(chunks: AsyncIterator[bytes]) -> AsyncIterator[List[Tuple[str, bytes]]]:
+    """The events completed by each chunk read, then those left at end of stream"""
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        yield decoder.feed(chunk)
+    yield decoder.flush()
+
+
+class ChatStreamState:
+    """
+    Accumulated state of a streamed chat completion.
+
+    Attributes:
+        choices: Content chunks per choice index
+        finish_reasons: finish_reason per choice index ('stop', 'length', ...)
+        usage: Token usage reported by the server, if any
+    """
+
+    def __init__(self):
+        self.choices: Dict[int, List[str]] = {}
+        self.finish_reasons: Dict[int, str] = {}
+        self.usage: Optional[Dict[str, Any]] = None
+
+    def add(self, chunk: Dict[str, Any]) -> Optional[str]:
+        """Apply one chunk; returns its content delta for choice 0, if any"""
+        if chunk.get('usage'):
+            self.usage = chunk['usage']
+        first = None
+        for choice in chunk.get('choices') or ():
+            index = choice.get('index', 0)
+            content = (choice.get('delta') or {}).get('content')
+            if content:
+                self.choices.setdefault(index, []).append(content)
+                if index == 0:
+                    first = content
+            if choice.get('finish_reason'):
+                self.finish_reasons[index] = choice['finish_reason']
+        return first
+
+    def text(self, index: int = 0) -> str:
+        """Text generated so far for a choice"""
+        return "".join(self.choices.get(index, ()))
@@ -0,0 +1,218 @@
+"""Transcript Normalization
+
+Local clean-up of ASR output before it goes into a note prompt. Raw transcripts
+carry filler words, timestamps and ASR repetition loops that only add prompt
+tokens and prefill time. One linear pass (configured by stt.normalize):
+- Timestamps: bracketed [00:01:02] marks, Whisper <|1.00|> tokens and SRT/VTT
+  cue lines; bare times such as "at 10:30" are kept
+- Dictation commands: "new paragraph", "full stop", "question mark", ... become
+  punctuation. Words that are also clinical terms ("period", "colon", "comma",
+  "new line") are only converted when listed in ambiguous_commands
+- Fillers: um, uh, erm, hmm, ... ("mm-hmm" is an answer and is kept). Tokens in
+  capitals are never fillers, and sounds that double as abbreviations ("AH"
+  alcoholic hepatitis, "HM" hand motion) are not listed at all
+- Repeats: an n-gram (up to max_ngram words) said min_repeats or more times in a
+  row is kept once (its first copy), so "the the" stays but an ASR loop
+  collapses. Repeats containing numbers ("pupils 3 3 3 mm", "strength five
+  five five five") are readings and are kept
+
+Words are never rewritten, only dropped or joined to punctuation, so clinical
+content is preserved. Callers keep the raw transcript alongside the result.
+"""
+
+import re
+import string
+from typing import Optional, Dict, Any, List, Tuple
+
+from core.metrics import observe
+from core.profiler import profiled
+
+from .prompts import estimate_tokens
+
+FILLERS = frozenset({'um', 'umm', 'uh', 'uhh', 'uhm', 'erm', 'hmm'})
+# Repeated numbers are dictated values, not stutters
+NUMBER_WORDS = frozenset({
+    'zero', 'oh', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten',
+    'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen', 'seventeen', 'eighteen',
+    'nineteen', 'twenty', 'thirty', 'forty', 'fifty', 'sixty', 'seventy', 'eighty', 'ninety',
+    'hundred', 'thousand', 'half', 'point',
+})
+
+# Spoken command -> replacement (keys are lowercase, single-spaced)
+DICTATION_COMMANDS = {
+    'new paragraph': '\n\n',
+    'next paragraph': '\n\n',
+    'full stop': '.',
+    'question mark': '?',
+    'exclamation mark': '!',
+    'exclamation point': '!',
+    'semicolon': ';',
+    'open parenthesis': ' (',
+    'close parenthesis': ')',
+}
+# Also clinical words ("menstrual period", "colon cancer", "new line of therapy")
+AMBIGUOUS_COMMANDS = {
+    'period': '.',
+    'colon': ':',
+    'comma': ',',
+    'new line': '\n',
+}
+
+DEFAULT_MIN_REPEATS = 3
+DEFAULT_MAX_NGRAM = 8
+
+_TIME = r'\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?'
+# Parenthesised times need seconds or a fraction to count as timestamps
+_LONG_TIME = r'\d{1,2}:\d{2}(?::\d{2}(?:[.,]\d{1,3})?|[.,]\d{1,3})'
+_TIMESTAMP_RE = re.compile(
+    rf'\[\s*{_TIME}(?:\s*(?:-->|-)\s*{_TIME})?\s*\]'
+    rf'|\(\s*{_LONG_TIME}(?:\s*(?:-->|-)\s*{_LONG_TIME})?\s*\)'
+    r'|<\|\d+(?:\.\d+)?\|>'
+    rf'|^[ \t]*(?:\d+[ \t]*\n[ \t]*)?{_TIME}[ \t]*-->[ \t]*{_TIME}[^\n]*$'
+    r'|^[ \t]*WEBVTT\b[^\n]*$',
+    re.MULTILINE
+)
+_SENTENCE_END = ('.', '?', '!')
+
+
+def _command_regex(commands: Dict[str, str]):
+    phrases = sorted(commands, key=len, reverse=True)
+    alternation = '|'.join(r'\s+'.join(map(re.escape, phrase.split())) for phrase in phrases)
+    # Absorbs the spaces and stray punctuation ASR puts around a spoken command
+    return re.compile(rf'[ \t]*[,;]?[ \t]*\b(?:{alternation})\b[.,]?[ \t]*', re.IGNORECASE)
+
+
+def _command_replacement(match, replacements: Dict[str, str]) -> str:
+    phrase = ' '.join(match.group(0).strip(' \t,;.').lower().split())
+    value = replacements[phrase]
+    return value if value.startswith(('\n', ' ')) else value + ' '
+
+
+def _key(token: str) -> str:
+    return token.strip(string.punctuation).lower()
+
+
+def _is_filler(token: str) -> bool:
+    word = token.strip(string.punctuation)
+    # All-caps tokens are abbreviations, not hesitation sounds
+    return word.lower() in FILLERS and not (len(word) > 1 and word.isupper())
+
+
+def _is_numeric(key: str) -> bool:
+    return key in NUMBER_WORDS or any(c.isdigit() for c in key)
+
+
+def _drop_fillers(tokens: List[str]) -> Tuple[List[str], int]:
+    kept = []
+    removed = 0
+    capitalize = False
+    for token in tokens:
+        if _is_filler(token):
+            removed += 1
+            # Keep the sentence boundary and capitalisation the filler carried
+            if token.endswith(_SENTENCE_END) and kept and not kept[-1].endswith(tuple(string.punctuation)):
+                kept[-1] += token[-1]
+            capitalize = capitalize or token[:1].isupper()
+            continue
+        if capitalize and token[:1].islower():
+            token = token[0].upper() + token[1:]
+        capitalize = False
+        kept.append(token)
+    return kept, removed
+
+
+def _collapse_repeats(tokens: List[str], min_repeats: int, max_ngram: int) -> Tuple[List[str], int]:
+    """
+    Keep one copy of every run of an n-gram repeated back to back min_repeats
+    or more times. Each position tries at most max_ngram unit sizes and a run
+    is skipped once counted, so the pass is linear in the number of tokens.
+    """
+    keys = [_key(token) for token in tokens]
+    numeric = [_is_numeric(key) for key in keys]
+    total = len(tokens)
+    kept = []
+    removed = 0
+    i = 0
+    while i < total:
+        best_size, best_count = 0, 1
+        for size in range(1, max_ngram + 1):
+            if i + size * min_repeats > total:
+                break
+            unit = keys[i:i + size]
+            if not all(unit) or any(numeric[i:i + size]):
+                continue
+            count = 1
+            while keys[i + count * size:i + (count + 1) * size] == unit:
+                count += 1
+            if count >= min_repeats and size * count > best_size * best_count:
+                best_size, best_count = size, count
+        if best_size:
+            # First copy's wording and casing, last copy's closing punctuation
+            end = i + best_size * best_count
+            last = tokens[end - 1]
+            kept.extend(tokens[i:i + best_size - 1])
+            kept.append(tokens[i + best_size - 1].rstrip(string.punctuation) + last[len(last.rstrip(string.punctuation)):])
+            removed += best_size * (best_count - 1)
+            i = end
+        else:
+            kept.append(tokens[i])
+            i += 1
+    return kept, removed
+
+
+@profiled('api')
+def normalize_transcript(text: str, options: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, int]]:
+    """
+    Normalize an ASR transcript for prompting.
+
+    Args:
+        text: Raw transcript
+        options: stt.normalize settings - enabled, timestamps, dictation_commands,
+            ambiguous_commands (list), fillers, collapse_repeats, min_repeats, max_ngram
+
+    Returns:
+        (normalized text, stats) where stats counts timestamps, commands,
+        fillers and repeats (words) removed, and tokens_before/after/saved
+    """
+    options = options or {}
+    stats = {'timestamps': 0, 'commands': 0, 'fillers': 0, 'repeats': 0}
+    if not options.get('enabled', True) or not text:
+        tokens = estimate_tokens(text)
+        return text, {**stats, 'tokens_before': tokens, 'tokens_after': tokens, 'tokens_saved': 0}
+
+    result = text
+    if options.get('timestamps', True):
+        result, stats['timestamps'] = _TIMESTAMP_RE.subn('', result)
+
+    if options.get('dictation_commands', True):
+        commands = dict(DICTATION_COMMANDS)
+        for word in options.get('ambiguous_commands') or ():
+            word = ' '.join(str(word).lower().split())
+            if word in AMBIGUOUS_COMMANDS:
+                commands[word] = AMBIGUOUS_COMMANDS[word]
+        result, stats['commands'] = _command_regex(commands).subn(
+            lambda match: _command_replacement(match, commands), result
+        )
+
+    lines = []
+    min_repeats = max(2, int(options.get('min_repeats', DEFAULT_MIN_REPEATS)))
+    max_ngram = max(1, int(options.get('max_ngram', DEFAULT_MAX_NGRAM)))
+    for line in result.split('\n'):
+        tokens = line.split()
+        if options.get('fillers', True):
+            tokens, removed = _drop_fillers(tokens)
+            stats['fillers'] += removed
+        if options.get('collapse_repeats', True):
+            tokens, removed = _collapse_repeats(tokens, min_repeats, max_ngram)
+            stats['repeats'] += removed
+        lines.append(' '.join(tokens))
+    # At most one blank line between paragraphs
+    result = re.sub(r'\n{3,}', '\n\n', '\n'.join(lines)).strip()
+
+    stats['tokens_before'] = estimate_tokens(text)
+    stats['tokens_after'] = estimate_tokens(result)
+    stats['tokens_saved'] = stats['tokens_before'] - stats['tokens_after']
+    if stats['tokens_before']:
+        observe('transcript_normalized_ratio', stats['tokens_after'] / stats['tokens_before'])
+    return result, stats
+
@@ -0,0 +1,150 @@
+"""Prompt Cache Warm-up
+
+Optional prefill of a note prompt while the user is still editing its inputs,
+so the LLM server's prompt cache (llama.cpp cache_prompt) already holds the
+prefix when Generate is clicked and decoding starts almost at once:
+- Debounced: a warm-up is sent DEBOUNCE_SECONDS after the last change
+- Superseded: a newer warm-up for the same key, or the real generation,
+  cancels a pending or running one
+- Rate-limited: warm-ups from this process are sent at least
+  MIN_INTERVAL_SECONDS apart; later ones wait for their slot rather than being
+  dropped, and a slot is only taken when a request is actually sent (one
+  superseded while waiting leaves it free)
+- Measured: warm-up requests are labelled route=warmup in the LLM metrics, and
+  each generation records how much of its prompt the last warm-up covered in
+  llm_warmup_coverage (result=hit|partial|miss)
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, Tuple
+
+from core.metrics import observe
+from core.profiler import detach_from_rerun
+
+from .http import get_background_loop
+from .llm import llm_stream_chat_completion, llm_config_kwargs
+from .routing import route_llm_config
+
+logger = logging.getLogger(__name__)
+
+DEBOUNCE_SECONDS = 1.5
+MIN_INTERVAL_SECONDS = 5.0
+# Share of the prompt a warm-up must cover to count as a hit
+HIT_COVERAGE = 0.9
+# Completed warm-ups remembered until their generation starts (oldest dropped first)
+MAX_WARMED = 200
+
+WarmupKey = Tuple[str, str]
+
+_pending: Dict[WarmupKey, Any] = {}
+# Last completed warm-up per key: ((endpoint, model, system_prompt), prompt)
+_warmed: Dict[WarmupKey, Tuple[tuple, str]] = {}
+_lock = threading.Lock()
+# Background-loop time before which no warm-up may be sent (only touched on the loop)
+_next_slot = 0.0
+
+
+def warmup_kwargs(config_llm: dict, task: str, prompt: str) -> Dict[str, Any]:
+    """Arguments for a prefill-only request that primes the cache for the routed model"""
+    routed, _ = route_llm_config(config_llm, task, prompt, record=False)
+    kwargs = llm_config_kwargs(routed)
+    kwargs['max_tokens'] = 1
+    kwargs['extra_api_params'] = {**(kwargs['extra_api_params'] or {}), 'cache_prompt': True}
+    kwargs['route'] = 'warmup'
+    return kwargs
+
+
+def _target(llm_kwargs: Dict[str, Any]) -> tuple:
+    return llm_kwargs.get('endpoint'), llm_kwargs.get('model'), llm_kwargs.get('system_prompt')
+
+
+async def _warm(key: WarmupKey, prompt: str, llm_kwargs: Dict[str, Any], debounce: float) -> None:
+    global _next_slot
+    detach_from_rerun()
+    await asyncio.sleep(debounce)
+    loop = asyncio.get_running_loop()
+    # Another warm-up may take the slot while this one sleeps, so check again after waking
+    while _next_slot > loop.time():
+        await asyncio.sleep(_next_slot - loop.time())
+    _next_slot = loop.time() + MIN_INTERVAL_SECONDS
+    try:
+        async for _ in llm_stream_chat_completion(prompt, **llm_kwargs):
+            pass
+    except Exception as e:
+        logger.debug("Warm-up for %s failed: %s", key, e)
+        return
+    with _lock:
+        _warmed.pop(key, None)
+        _warmed[key] = (_target(llm_kwargs), prompt)
+        for old_key in list(_warmed)[:max(0, len(_warmed) - MAX_WARMED)]:
+            del _warmed[old_key]
+
+
+def schedule_warmup(key: WarmupKey, prompt: str, llm_kwargs: Dict[str, Any], debounce: float = DEBOUNCE_SECONDS) -> None:
+    """
+    Warm the server's prompt cache for a prompt, replacing any warm-up pending for the key.
+
+    Args:
+        key: (session_id, mode)
+        prompt: User prompt the next generation is expected to send
+        llm_kwargs: Request arguments (see warmup_kwargs)
+        debounce: Seconds to wait for further changes before sending
+    """
+    with _lock:
+        if _warmed.get(key) == (_target(llm_kwargs), prompt):
+            return
+        previous = _pending.get(key)
+        future = asyncio.run_coroutine_threadsafe(_warm(key, prompt, llm_kwargs, debounce), get_background_loop())
+        _pending[key] = future
+    # Outside the lock: cancelling runs the previous future's done callback (_forget) at once
+    if previous is not None:
+        previous.cancel()
+    future.add_done_callback(lambda f: _forget(key, f))
+
+
+def warmup_pending(key: WarmupKey) -> bool:
+    """Whether a warm-up for the key is waiting or running"""
+    with _lock:
+        return key in _pending
+
+
+def _forget(key: WarmupKey, future) -> None:
+    with _lock:
+        if _pending.get(key) is future:
+            del _pending[key]
+
+
+def _common_prefix_length(a: str, b: str) -> int:
+    # Binary search over slice comparisons (done in C) instead of a per-character loop
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def use_warmup(key: WarmupKey, prompt: str, llm_kwargs: Dict[str, Any]) -> float:
+    """
+    Call when the real generation starts: cancels the key's pending warm-up and
+    records how much of the prompt the last completed warm-up covered.
+
+    Returns:
+        Covered fraction of the prompt (0 if nothing matching was warmed)
+    """
+    with _lock:
+        pending = _pending.pop(key, None)
+        warmed = _warmed.pop(key, None)
+    if pending is not None:
+        pending.cancel()
+
+    coverage = 0.0
+    if warmed is not None and warmed[0] == _target(llm_kwargs) and prompt:
+        coverage = _common_prefix_length(warmed[1], prompt) / len(prompt)
+    result = 'hit' if coverage >= HIT_COVERAGE else 'partial' if coverage > 0 else 'miss'
+    observe('llm_warmup_coverage', coverage, result=result)
+    return coverage
@@ -8,47 +8,40 @@ Features:
 - Synthesize Mode: Combine multiple sources into comprehensive notes
 """
 
-from core import load_config
-from ui import render_scribe_mode, render_edit_mode, render_synthesize_mode, render_settings, render_session_manager, render_session_picker
+from core import load_config, start_retention_worker, configure_revisions
+from core.metrics import start_metrics_exporter
+from core.profiler import profile_rerun, DEFAULT_DUMP_DIR
+from ui import render_scribe_mode, render_edit_mode, render_synthesize_mode, render_settings, render_session_manager, render_session_picker, render_profiler_panel, render_mode_router, track_session_version, render_autosave_conflict
 
 
-def main():
-    """Main application entry point"""
-    # Load configuration
-    config = load_config()
-    
+def render_app(config: dict) -> None:
+    """Render the page content for one rerun"""
     import streamlit as st
-    st.set_page_config(
-        page_title="DS Med Helper",
-        page_icon="🏥",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
-    
+
     # Main content
     st.title("🏥 DS Med Helper")
-    
+
     # Session picker
     session = render_session_picker()
-    
-    # Navigation tabs (sticky)
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📝 Scribe", "✏️ Edit", "📋 Synthesize", "📚 Sessions", "⚙️ Settings"])
-    
-    with tab1:
+
+    # Versions for autosave conflict detection, and any conflict from the last save
+    track_session_version(session)
+    render_autosave_conflict()
+
+    # Navigation - only the active mode is rendered on each rerun
+    mode = render_mode_router()
+
+    if mode == 'scribe':
         render_scribe_mode(config, session)
-    
-    with tab2:
+    elif mode == 'edit':
         render_edit_mode(config, session)
-    
-    with tab3:
+    elif mode == 'synthesize':
         render_synthesize_mode(config, session)
-    
-    with tab4:
+    elif mode == 'sessions':
         render_session_manager()
-    
-    with tab5:
+    elif mode == 'settings':
         render_settings(config)
-    
+
     # Footer
     st.markdown("---")
     st.markdown(
@@ -56,5 +49,41 @@ def main():
     )
 
 
+def main():
+    """Main application entry point"""
+    # Load configuration
+    config = load_config()
+
+    # Archive sessions beyond session.max_history in the background
+    start_retention_worker(config)
+
+    # Note revision history limits (session.max_revisions, session.max_revision_bytes)
+    configure_revisions(config)
+
+    # Prometheus endpoint / JSONL metrics export, if configured
+    start_metrics_exporter(config)
+
+    import streamlit as st
+    st.set_page_config(
+        page_title="DS Med Helper",
+        page_icon="🏥",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    # Opt-in profiling: profiling.enabled in config.yaml, or ?profile=1 for this browser
+    # when profiling.allow_query_param is set (it exposes timings and writes .prof files)
+    profiling_config = config.get('profiling', {}) or {}
+    profiling_enabled = bool(profiling_config.get('enabled')) or (
+        bool(profiling_config.get('allow_query_param')) and st.query_params.get('profile') == '1')
+    capture_cprofile = profiling_enabled and st.session_state.pop('profiler_capture_next', False)
+
+    with profile_rerun(profiling_enabled, capture_cprofile, profiling_config.get('dump_dir', DEFAULT_DUMP_DIR)) as rerun_profile:
+        render_app(config)
+
+    if profiling_enabled:
+        render_profiler_panel(rerun_profile)
+
+
 if __name__ == "__main__":
     main()
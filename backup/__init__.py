@@ -0,0 +1 @@
+# Backup - Command-line session export/import (see core/transfer.py)
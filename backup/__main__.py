@@ -0,0 +1,73 @@
+"""
+Bulk export and import of sessions as (gzip-compressed) NDJSON.
+
+Usage:
+    python -m backup export sessions.ndjson.gz
+    python -m backup export q1.ndjson.gz --since 2026-01-01 --until 2026-03-31
+    python -m backup export sessions.ndjson.gz --resume
+    python -m backup import sessions.ndjson.gz --on-conflict newer
+    python -m backup import sessions.ndjson.gz --target-dir /mnt/new_host/sessions
+    python -m backup import sessions.ndjson.gz --sink mypackage.storage:make_sink
+
+Sessions are read from and imported into the sessions folder of the working
+directory unless --target-dir or --sink is given. An interrupted run continues
+where it stopped with --resume. The final stats (including sessions_per_second)
+are printed as JSON.
+"""
+
+import argparse
+import importlib
+import json
+import sys
+
+from core.transfer import export_sessions, import_sessions, DirectorySink, CONFLICT_POLICIES
+
+
+def _print_progress(stats) -> None:
+    print(f"\r{stats['sessions']} sessions, {stats['sessions_per_second']:.0f}/s", end='', file=sys.stderr, flush=True)
+
+
+def _load_sink(spec: str):
+    """Instantiate a SessionSink from 'module:callable'"""
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"--sink must be module:callable, got '{spec}'")
+    return getattr(importlib.import_module(module_name), attr)()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m backup', description="Export or import sessions as NDJSON")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = commands.add_parser('export', help="Write sessions to an NDJSON file")
+    import_parser = commands.add_parser('import', help="Load sessions from an NDJSON file")
+    for sub in (export_parser, import_parser):
+        sub.add_argument('path', help="NDJSON file (.ndjson.gz for gzip)")
+        sub.add_argument('--since', help="Only sessions updated on or after this ISO date/time")
+        sub.add_argument('--until', help="Only sessions updated on or before this ISO date/time")
+        sub.add_argument('--resume', action='store_true', help="Continue an interrupted run from its checkpoint")
+    import_parser.add_argument('--on-conflict', choices=CONFLICT_POLICIES, default='newer',
+                               help="Existing sessions: replace if older (newer), keep (skip) or replace (overwrite)")
+    target = import_parser.add_mutually_exclusive_group()
+    target.add_argument('--target-dir', help="Write session files to this folder instead of the live sessions folder")
+    target.add_argument('--sink', help="Storage backend as module:callable returning a SessionSink")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'export':
+            stats = export_sessions(args.path, since=args.since, until=args.until, resume=args.resume,
+                                    progress=_print_progress)
+        else:
+            sink = _load_sink(args.sink) if args.sink else DirectorySink(args.target_dir)
+            stats = import_sessions(args.path, sink=sink, on_conflict=args.on_conflict, since=args.since,
+                                    until=args.until, resume=args.resume, progress=_print_progress)
+    except (OSError, ValueError) as e:
+        print(f"\n{e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+    print(json.dumps(stats, indent=2))
+    return 0 if not stats.get('invalid') and not stats.get('truncated') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
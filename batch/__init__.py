@@ -0,0 +1,9 @@
+# Batch - Headless recordings -> transcripts -> notes pipeline
+from .engine import run_batch, find_recordings
+from .manifest import Manifest
+
+__all__ = [
+    'run_batch',
+    'find_recordings',
+    'Manifest',
+]
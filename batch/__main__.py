@@ -0,0 +1,79 @@
+"""
+Headless batch processing of recordings into clinical notes.
+
+Usage:
+    python -m batch recordings/ --template "History And Physical" -o batch_output/
+    python -m batch recordings/ --template history_and_physical --asr-workers 4 --llm-workers 2
+
+Re-running with the same output directory resumes: finished recordings are
+skipped and failed ones are retried. Endpoints and sampling parameters come
+from config.yaml in the working directory.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from core import load_config, load_templates, get_fallback_templates, configure_revisions
+
+from .engine import run_batch, find_recordings
+
+
+def _print_progress(manifest) -> None:
+    counts = {}
+    for item in manifest.items.values():
+        counts[item['status']] = counts.get(item['status'], 0) + 1
+    summary = ", ".join(f"{status}: {count}" for status, count in sorted(counts.items()))
+    if manifest.uploads:
+        sent = sum(s for s, _ in manifest.uploads.values())
+        total = sum(t or 0 for _, t in manifest.uploads.values())
+        summary += f", uploading {len(manifest.uploads)} ({sent / 1024 ** 2:.1f}/{total / 1024 ** 2:.1f} MB)"
+    print(f"\r{summary}", end='', file=sys.stderr, flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m batch', description="Transcribe recordings and generate notes")
+    parser.add_argument('input_dir', help="Directory containing audio recordings")
+    parser.add_argument('-t', '--template', required=True, help="Template name or id (see templates/)")
+    parser.add_argument('-o', '--output-dir', default='batch_output', help="Manifest, report and note output directory")
+    parser.add_argument('-c', '--context', default='', help="Additional context/instructions for every note")
+    parser.add_argument('--asr-workers', type=int, default=2, help="Concurrent ASR requests")
+    parser.add_argument('--llm-workers', type=int, default=1, help="Concurrent LLM requests")
+    args = parser.parse_args()
+
+    config = load_config() or {}
+    configure_revisions(config)
+    templates = load_templates() or get_fallback_templates()
+    template = next((t for t in templates if args.template in (t.get('id'), t['name'])), None)
+    if template is None:
+        names = ", ".join(t['name'] for t in templates)
+        print(f"Unknown template '{args.template}'. Available: {names}", file=sys.stderr)
+        return 2
+
+    recordings = find_recordings(args.input_dir)
+    if not recordings:
+        print(f"No recordings found in {args.input_dir}", file=sys.stderr)
+        return 1
+
+    report = asyncio.run(run_batch(
+        recordings,
+        config,
+        template,
+        args.output_dir,
+        context=args.context,
+        asr_workers=args.asr_workers,
+        llm_workers=args.llm_workers,
+        progress=_print_progress
+    ))
+    print(file=sys.stderr)
+
+    with open(os.path.join(args.output_dir, 'report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 0 if report['failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Batch Pipeline Engine
+
+Turns a directory of recordings into transcripts and notes without Streamlit:
+- Separate ASR and LLM worker pools connected by a bounded queue, so
+  transcription of later recordings overlaps note generation of earlier ones
+- Every recording gets its own session (same fields as Scribe mode)
+- Progress is recorded in a manifest so interrupted runs resume where they stopped
+- Session and note file I/O runs in worker threads, so it does not stall the
+  uploads and streams in flight on the event loop
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Any, List
+
+from api import (
+    asr_transcribe, normalize_transcript, llm_streaming_chat_completion, note_generation_kwargs, note_stop_reason, record_note_output,
+    format_note_writing_prompt,
+    close_client_session, APIError
+)
+from core import create_session, get_session_by_id, update_session
+
+from .manifest import Manifest
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3', '.m4a', '.ogg', '.flac', '.webm')
+
+_DONE = object()
+
+
+def find_recordings(input_dir: str, extensions: tuple = AUDIO_EXTENSIONS) -> List[str]:
+    """List audio files in a directory (non-recursive), sorted by name"""
+    return sorted(
+        os.path.join(input_dir, name)
+        for name in os.listdir(input_dir)
+        if name.lower().endswith(extensions)
+    )
+
+
+def _write_note(path: str, note: str) -> None:
+    with open(path, 'w') as f:
+        f.write(note)
+
+
+async def _asr_worker(asr_queue: asyncio.Queue, llm_queue: asyncio.Queue, manifest: Manifest,
+                      config_stt: dict, template: dict, stats: Dict[str, Any]) -> None:
+    while True:
+        recording = await asr_queue.get()
+        if recording is _DONE:
+            return
+
+        item = manifest.items[recording]
+        if not item.get('session_id'):
+            session = await asyncio.to_thread(create_session)
+            await asyncio.to_thread(update_session, session['id'], {
+                'scribe_template': template['name'],
+                'batch_source': os.path.basename(recording)
+            })
+            manifest.update(recording, session_id=session['id'])
+
+        def report_upload(sent, total):
+            manifest.uploads[recording] = (sent, total)
+
+        started = time.perf_counter()
+        try:
+            # Streamed from disk, so long recordings are not loaded into memory
+            transcript = await asr_transcribe(
+                recording,
+                config_stt.get('endpoint', ''),
+                config_stt.get('model', 'google/medasr'),
+                config_stt.get('api_key', ''),
+                progress=report_upload
+            )
+            error = None if transcript else "ASR returned no text"
+        except APIError as e:
+            error = str(e)
+        finally:
+            manifest.uploads.pop(recording, None)
+        elapsed = time.perf_counter() - started
+        stats['asr_seconds'] += elapsed
+
+        if error:
+            manifest.update(recording, status='failed', failed_stage='asr', error=error)
+            stats['failed'] += 1
+            continue
+
+        normalized, normalization = normalize_transcript(transcript, config_stt.get('normalize'))
+        await asyncio.to_thread(update_session, item['session_id'], {
+            'scribe_transcript': normalized, 'scribe_transcript_raw': transcript, 'scribe_normalization': normalization
+        })
+        stats['transcript_tokens_saved'] += normalization['tokens_saved']
+        manifest.update(recording, status='transcribed', asr_seconds=elapsed, error=None,
+                        transcript_tokens_saved=normalization['tokens_saved'])
+        await llm_queue.put(recording)
+
+
+async def _llm_worker(llm_queue: asyncio.Queue, manifest: Manifest, config_llm: dict, template: dict,
+                      context: str, output_dir: str, stats: Dict[str, Any]) -> None:
+    while True:
+        recording = await llm_queue.get()
+        if recording is _DONE:
+            return
+
+        item = manifest.items[recording]
+        session = await asyncio.to_thread(get_session_by_id, item['session_id']) or {}
+        transcript = session.get('scribe_transcript', '')
+
+        prompt = format_note_writing_prompt(transcript.strip(), template['system_prompt'], context.strip())
+        llm_kwargs = note_generation_kwargs(config_llm, template, 'scribe', prompt)
+        started = time.perf_counter()
+        try:
+            note = "".join(await llm_streaming_chat_completion(prompt=prompt, **llm_kwargs))
+            error = None if note else "LLM returned no text"
+        except APIError as e:
+            error = str(e)
+        elapsed = time.perf_counter() - started
+        stats['llm_seconds'] += elapsed
+
+        if error:
+            manifest.update(recording, status='failed', failed_stage='llm', error=error)
+            stats['failed'] += 1
+            continue
+
+        await asyncio.to_thread(update_session, item['session_id'], {'scribe_note': note})
+        stop_reason = note_stop_reason(llm_kwargs)
+        if stop_reason is None:
+            await asyncio.to_thread(record_note_output, template, note, llm_kwargs['stream_state'].usage)
+        # visit.wav -> visit.wav.txt, so visit.wav and visit.mp3 do not overwrite each other's note
+        note_path = os.path.join(output_dir, os.path.basename(recording) + '.txt')
+        await asyncio.to_thread(_write_note, note_path, note)
+        manifest.update(recording, status='done', llm_seconds=elapsed, note_file=note_path, error=None,
+                        stop_reason=stop_reason, route=llm_kwargs['route'])
+        stats['done'] += 1
+
+
+async def run_batch(
+    recordings: List[str],
+    config: dict,
+    template: dict,
+    output_dir: str,
+    context: str = "",
+    asr_workers: int = 2,
+    llm_workers: int = 1,
+    progress=None
+) -> Dict[str, Any]:
+    """
+    Run the recordings -> transcripts -> notes pipeline.
+
+    Args:
+        recordings: Audio file paths
+        config: Application configuration (uses the `stt` and `llm` sections)
+        template: Note template dict (from load_templates)
+        output_dir: Directory for the manifest, report and generated notes
+        context: Additional context/instructions applied to every note
+        asr_workers: Concurrent ASR requests
+        llm_workers: Concurrent LLM requests
+        progress: Optional callback(manifest) invoked every second while running
+
+    Returns:
+        Throughput report
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = Manifest(output_dir)
+    for recording in recordings:
+        manifest.add(recording)
+    manifest.save()
+
+    # Failed items are retried from the stage that failed
+    def needs(recording, stage):
+        item = manifest.items[recording]
+        first_status = 'pending' if stage == 'asr' else 'transcribed'
+        return item['status'] == first_status or (item['status'] == 'failed' and item.get('failed_stage') == stage)
+
+    to_transcribe = [r for r in recordings if needs(r, 'asr')]
+    to_generate = [r for r in recordings if needs(r, 'llm')]
+    skipped = len(recordings) - len(to_transcribe) - len(to_generate)
+
+    stats = {'done': 0, 'failed': 0, 'asr_seconds': 0.0, 'llm_seconds': 0.0, 'transcript_tokens_saved': 0}
+    asr_queue: asyncio.Queue = asyncio.Queue()
+    # Bounded so transcription cannot run arbitrarily far ahead of generation
+    llm_queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, llm_workers * 2))
+
+    for recording in to_transcribe:
+        asr_queue.put_nowait(recording)
+    for _ in range(asr_workers):
+        asr_queue.put_nowait(_DONE)
+
+    started = time.perf_counter()
+    asr_tasks = [
+        asyncio.create_task(_asr_worker(asr_queue, llm_queue, manifest, config.get('stt', {}), template, stats))
+        for _ in range(asr_workers)
+    ]
+    llm_tasks = [
+        asyncio.create_task(_llm_worker(llm_queue, manifest, config.get('llm', {}), template, context, output_dir, stats))
+        for _ in range(llm_workers)
+    ]
+
+    async def feed_and_finish():
+        # Already-transcribed items (resumed runs) go straight to generation
+        for recording in to_generate:
+            await llm_queue.put(recording)
+        await asyncio.gather(*asr_tasks)
+        for _ in range(llm_workers):
+            await llm_queue.put(_DONE)
+
+    async def report_progress():
+        while True:
+            await asyncio.sleep(1)
+            progress(manifest)
+
+    progress_task = asyncio.create_task(report_progress()) if progress else None
+    try:
+        await asyncio.gather(feed_and_finish(), *llm_tasks)
+    finally:
+        if progress_task:
+            progress_task.cancel()
+        manifest.flush()
+        await close_client_session()
+    wall = time.perf_counter() - started
+
+    report = {
+        'recordings': len(recordings),
+        'skipped_already_done': skipped,
+        'done': stats['done'],
+        'failed': stats['failed'],
+        'wall_seconds': wall,
+        'notes_per_minute': stats['done'] / wall * 60 if wall > 0 else 0.0,
+        'asr_workers': asr_workers,
+        'llm_workers': llm_workers,
+        # Busy time summed over workers; > wall_seconds means the stages overlapped
+        'asr_busy_seconds': stats['asr_seconds'],
+        'llm_busy_seconds': stats['llm_seconds'],
+        # Estimated prompt tokens removed by transcript normalization this run
+        'transcript_tokens_saved': stats['transcript_tokens_saved'],
+    }
+    return report
@@ -0,0 +1,65 @@
+"""Batch Manifest
+
+Records the state of every recording in a batch run so an interrupted run can
+be resumed without repeating finished work:
+- pending:     not started
+- transcribed: transcript saved to its session, note not yet generated
+- done:        note generated and saved
+- failed:      error recorded; retried from the failed stage on resume
+
+Updates are written at most every SAVE_INTERVAL_SECONDS (rewriting the file on
+every event is quadratic over a large batch); flush() writes the rest, and an
+interrupted run repeats at most the work of that interval.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+MANIFEST_FILE = 'manifest.json'
+SAVE_INTERVAL_SECONDS = 2.0
+
+
+class Manifest:
+    """JSON manifest of batch items keyed by recording path"""
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_FILE)
+        self.items: Dict[str, Dict[str, Any]] = {}
+        # Uploads in progress: recording -> (bytes sent, total bytes); not persisted
+        self.uploads: Dict[str, Tuple[int, Optional[int]]] = {}
+        self._dirty = False
+        self._saved_at = 0.0
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                self.items = json.load(f).get('items', {})
+
+    def add(self, recording: str) -> Dict[str, Any]:
+        """Register a recording (no-op if already known)"""
+        return self.items.setdefault(recording, {'status': 'pending', 'session_id': None})
+
+    def update(self, recording: str, **fields) -> None:
+        """Update an item; the manifest is persisted if SAVE_INTERVAL_SECONDS passed since the last save"""
+        self.items[recording].update(fields, updated_at=datetime.now().isoformat())
+        self._dirty = True
+        if time.monotonic() - self._saved_at >= SAVE_INTERVAL_SECONDS:
+            self.save()
+
+    def flush(self) -> None:
+        """Persist updates not yet saved"""
+        if self._dirty:
+            self.save()
+
+    def save(self) -> None:
+        """Persist the manifest atomically"""
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({'items': self.items}, f, indent=2)
+        os.replace(temp_path, self.path)
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def with_status(self, *statuses: str) -> List[str]:
+        return [path for path, item in self.items.items() if item['status'] in statuses]
@@ -0,0 +1,10 @@
+# Bench - Benchmarks against local stand-in LLM/ASR servers
+from .servers import StandInLLMServer, StandInASRServer
+from .report import summarize, compare_results
+
+__all__ = [
+    'StandInLLMServer',
+    'StandInASRServer',
+    'summarize',
+    'compare_results',
+]
@@ -0,0 +1,50 @@
+"""
+Run the benchmark suite.
+
+Usage:
+    python -m bench                                  # all scenarios, JSON to stdout
+    python -m bench -s llm_stream -n 50 -o run.json  # one scenario, saved
+    python -m bench --compare baseline.json          # also print changes vs a previous run
+"""
+
+import argparse
+import json
+import sys
+
+from .report import environment_info, compare_results
+from .scenarios import SCENARIOS
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench', description="DS Med Helper client overhead benchmarks")
+    parser.add_argument('-s', '--scenario', action='append', choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument('-n', '--iterations', type=int, default=20, help="Iterations per scenario")
+    parser.add_argument('-o', '--output', help="Write results JSON to this file")
+    parser.add_argument('--compare', help="Baseline results JSON to compare against (p50)")
+    args = parser.parse_args()
+
+    results = {'meta': environment_info(), 'iterations': args.iterations, 'scenarios': {}}
+    for name in args.scenario or list(SCENARIOS):
+        print(f"Running {name}...", file=sys.stderr)
+        results['scenarios'][name] = SCENARIOS[name](args.iterations)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        print(f"\n{'metric':<60} {'baseline':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+        for row in compare_results(baseline, results):
+            print(f"{row['metric']:<60} {row['baseline']:>12.6g} {row['current']:>12.6g} {row['change_pct']:>+7.1f}%",
+                  file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
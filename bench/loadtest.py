@@ -0,0 +1,240 @@
+"""
+Multi-user load test for the session store, api layer and Streamlit app.
+
+Simulated clinicians run concurrently on threads, each repeating a realistic
+mix of actions with think time in between:
+- typing autosaves (update_session with a growing field)
+- session switches (load of another session)
+- note generations against a stand-in LLM server
+
+Two drivers are available:
+- core:    every action is preceded by the core calls a Streamlit rerun makes
+           (session list, session load, template load) and timed directly
+- apptest: every user drives the real app.py through streamlit.testing AppTest
+
+Usage:
+    python -m bench.loadtest --users 1,4,16 --duration 20
+    python -m bench.loadtest --driver apptest --users 1,2,4 -o load.json
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Dict, Any, List
+
+from .report import summarize, environment_info
+from .servers import StandInLLMServer
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TYPING_TEXT = "Patient reports improved dyspnea overnight, tolerating diet, ambulating in hallway. "
+
+
+class _Recorder:
+    """Thread-safe collection of per-action timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[str, List[float]] = {}
+        self.errors = 0
+
+    def record(self, action: str, seconds: float) -> None:
+        with self._lock:
+            self.samples.setdefault(action, []).append(seconds)
+
+    def error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+
+def _prepare_workdir(history: int) -> str:
+    """Create an isolated working directory with templates and pre-populated session history"""
+    workdir = tempfile.mkdtemp(prefix='ds_med_loadtest_')
+    shutil.copytree(os.path.join(APP_ROOT, 'templates'), os.path.join(workdir, 'templates'))
+    os.chdir(workdir)
+
+    from core import create_session, update_session
+    for i in range(history):
+        session = create_session()
+        update_session(session['id'], {
+            'scribe_transcript': TYPING_TEXT * 20,
+            'scribe_note': f"History and Physical:\nHPI: synthetic history session {i}\n" * 10,
+        })
+    return workdir
+
+
+def _core_user(user_index: int, stop: threading.Event, recorder: _Recorder, llm: StandInLLMServer,
+               think_time: float, generate_ratio: float) -> None:
+    """One simulated clinician driving core/api directly"""
+    from api import llm_streaming_chat_completion, format_note_writing_prompt, run_async
+    from core import (
+        create_session, list_session_metadata, get_session_by_id, update_session, load_templates
+    )
+
+    rng = random.Random(user_index)
+    session_id = create_session()['id']
+    transcript = ""
+
+    while not stop.is_set():
+        # Core work every rerun performs before any mode renders
+        started = time.perf_counter()
+        sessions = list_session_metadata()
+        session = get_session_by_id(session_id)
+        templates = load_templates()
+        recorder.record('rerun_core', time.perf_counter() - started)
+
+        roll = rng.random()
+        try:
+            if roll < generate_ratio:
+                prompt = format_note_writing_prompt(transcript or TYPING_TEXT, templates[0]['system_prompt'])
+                started = time.perf_counter()
+                chunks = run_async(llm_streaming_chat_completion(
+                    prompt=prompt, system_prompt='', endpoint=llm.endpoint, model='loadtest'
+                ))
+                update_session(session_id, {'scribe_note': "".join(chunks)})
+                recorder.record('generate', time.perf_counter() - started)
+            elif roll < generate_ratio + 0.1 and sessions:
+                started = time.perf_counter()
+                session_id = rng.choice(sessions)['id']
+                session = get_session_by_id(session_id)
+                transcript = (session or {}).get('scribe_transcript', '')
+                recorder.record('switch', time.perf_counter() - started)
+            else:
+                transcript += TYPING_TEXT
+                started = time.perf_counter()
+                update_session(session_id, {'scribe_transcript': transcript})
+                recorder.record('autosave', time.perf_counter() - started)
+        except Exception:
+            recorder.error()
+
+        stop.wait(rng.uniform(0, 2 * think_time))
+
+
+def _apptest_user(user_index: int, stop: threading.Event, recorder: _Recorder, llm: StandInLLMServer,
+                  think_time: float, generate_ratio: float) -> None:
+    """One simulated clinician driving the real app.py script"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(user_index)
+    at = AppTest.from_file(os.path.join(APP_ROOT, 'app.py'), default_timeout=120)
+    started = time.perf_counter()
+    at.run()
+    recorder.record('rerun', time.perf_counter() - started)
+    transcript = ""
+
+    while not stop.is_set():
+        roll = rng.random()
+        try:
+            started = time.perf_counter()
+            if roll < generate_ratio and transcript:
+                at.button(key='generate_note_btn').click().run()
+                recorder.record('generate_rerun', time.perf_counter() - started)
+            else:
+                transcript += TYPING_TEXT
+                at.text_area(key='transcript_edit').input(transcript).run()
+                recorder.record('autosave_rerun', time.perf_counter() - started)
+            if at.exception:
+                recorder.error()
+        except Exception:
+            recorder.error()
+
+        stop.wait(rng.uniform(0, 2 * think_time))
+
+
+def run_level(driver: str, users: int, duration: float, llm: StandInLLMServer,
+              think_time: float, generate_ratio: float) -> Dict[str, Any]:
+    """Run one concurrency level and summarize it"""
+    target = _core_user if driver == 'core' else _apptest_user
+    recorder = _Recorder()
+    stop = threading.Event()
+
+    tracemalloc.start()
+    baseline_memory, _ = tracemalloc.get_traced_memory()
+    threads = [
+        threading.Thread(target=target, args=(i, stop, recorder, llm, think_time, generate_ratio), daemon=True)
+        for i in range(users)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    current_memory, peak_memory = tracemalloc.get_traced_memory()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    tracemalloc.stop()
+
+    total_actions = sum(len(v) for v in recorder.samples.values())
+    return {
+        'users': users,
+        'actions_per_second': total_actions / duration,
+        'errors': recorder.errors,
+        'actions': {action: summarize(samples) for action, samples in recorder.samples.items()},
+        'memory_per_user_kb': (current_memory - baseline_memory) / users / 1024,
+        'peak_memory_per_user_kb': (peak_memory - baseline_memory) / users / 1024,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench.loadtest', description="Multi-user load test")
+    parser.add_argument('--driver', choices=['core', 'apptest'], default='core')
+    parser.add_argument('--users', default='1,2,4,8,16', help="Comma-separated concurrency levels")
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds per concurrency level")
+    parser.add_argument('--history', type=int, default=200, help="Pre-populated sessions on disk")
+    parser.add_argument('--think-time', type=float, default=0.5, help="Mean seconds between user actions")
+    parser.add_argument('--generate-ratio', type=float, default=0.05, help="Fraction of actions that generate a note")
+    parser.add_argument('--token-rate', type=float, default=200.0, help="Stand-in LLM tokens per second")
+    parser.add_argument('-o', '--output', help="Write results JSON to this file")
+    parser.add_argument('--keep-workdir', action='store_true', help="Keep the temporary sessions directory")
+    args = parser.parse_args()
+
+    # Imports must keep resolving after chdir into the scratch directory
+    sys.path.insert(0, APP_ROOT)
+    original_cwd = os.getcwd()
+    workdir = _prepare_workdir(args.history)
+
+    llm = StandInLLMServer(ttft=0.1, token_rate=args.token_rate, num_tokens=100).start()
+    if args.driver == 'apptest':
+        # app.py reads config.yaml from the working directory
+        import yaml
+        with open('config.yaml', 'w') as f:
+            yaml.dump({'llm': {'endpoint': llm.endpoint, 'model': 'loadtest'}}, f)
+
+    results = {'meta': environment_info(), 'driver': args.driver, 'history': args.history, 'levels': []}
+    try:
+        for users in [int(u) for u in args.users.split(',')]:
+            print(f"Running {users} user(s) for {args.duration:.0f}s...", file=sys.stderr)
+            results['levels'].append(
+                run_level(args.driver, users, args.duration, llm, args.think_time, args.generate_ratio)
+            )
+        # Session I/O latency relative to a single user shows file contention
+        base = results['levels'][0]['actions']
+        for level in results['levels']:
+            level['io_contention'] = {
+                action: level['actions'][action]['p50'] / base[action]['p50']
+                for action in ('autosave', 'switch', 'autosave_rerun')
+                if action in level['actions'] and base.get(action, {}).get('p50')
+            }
+    finally:
+        llm.stop()
+        os.chdir(original_cwd)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Benchmark Result Helpers"""
+
+import math
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, Any, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = math.floor(rank)
+    high = math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Summary statistics for a list of samples"""
+    if not values:
+        return {'count': 0}
+    return {
+        'count': len(values),
+        'mean': sum(values) / len(values),
+        'min': min(values),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+
+def environment_info() -> Dict[str, Any]:
+    """Metadata recorded alongside results so runs can be compared fairly"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ''
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'commit': commit,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], stat: str = 'p50') -> List[Dict[str, Any]]:
+    """
+    Compare two result documents metric by metric.
+
+    Every numeric summary (dict containing `stat`) present in both is compared.
+
+    Returns:
+        List of {'metric', 'baseline', 'current', 'change_pct'}
+    """
+    rows = []
+
+    def walk(base, cur, path):
+        if isinstance(base, dict) and isinstance(cur, dict):
+            if stat in base and stat in cur and isinstance(base[stat], (int, float)):
+                change = (cur[stat] - base[stat]) / base[stat] * 100 if base[stat] else 0.0
+                rows.append({'metric': path, 'baseline': base[stat], 'current': cur[stat], 'change_pct': change})
+                return
+            for key in base:
+                if key in cur:
+                    walk(base[key], cur[key], f"{path}.{key}" if path else key)
+
+    walk(baseline.get('scenarios', {}), current.get('scenarios', {}), '')
+    return rows
@@ -0,0 +1,446 @@
+"""Benchmark Scenarios
+
+Each scenario drives the real api functions against stand-in servers and
+returns a JSON-serializable dict of summaries. Timings are wall-clock seconds
+unless the key says otherwise.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, Any
+
+from api import (
+    SSEDecoder,
+    ChatStreamState,
+    get_client_session,
+    start_generation,
+    schedule_warmup,
+    warmup_pending,
+    use_warmup,
+    asr_transcribe,
+    normalize_transcript,
+    dedupe_sources,
+    llm_streaming_chat_completion,
+    format_note_writing_prompt,
+    format_note_edit_prompt,
+    format_note_synthesis_prompt,
+    run_async,
+)
+
+from api.dedup import _dedupe
+from api.sse import json_loads
+from core import session as session_store
+from core.locking import atomic_write_json
+from core.transfer import export_sessions, import_sessions, DirectorySink
+
+from .report import summarize
+from .servers import StandInLLMServer, StandInASRServer
+
+SAMPLE_TRANSCRIPT = (
+    "Patient is a 67 year old woman with a history of hypertension, type 2 diabetes and CKD stage 3 "
+    "who presents with three days of progressive dyspnea on exertion and bilateral leg swelling. "
+) * 40
+
+# ASR-style output: timestamps, fillers, a dictation command and a repetition loop
+SAMPLE_RAW_TRANSCRIPT = (
+    "[00:00:12.480] Um, patient is a 67 year old woman with, uh, hypertension and CKD stage 3 full stop "
+    "She has three days of dyspnea on exertion, um, and leg swelling. "
+    "Thank you. Thank you. Thank you. Thank you. new paragraph "
+) * 40
+
+SAMPLE_TEMPLATE = (
+    "History and Physical:\n\nChief Complaint: [...]\n\nHPI:\n[...]\n\nReview of Systems:\n[...]\n\n"
+    "Physical Exam:\n[...]\n\nAssessment/Plan:\n# [...]\n- [...]\n"
+) * 4
+
+
+async def _complete(server: StandInLLMServer, max_tokens: int = -1) -> list:
+    return await llm_streaming_chat_completion(
+        prompt=SAMPLE_TRANSCRIPT,
+        system_prompt="You are a medical documentation assistant.",
+        endpoint=server.endpoint,
+        model="bench-model",
+        max_tokens=max_tokens,
+    )
+
+
+def scenario_llm_stream(iterations: int) -> Dict[str, Any]:
+    """Realistic streamed completion: client overhead on top of server TTFT + decode time"""
+    server = StandInLLMServer(ttft=0.2, token_rate=100, num_tokens=200)
+    latencies, overheads = [], []
+    with server:
+        run_async(_complete(server))  # warm-up
+        server.reset()
+        for _ in range(iterations):
+            started = time.perf_counter()
+            chunks = run_async(_complete(server))
+            latencies.append(time.perf_counter() - started)
+            assert len(chunks) == server.num_tokens, f"expected {server.num_tokens} chunks, got {len(chunks)}"
+        overheads = [lat - dur for lat, dur in zip(latencies, server.handler_durations)]
+    return {
+        'server': {'ttft': server.ttft, 'token_rate': server.token_rate, 'num_tokens': server.num_tokens},
+        'latency': summarize(latencies),
+        'client_overhead': summarize(overheads),
+    }
+
+
+def scenario_llm_parse_throughput(iterations: int) -> Dict[str, Any]:
+    """Stream flooded as fast as the server can write: measures SSE parsing throughput"""
+    server = StandInLLMServer(num_tokens=20000)
+    chunk_rates, durations = [], []
+    with server:
+        run_async(_complete(server))
+        for _ in range(iterations):
+            started = time.perf_counter()
+            chunks = run_async(_complete(server))
+            elapsed = time.perf_counter() - started
+            durations.append(elapsed)
+            chunk_rates.append(len(chunks) / elapsed)
+    return {
+        'num_chunks': server.num_tokens,
+        'duration': summarize(durations),
+        'chunks_per_second': summarize(chunk_rates),
+    }
+
+
+async def _legacy_line_loop(server: StandInLLMServer) -> list:
+    """The line-by-line parser llm_stream_chat_completion used before api/sse.py (baseline)"""
+    chunks = []
+    payload = {'model': 'bench-model', 'messages': [{'role': 'user', 'content': 'x'}], 'stream': True}
+    async with get_client_session().post(f"{server.endpoint}/v1/chat/completions", json=payload) as resp:
+        async for line in resp.content:
+            line = line.strip()
+            if not line or not line.startswith(b'data: '):
+                continue
+            data = line[6:]
+            if data == b'[DONE]':
+                break
+            try:
+                chunk = json.loads(data)
+            except json.JSONDecodeError:
+                continue
+            if chunk.get('choices'):
+                content = chunk['choices'][0].get('delta', {}).get('content', '')
+                if content:
+                    chunks.append(content)
+    return chunks
+
+
+def _sample_sse_stream(num_events: int, choices: int) -> bytes:
+    events = []
+    for i in range(num_events):
+        chunk = {
+            'id': 'chatcmpl-bench', 'object': 'chat.completion.chunk', 'model': 'bench-model',
+            'choices': [{'index': i % choices, 'delta': {'content': 'lorem '}, 'finish_reason': None}]
+        }
+        events.append(b'data: ' + json.dumps(chunk).encode() + b'\n\n')
+    events.append(b'data: [DONE]\n\n')
+    return b''.join(events)
+
+
+def _decode(stream: bytes, read_size: int, loads) -> ChatStreamState:
+    decoder, state = SSEDecoder(), ChatStreamState()
+    for start in range(0, len(stream), read_size):
+        for _, data in decoder.feed(stream[start:start + read_size]):
+            if data != b'[DONE]':
+                state.add(loads(data))
+    return state
+
+
+def scenario_sse_decode(iterations: int) -> Dict[str, Any]:
+    """SSE decoding: api/sse.py against the previous line loop, and JSON backends on raw bytes"""
+    server = StandInLLMServer(num_tokens=20000)
+    results = {}
+    with server:
+        for label, fn in (('legacy_line_loop', _legacy_line_loop), ('incremental_decoder', _complete)):
+            run_async(fn(server))
+            rates = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                chunks = run_async(fn(server))
+                rates.append(len(chunks) / (time.perf_counter() - started))
+                assert len(chunks) == server.num_tokens
+            results[label] = {'chunks_per_second': summarize(rates)}
+
+    # Offline: decoder cost alone, with reads split mid-event and n=4 choices
+    stream = _sample_sse_stream(20000, choices=4)
+    backends = {'json': json.loads}
+    if json_loads is not json.loads:
+        backends['orjson'] = json_loads
+    for name, loads in backends.items():
+        rates = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            state = _decode(stream, 1397, loads)
+            rates.append(len(stream) / 1024 ** 2 / (time.perf_counter() - started))
+            assert sum(len(c) for c in state.choices.values()) == 20000
+        results[f'offline_{name}'] = {'mb_per_second': summarize(rates)}
+    return results
+
+
+def scenario_candidates(iterations: int) -> Dict[str, Any]:
+    """Latency of generating several candidate notes at once (parallel requests or the n parameter) vs one"""
+    server = StandInLLMServer(ttft=0.1, token_rate=200, num_tokens=100)
+    results = {}
+    with server:
+        llm_kwargs = {'system_prompt': '', 'endpoint': server.endpoint, 'model': 'bench-model'}
+        for label, count, mode in (('single', 1, 'parallel'), ('parallel_4', 4, 'parallel'), ('n_4', 4, 'n')):
+            latencies = []
+            for i in range(iterations):
+                started = time.perf_counter()
+                generation = start_generation(('bench', label), SAMPLE_TRANSCRIPT, dict(llm_kwargs),
+                                              candidates=count, candidates_mode=mode).wait(60)
+                latencies.append(time.perf_counter() - started)
+                texts = generation.candidate_texts
+                assert generation.status == 'done' and len(texts) == count and all(texts), generation.error
+            results[label] = {'latency': summarize(latencies)}
+    return results
+
+
+def scenario_warmup(iterations: int) -> Dict[str, Any]:
+    """Generation latency with a cold prompt cache vs after a prefill warm-up (stand-in prefills 20k chars/s)"""
+    server = StandInLLMServer(ttft=0.05, token_rate=200, num_tokens=20, prefill_rate=20000)
+    results = {}
+    with server:
+        llm_kwargs = {'system_prompt': '', 'endpoint': server.endpoint, 'model': 'bench-model'}
+        for label, warm in (('cold', False), ('warmed', True)):
+            latencies, coverages = [], []
+            for i in range(iterations):
+                # Unique prompt per run so earlier runs don't warm the cache
+                prompt = f"{label} {i}\n{SAMPLE_TRANSCRIPT}"
+                key = ('bench', label)
+                if warm:
+                    schedule_warmup(key, prompt, {**llm_kwargs, 'max_tokens': 1, 'route': 'warmup'}, debounce=0)
+                    # Wait for the warm-up (and the rate limit slot) to finish
+                    while warmup_pending(key):
+                        time.sleep(0.01)
+                coverages.append(use_warmup(key, prompt, llm_kwargs))
+                started = time.perf_counter()
+                generation = start_generation(key, prompt, dict(llm_kwargs)).wait(60)
+                latencies.append(time.perf_counter() - started)
+                assert generation.status == 'done', generation.error
+            results[label] = {'latency': summarize(latencies), 'coverage': summarize(coverages)}
+    return results
+
+
+def scenario_asr(iterations: int) -> Dict[str, Any]:
+    """Transcription round trip for small and large uploads"""
+    results = {}
+    server = StandInASRServer(latency=0.05)
+    with server:
+        for label, size in (('audio_1mb', 1024 ** 2), ('audio_20mb', 20 * 1024 ** 2)):
+            audio = b'\x00' * size
+            run_async(asr_transcribe(audio, server.endpoint, 'bench-asr'))
+            server.reset()
+            latencies = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                text = run_async(asr_transcribe(audio, server.endpoint, 'bench-asr'))
+                latencies.append(time.perf_counter() - started)
+                assert text == server.text
+            overheads = [lat - dur for lat, dur in zip(latencies, server.handler_durations)]
+            results[label] = {
+                'latency': summarize(latencies),
+                'client_overhead': summarize(overheads),
+                'upload_mb_per_second': summarize([size / 1024 ** 2 / lat for lat in latencies]),
+            }
+    return results
+
+
+def scenario_asr_upload_memory(iterations: int) -> Dict[str, Any]:
+    """Peak Python memory per transcription: file read into bytes vs streamed from its path"""
+    results = {}
+    server = StandInASRServer()
+    with server, tempfile.TemporaryDirectory() as tmp:
+        for label, size in (('audio_8mb', 8 * 1024 ** 2), ('audio_64mb', 64 * 1024 ** 2)):
+            path = os.path.join(tmp, f"{label}.wav")
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size))
+
+            def from_bytes():
+                with open(path, 'rb') as f:
+                    return run_async(asr_transcribe(f.read(), server.endpoint, 'bench-asr'))
+
+            uploads = {'bytes': from_bytes, 'path': lambda: run_async(asr_transcribe(path, server.endpoint, 'bench-asr'))}
+            results[label] = {}
+            for name, upload in uploads.items():
+                upload()
+                peaks = []
+                for _ in range(iterations):
+                    tracemalloc.start()
+                    upload()
+                    peaks.append(tracemalloc.get_traced_memory()[1] / 1024 ** 2)
+                    tracemalloc.stop()
+                results[label][f"{name}_peak_mb"] = summarize(peaks)
+    return results
+
+
+def scenario_session_transfer(iterations: int) -> Dict[str, Any]:
+    """NDJSON export/import throughput and peak memory for growing session counts"""
+    results = {}
+    folder = session_store.SESSIONS_FOLDER
+    try:
+        for count in (1000, 4000):
+            with tempfile.TemporaryDirectory() as tmp:
+                session_store.SESSIONS_FOLDER = os.path.join(tmp, 'sessions')
+                os.makedirs(session_store.SESSIONS_FOLDER)
+                for i in range(count):
+                    atomic_write_json(session_store._get_session_file(f"{i:08d}"), {
+                        '_version': 1, 'updated_at': f"2026-01-{1 + i % 28:02d}T10:00:00",
+                        'scribe_transcript': SAMPLE_TRANSCRIPT[:2000], 'scribe_note': SAMPLE_TEMPLATE,
+                    })
+                export_rates, import_rates, export_peaks, import_peaks = [], [], [], []
+                for n in range(iterations):
+                    path = os.path.join(tmp, f"export_{n}.ndjson.gz")
+                    tracemalloc.start()
+                    export_rates.append(export_sessions(path)['sessions_per_second'])
+                    export_peaks.append(tracemalloc.get_traced_memory()[1] / 1024 ** 2)
+                    tracemalloc.reset_peak()
+                    stats = import_sessions(path, sink=DirectorySink(os.path.join(tmp, f"import_{n}")))
+                    import_peaks.append(tracemalloc.get_traced_memory()[1] / 1024 ** 2)
+                    tracemalloc.stop()
+                    import_rates.append(stats['sessions_per_second'])
+                results[f"sessions_{count}"] = {
+                    'export_sessions_per_second': summarize(export_rates),
+                    'import_sessions_per_second': summarize(import_rates),
+                    'export_peak_mb': summarize(export_peaks),
+                    'import_peak_mb': summarize(import_peaks),
+                }
+    finally:
+        session_store.SESSIONS_FOLDER = folder
+    return results
+
+
+def scenario_normalize(iterations: int) -> Dict[str, Any]:
+    """Transcript normalization throughput at growing input sizes (should stay flat if linear)"""
+    results = {}
+    for scale in (1, 4, 16):
+        text = SAMPLE_RAW_TRANSCRIPT * scale
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            _, stats = normalize_transcript(text)
+            samples.append(len(text) / (time.perf_counter() - started) / 1e6)
+        results[f"x{scale}"] = {
+            'chars': len(text),
+            'mb_per_second': summarize(samples),
+            'tokens_saved_ratio': stats['tokens_saved'] / stats['tokens_before'],
+        }
+    return results
+
+
+def _copy_forward_stay(days: int) -> Dict[str, str]:
+    """Synthesize sources for a stay whose progress notes copy the H&P forward daily"""
+    history = SAMPLE_TRANSCRIPT.replace('\n', ' ')
+    hp = f"{history}\n\nExam: JVP elevated, bibasilar crackles, 2+ pitting edema to the knees bilaterally."
+    notes = [
+        f"Hospital day {day}\n\n{history}\n\nOvernight: net negative {day / 2:.1f} L on IV furosemide, "
+        f"creatinine {1.1 + day / 20:.2f}, potassium {3.6 + day / 30:.1f}, weight down {day * 0.7:.1f} kg from admission."
+        for day in range(1, days + 1)
+    ]
+    return {'hp': hp, 'consults': f"Cardiology consult\n\n{history}", 'studies': "Echo: EF 25%, moderate MR.",
+            'progress': '\n\n'.join(notes)}
+
+
+def scenario_dedup(iterations: int) -> Dict[str, Any]:
+    """Copy-forward de-duplication: milliseconds per call and token reduction by stay length"""
+    results = {}
+    for days in (3, 10, 30):
+        sources = _copy_forward_stay(days)
+        samples = []
+        for _ in range(iterations):
+            _dedupe.cache_clear()
+            started = time.perf_counter()
+            _, stats = dedupe_sources(sources)
+            samples.append((time.perf_counter() - started) * 1000)
+        results[f"days_{days}"] = {
+            'paragraphs': stats['paragraphs'],
+            'collapsed': stats['collapsed'],
+            'ms_per_call': summarize(samples),
+            'tokens_before': stats['tokens_before'],
+            'tokens_after': stats['tokens_after'],
+        }
+    return results
+
+
+def scenario_prompts(iterations: int) -> Dict[str, Any]:
+    """Prompt formatter cost for large inputs (microseconds per call)"""
+    loops = 200
+    formatters = {
+        'note_writing': lambda: format_note_writing_prompt(SAMPLE_TRANSCRIPT, SAMPLE_TEMPLATE, "Update the progress note"),
+        'note_edit': lambda: format_note_edit_prompt(SAMPLE_TRANSCRIPT, "Make the HPI more concise", SAMPLE_TEMPLATE),
+        'note_synthesis': lambda: format_note_synthesis_prompt(
+            "Write a discharge summary", SAMPLE_TEMPLATE,
+            hp=SAMPLE_TRANSCRIPT, consults=SAMPLE_TRANSCRIPT, studies=SAMPLE_TRANSCRIPT, progress=SAMPLE_TRANSCRIPT
+        ),
+    }
+    results = {}
+    for name, fn in formatters.items():
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            samples.append((time.perf_counter() - started) / loops * 1e6)
+        results[name] = {'us_per_call': summarize(samples)}
+    return results
+
+
+# Package -> modules it must not pull in at import time (UI-only or lazily imported deps)
+IMPORT_TARGETS = {
+    'core': ('streamlit', 'aiohttp', 'yaml'),
+    'api': ('streamlit', 'aiohttp', 'yaml'),
+    'batch': ('streamlit', 'aiohttp', 'yaml'),
+    'server': ('streamlit',),
+}
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'modules': sorted(sys.modules)}}))
+"""
+
+
+def scenario_import_time(iterations: int) -> Dict[str, Any]:
+    """Cold import cost of headless packages in a fresh interpreter; fails if a forbidden dependency is imported"""
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, 'PYTHONPATH': repo_root}
+    results = {}
+    for module, forbidden in IMPORT_TARGETS.items():
+        samples, loaded = [], []
+        for _ in range(max(1, min(iterations, 10))):
+            output = subprocess.run(
+                [sys.executable, '-c', _IMPORT_PROBE.format(module=module)],
+                cwd=repo_root, env=env, capture_output=True, text=True, check=True
+            ).stdout
+            probe = json.loads(output.strip().splitlines()[-1])
+            samples.append(probe['seconds'] * 1000)
+            loaded = probe['modules']
+        imported = [name for name in forbidden if name in loaded]
+        if imported:
+            raise RuntimeError(f"importing {module} pulled in {', '.join(imported)}")
+        results[module] = {'import_ms': summarize(samples), 'modules_loaded': len(loaded)}
+    return results
+
+
+SCENARIOS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    'llm_stream': scenario_llm_stream,
+    'llm_parse_throughput': scenario_llm_parse_throughput,
+    'sse_decode': scenario_sse_decode,
+    'candidates': scenario_candidates,
+    'warmup': scenario_warmup,
+    'asr': scenario_asr,
+    'asr_upload_memory': scenario_asr_upload_memory,
+    'normalize': scenario_normalize,
+    'dedup': scenario_dedup,
+    'session_transfer': scenario_session_transfer,
+    'prompts': scenario_prompts,
+    'import_time': scenario_import_time,
+}
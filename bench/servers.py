@@ -0,0 +1,207 @@
+"""Stand-in OpenAI-compatible Servers
+
+Local aiohttp servers that mimic the endpoints the app talks to, with
+controllable timing so the app's own overhead can be measured:
+- /v1/chat/completions streams SSE chunks after a configurable TTFT at a configurable token rate
+- /v1/audio/transcriptions returns a fixed transcript after a configurable latency
+
+Each server runs its own event loop on a background thread, so server work does
+not compete with the client being measured. Handler durations are recorded so
+benchmarks can subtract the time the server deliberately spent.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Optional, List
+
+from aiohttp import web
+
+
+class _StandInServer:
+    """Run an aiohttp application on a background thread bound to 127.0.0.1"""
+
+    def __init__(self):
+        self.port: Optional[int] = None
+        self.handler_durations: List[float] = []
+        # Requests the client abandoned mid-response (connection closed early)
+        self.aborted = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def endpoint(self) -> str:
+        """Base URL to pass as the `endpoint` argument of the api functions"""
+        return f"http://127.0.0.1:{self.port}"
+
+    def _build_app(self) -> web.Application:
+        raise NotImplementedError
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        async def start():
+            self._runner = web.AppRunner(self._build_app(), access_log=None)
+            await self._runner.setup()
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+
+        self._loop.run_until_complete(start())
+        self._ready.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    def start(self) -> '_StandInServer':
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def reset(self) -> None:
+        self.handler_durations.clear()
+        self.aborted = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class StandInLLMServer(_StandInServer):
+    """
+    Stand-in for POST /v1/chat/completions with stream=True.
+
+    Args:
+        ttft: Seconds before the first content chunk
+        token_rate: Chunks per second after the first (0 = as fast as possible)
+        num_tokens: Chunks per completion (capped by the request's max_tokens if > 0)
+        token_text: Content of each chunk
+        prefill_rate: Prompt characters processed per second before the first chunk,
+            skipping the longest prefix shared with a recent prompt (0 = no prefill cost)
+    """
+
+    # Recent prompts kept as the simulated prompt cache
+    PROMPT_CACHE_SIZE = 8
+
+    def __init__(self, ttft: float = 0.0, token_rate: float = 0.0, num_tokens: int = 200, token_text: str = "lorem ",
+                 prefill_rate: float = 0.0):
+        super().__init__()
+        self.ttft = ttft
+        self.token_rate = token_rate
+        self.num_tokens = num_tokens
+        self.token_text = token_text
+        self.prefill_rate = prefill_rate
+        self._prompt_cache: List[str] = []
+
+    def _prefill_seconds(self, payload: dict) -> float:
+        prompt = "".join(str(m.get('content', '')) for m in payload.get('messages', []))
+        cached = max((len(os.path.commonprefix([prompt, p])) for p in self._prompt_cache), default=0)
+        self._prompt_cache = ([prompt] + [p for p in self._prompt_cache if p != prompt])[:self.PROMPT_CACHE_SIZE]
+        return (len(prompt) - cached) / self.prefill_rate
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        started = time.perf_counter()
+        payload = await request.json()
+
+        num_tokens = self.num_tokens
+        max_tokens = payload.get('max_tokens', -1)
+        if max_tokens and max_tokens > 0:
+            num_tokens = min(num_tokens, max_tokens)
+
+        resp = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await resp.prepare(request)
+
+        delay = self.ttft + (self._prefill_seconds(payload) if self.prefill_rate > 0 else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        interval = 1.0 / self.token_rate if self.token_rate > 0 else 0.0
+        model = payload.get('model', '')
+        # n > 1: choices are decoded as one batch, so they share the token rate
+        num_choices = max(1, payload.get('n', 1))
+        for i in range(num_tokens):
+            if interval and i > 0:
+                await asyncio.sleep(interval)
+            events = b''.join(
+                b'data: ' + json.dumps({
+                    'id': 'chatcmpl-bench',
+                    'object': 'chat.completion.chunk',
+                    'model': model,
+                    'choices': [{'index': index, 'delta': {'content': self.token_text}, 'finish_reason': None}]
+                }).encode() + b'\n\n'
+                for index in range(num_choices)
+            )
+            try:
+                await resp.write(events)
+            except ConnectionResetError:
+                self.aborted += 1
+                return resp
+
+        await resp.write(b'data: [DONE]\n\n')
+        await resp.write_eof()
+        self.handler_durations.append(time.perf_counter() - started)
+        return resp
+
+    @property
+    def nominal_duration(self) -> float:
+        """Time the server deliberately spends per completion"""
+        decode = (self.num_tokens - 1) / self.token_rate if self.token_rate > 0 and self.num_tokens > 1 else 0.0
+        return self.ttft + decode
+
+
+class StandInASRServer(_StandInServer):
+    """
+    Stand-in for POST /v1/audio/transcriptions.
+
+    Args:
+        latency: Seconds to wait after the upload has been read
+        text: Transcript returned for every request
+    """
+
+    def __init__(self, latency: float = 0.0, text: str = "Patient is a 65 year old male presenting with chest pain."):
+        super().__init__()
+        self.latency = latency
+        self.text = text
+        self.bytes_received: List[int] = []
+
+    def _build_app(self) -> web.Application:
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_post('/v1/audio/transcriptions', self._handle)
+        return app
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        started = time.perf_counter()
+        received = 0
+        reader = await request.multipart()
+        async for part in reader:
+            while True:
+                chunk = await part.read_chunk()
+                if not chunk:
+                    break
+                received += len(chunk)
+        self.bytes_received.append(received)
+
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        self.handler_durations.append(time.perf_counter() - started)
+        return web.json_response({'text': self.text})
@@ -2,11 +2,25 @@
 from .config import load_config, save_config
 from .templates import load_templates, get_template_names, get_template_by_name, get_fallback_templates
 from .session import (
-    create_session, get_all_sessions, get_session_by_id, update_session, delete_session
+    create_session, get_all_sessions, list_session_metadata, get_session_by_id, update_session, delete_session,
+    SessionConflictError
 )
+from .retention import (
+    start_retention_worker, enforce_retention, list_archived_sessions, search_archived_sessions,
+    restore_archived_session, delete_archived_session, clear_archive
+)
+from .search import search_sessions
+from .revisions import configure_revisions, list_revisions, get_revision
+from .transfer import iter_sessions, export_sessions, import_sessions, SessionSink, DirectorySink
 
 __all__ = [
     'load_config', 'save_config',
     'load_templates', 'get_template_names', 'get_template_by_name', 'get_fallback_templates',
-    'create_session', 'get_all_sessions', 'get_session_by_id', 'update_session', 'delete_session',
+    'create_session', 'get_all_sessions', 'list_session_metadata', 'get_session_by_id', 'update_session', 'delete_session',
+    'SessionConflictError',
+    'start_retention_worker', 'enforce_retention', 'list_archived_sessions', 'search_archived_sessions',
+    'restore_archived_session', 'delete_archived_session', 'clear_archive',
+    'search_sessions',
+    'configure_revisions', 'list_revisions', 'get_revision',
+    'iter_sessions', 'export_sessions', 'import_sessions', 'SessionSink', 'DirectorySink',
 ]
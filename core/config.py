@@ -1,21 +1,28 @@
 """Configuration Loading and Saving"""
 
 import os
-import yaml
 from pathlib import Path
 
+from .profiler import profiled
 
+
+@profiled('core')
 def load_config() -> dict:
     """Load configuration from config.yaml"""
     config_path = Path("config.yaml")
     if config_path.exists():
+        # Imported here so processes that never read config don't pay for yaml
+        import yaml
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
     return {}
 
 
+@profiled('core')
 def save_config(config: dict) -> None:
     """Save configuration to config.yaml atomically"""
+    import yaml
+    
     config_path = Path("config.yaml")
     temp_path = config_path.with_suffix(".yaml.tmp")
     
@@ -0,0 +1,72 @@
+"""File Locking and Atomic Writes
+
+Lets several app processes (Streamlit workers, the API server, batch runs)
+share one sessions directory safely:
+- Advisory exclusive locks via fcntl.flock (POSIX) or msvcrt.locking (Windows);
+  flock locks also exclude other threads of the same process
+- Per-key locks are striped over a fixed set of lock files, so lock files
+  never need cleaning up
+- JSON is written to a temp file and renamed over the target, so readers never
+  see a partially written file and need no lock
+"""
+
+import json
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCKS_FOLDER = '.locks'
+LOCK_STRIPES = 64
+
+
+def stripe_lock_path(folder: str, key: str) -> str:
+    """Lock file guarding `key` (keys that share a stripe share a lock)"""
+    stripe = zlib.crc32(key.encode('utf-8')) % LOCK_STRIPES
+    return os.path.join(folder, LOCKS_FOLDER, f"{stripe:02d}.lock")
+
+
+@contextmanager
+def file_lock(lock_path: str):
+    """Hold an exclusive advisory lock on lock_path (created if missing); not re-entrant"""
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    with open(lock_path, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    # LK_LOCK retries for ~10 s before raising
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2) -> None:
+    """Write JSON to a unique temp file and rename it over path"""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'w') as f:
+            json.dump(data, f, indent=indent)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
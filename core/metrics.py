@@ -0,0 +1,270 @@
+"""Runtime Metrics
+
+Low-overhead, process-wide histograms for request and session I/O timings:
+- Fixed bucket boundaries; observe() is a bisect and two additions under a lock
+- Label sets (e.g. model, op) are kept as separate series per histogram
+- Prometheus text format served on metrics.port (optional HTTP endpoint)
+- Periodic snapshots appended to metrics.jsonl_path, rotated by size (optional)
+"""
+
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+# Seconds, roughly log-spaced from 1 ms to 5 min
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Throughput-style ratios (tokens/sec, audio seconds per wall second)
+RATE_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0, 1000.0)
+# Token counts (prompt sizes)
+SIZE_BUCKETS = (128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536)
+# Fractions
+RATIO_BUCKETS = (0.0, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+
+DEFAULT_JSONL_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_JSONL_BACKUPS = 3
+DEFAULT_JSONL_INTERVAL_SECONDS = 60
+
+
+class Histogram:
+    """Cumulative histogram with one series per label set"""
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        # label tuple -> [bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[Tuple[str, str], ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-series counts, sum and bucket-estimated quantiles"""
+        with self._lock:
+            series = [(dict(k), list(v[0]), v[1]) for k, v in self._series.items()]
+
+        result = []
+        for labels, counts, total in series:
+            count = sum(counts)
+            result.append({
+                'labels': labels,
+                'count': count,
+                'sum': total,
+                'mean': total / count if count else 0.0,
+                'p50': self._quantile(counts, count, 0.50),
+                'p95': self._quantile(counts, count, 0.95),
+                'p99': self._quantile(counts, count, 0.99),
+                'buckets': counts,
+            })
+        return result
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> float:
+        """Upper bound of the bucket containing the q-quantile"""
+        if not count:
+            return 0.0
+        target = q * count
+        cumulative = 0
+        for i, c in enumerate(counts):
+            cumulative += c
+            if cumulative >= target:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+
+_registry: Dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str, help_text: str = '', buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+    """Get or create a histogram by name"""
+    hist = _registry.get(name)
+    if hist is None:
+        with _registry_lock:
+            hist = _registry.setdefault(name, Histogram(name, help_text, buckets))
+    return hist
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record a sample in a registered histogram"""
+    hist = _registry.get(name) or histogram(name)
+    hist.observe(value, **labels)
+
+
+@contextmanager
+def timed(name: str, **labels):
+    """Context manager that observes the elapsed wall time in seconds"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def timed_call(name: str, **labels):
+    """Decorator form of timed()"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_metrics_snapshot() -> Dict[str, Any]:
+    """All histograms as plain data (used by the Settings admin panel and JSONL export)"""
+    return {
+        name: {'help': hist.help_text, 'buckets': list(hist.buckets), 'series': hist.snapshot()}
+        for name, hist in sorted(_registry.items())
+    }
+
+
+def reset_metrics() -> None:
+    for hist in list(_registry.values()):
+        hist.reset()
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str], extra: Optional[Dict[str, str]] = None) -> str:
+    merged = {**labels, **(extra or {})}
+    if not merged:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape_label(v)}"' for k, v in merged.items()) + '}'
+
+
+def render_prometheus() -> str:
+    """Render all histograms in the Prometheus text exposition format"""
+    lines = []
+    for name, hist in sorted(_registry.items()):
+        lines.append(f"# HELP {name} {hist.help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for series in hist.snapshot():
+            cumulative = 0
+            for bound, c in zip(list(hist.buckets) + ['+Inf'], series['buckets']):
+                cumulative += c
+                lines.append(f"{name}_bucket{_format_labels(series['labels'], {'le': str(bound)})} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(series['labels'])} {series['sum']}")
+            lines.append(f"{name}_count{_format_labels(series['labels'])} {series['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def _serve_prometheus(host: str, port: int) -> None:
+    """Serve /metrics on a daemon thread (http.server is only imported when enabled)"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/metrics':
+                self.send_error(404)
+                return
+            body = render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+
+
+def _rotate(path: str, backups: int) -> None:
+    """Shift path -> path.1 -> path.2 ..., dropping the oldest"""
+    for i in range(backups - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    if backups > 0:
+        os.replace(path, f"{path}.1")
+    else:
+        os.remove(path)
+
+
+def write_jsonl_snapshot(path: str, max_bytes: int = DEFAULT_JSONL_MAX_BYTES, backups: int = DEFAULT_JSONL_BACKUPS) -> None:
+    """Append one snapshot line to a JSONL file, rotating it when it exceeds max_bytes"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if os.path.exists(path) and os.path.getsize(path) >= max_bytes:
+        _rotate(path, backups)
+    line = json.dumps({'timestamp': datetime.now().isoformat(), 'metrics': get_metrics_snapshot()})
+    with open(path, 'a') as f:
+        f.write(line + '\n')
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+
+def start_metrics_exporter(config: dict) -> None:
+    """Start the configured exporters once per process (safe to call every rerun)"""
+    global _exporters_started
+    metrics_config = config.get('metrics', {}) or {}
+
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    port = metrics_config.get('port')
+    if port:
+        try:
+            _serve_prometheus(metrics_config.get('host', '127.0.0.1'), int(port))
+        except OSError:
+            # Port already taken (e.g. another app process) - the other process exports
+            pass
+
+    jsonl_path = metrics_config.get('jsonl_path')
+    if jsonl_path:
+        interval = metrics_config.get('jsonl_interval_seconds', DEFAULT_JSONL_INTERVAL_SECONDS)
+        max_bytes = metrics_config.get('jsonl_max_bytes', DEFAULT_JSONL_MAX_BYTES)
+        backups = metrics_config.get('jsonl_backups', DEFAULT_JSONL_BACKUPS)
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_jsonl_snapshot(jsonl_path, max_bytes, backups)
+                except OSError:
+                    pass
+
+        threading.Thread(target=loop, name='metrics-jsonl', daemon=True).start()
+
+
+# Metrics recorded by api/ and core/
+histogram('llm_request_seconds', "LLM chat completion wall time")
+histogram('llm_queue_seconds', "Time from request start until response headers arrive")
+histogram('llm_ttft_seconds', "Time to first generated token")
+histogram('llm_output_tokens_per_second', "Output tokens per second after the first token (usage.completion_tokens, else streamed chunks)", RATE_BUCKETS)
+histogram('llm_completion_tokens', "Generated tokens per completion, as reported by the server", SIZE_BUCKETS)
+histogram('llm_route_prompt_tokens', "Estimated prompt tokens per routing decision", SIZE_BUCKETS)
+histogram('llm_warmup_coverage', "Share of a generation's prompt covered by the last prefill warm-up", RATIO_BUCKETS)
+histogram('asr_request_seconds', "ASR transcription wall time")
+histogram('asr_realtime_factor', "Audio seconds transcribed per wall-clock second", RATE_BUCKETS)
+histogram('session_io_seconds', "Session store operation time")
+histogram('transcript_normalized_ratio', "Transcript tokens after normalization / before", RATIO_BUCKETS)
+histogram('synthesize_dedup_ratio', "Synthesize source tokens after de-duplication / before", RATIO_BUCKETS)
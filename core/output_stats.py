@@ -0,0 +1,58 @@
+"""Output Size History
+
+Recent output sizes (estimated tokens) of successful generations per template,
+used to size output budgets. Stored in sessions/output_stats.json and shared
+by all app processes.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List
+
+from . import session as session_store
+from .locking import file_lock, atomic_write_json, LOCKS_FOLDER
+
+OUTPUT_STATS_FILE = 'output_stats.json'
+# Samples kept per template
+HISTORY_SIZE = 50
+
+_cache: Dict[str, List[int]] = {}
+_cache_mtime = None
+_lock = threading.Lock()
+
+
+def _stats_path() -> str:
+    return os.path.join(session_store.SESSIONS_FOLDER, OUTPUT_STATS_FILE)
+
+
+def _read() -> Dict[str, List[int]]:
+    try:
+        with open(_stats_path(), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_output_history(template_key: str) -> List[int]:
+    """Recent output token counts for a template (oldest first)"""
+    global _cache, _cache_mtime
+    with _lock:
+        try:
+            mtime = os.path.getmtime(_stats_path())
+        except OSError:
+            return []
+        if mtime != _cache_mtime:
+            _cache, _cache_mtime = _read(), mtime
+        return list(_cache.get(template_key, []))
+
+
+def record_output(template_key: str, tokens: int) -> None:
+    """Append an output size sample for a template"""
+    os.makedirs(session_store.SESSIONS_FOLDER, exist_ok=True)
+    with file_lock(os.path.join(session_store.SESSIONS_FOLDER, LOCKS_FOLDER, 'output_stats.lock')):
+        stats = _read()
+        samples = stats.setdefault(template_key, [])
+        samples.append(int(tokens))
+        del samples[:-HISTORY_SIZE]
+        atomic_write_json(_stats_path(), stats, indent=None)
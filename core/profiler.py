@@ -0,0 +1,198 @@
+"""Per-Rerun Profiler
+
+Opt-in timing of ui render functions, core calls and api calls:
+- @profiled(category) wraps a function; when no rerun is being profiled the
+  wrapper only does a ContextVar lookup before calling through
+- profile_rerun() marks one Streamlit rerun as profiled (per browser session,
+  enabled via profiling.enabled in config.yaml or ?profile=1 in the URL)
+- Finished reruns are aggregated process-wide and the most recent are kept
+- A rerun can optionally be captured with cProfile and dumped to a .prof file
+"""
+
+import contextvars
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, List
+
+DEFAULT_DUMP_DIR = 'profiles'
+RECENT_RERUNS = 50
+
+# Timings of the rerun currently being profiled in this context, or None
+_current_rerun: contextvars.ContextVar = contextvars.ContextVar('profiler_current_rerun', default=None)
+
+_lock = threading.Lock()
+_aggregate: Dict[tuple, Dict[str, float]] = {}
+_recent: deque = deque(maxlen=RECENT_RERUNS)
+_rerun_count = 0
+
+
+def _record(timings: Dict[tuple, List[float]], key: tuple, elapsed: float) -> None:
+    entry = timings.get(key)
+    if entry is None:
+        timings[key] = [1, elapsed, elapsed]
+    else:
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+
+
+def profiled(category: str):
+    """Decorator recording inclusive wall time of each call during a profiled rerun"""
+    def decorator(func):
+        key = (category, func.__qualname__)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                timings = _current_rerun.get()
+                if timings is None:
+                    return await func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _record(timings, key, time.perf_counter() - started)
+            return async_wrapper
+
+        if inspect.isasyncgenfunction(func):
+            # Timed from first iteration until the generator is exhausted or closed;
+            # closing the wrapper closes the wrapped generator right away
+            @functools.wraps(func)
+            async def asyncgen_wrapper(*args, **kwargs):
+                timings = _current_rerun.get()
+                started = time.perf_counter()
+                agen = func(*args, **kwargs)
+                try:
+                    async for item in agen:
+                        yield item
+                finally:
+                    await agen.aclose()
+                    if timings is not None:
+                        _record(timings, key, time.perf_counter() - started)
+            return asyncgen_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            timings = _current_rerun.get()
+            if timings is None:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record(timings, key, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profile_rerun(enabled: bool = True, capture_cprofile: bool = False, dump_dir: str = DEFAULT_DUMP_DIR):
+    """
+    Profile the enclosed rerun.
+
+    Args:
+        enabled: When False this is a no-op
+        capture_cprofile: Also run cProfile for this rerun and dump a .prof file
+        dump_dir: Directory for .prof dumps
+
+    Yields:
+        Dict that receives 'total', 'timings' and (if captured) 'prof_path' once the rerun finishes
+    """
+    result: Dict[str, Any] = {}
+    if not enabled:
+        yield result
+        return
+
+    timings: Dict[tuple, List[float]] = {}
+    token = _current_rerun.set(timings)
+    profiler = cProfile.Profile() if capture_cprofile else None
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        total = time.perf_counter() - started
+        _current_rerun.reset(token)
+
+        result['total'] = total
+        result['timings'] = timings
+        if profiler is not None:
+            os.makedirs(dump_dir, exist_ok=True)
+            prof_path = os.path.join(dump_dir, f"rerun_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.prof")
+            profiler.dump_stats(prof_path)
+            result['prof_path'] = prof_path
+        _finish_rerun(total, timings)
+
+
+def detach_from_rerun() -> None:
+    """
+    Stop recording into the profiled rerun this context was copied from. Call at
+    the start of background tasks (their context is a copy of the rerun's), which
+    would otherwise keep adding to timings already reported.
+    """
+    _current_rerun.set(None)
+
+
+def _finish_rerun(total: float, timings: Dict[tuple, List[float]]) -> None:
+    global _rerun_count
+    with _lock:
+        _rerun_count += 1
+        _recent.append({'finished_at': datetime.now().isoformat(), 'total': total, 'timings': timings})
+        for key, (calls, elapsed, longest) in timings.items():
+            entry = _aggregate.setdefault(key, {'calls': 0, 'reruns': 0, 'total': 0.0, 'max': 0.0})
+            entry['calls'] += calls
+            entry['reruns'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], longest)
+
+
+def format_timings(timings: Dict[tuple, List[float]]) -> List[Dict[str, Any]]:
+    """Rows for one rerun's timings, slowest first"""
+    rows = [
+        {'category': cat, 'function': name, 'calls': calls, 'total_ms': elapsed * 1000, 'max_ms': longest * 1000}
+        for (cat, name), (calls, elapsed, longest) in timings.items()
+    ]
+    return sorted(rows, key=lambda r: r['total_ms'], reverse=True)
+
+
+def get_profile_summary() -> Dict[str, Any]:
+    """Aggregate timings across all profiled reruns in this process"""
+    with _lock:
+        count = _rerun_count
+        recent = list(_recent)
+        rows = [
+            {
+                'category': cat,
+                'function': name,
+                'calls': entry['calls'],
+                'mean_per_rerun_ms': entry['total'] / entry['reruns'] * 1000,
+                'total_ms': entry['total'] * 1000,
+                'max_ms': entry['max'] * 1000,
+            }
+            for (cat, name), entry in _aggregate.items()
+        ]
+    rerun_totals = [r['total'] for r in recent]
+    return {
+        'reruns': count,
+        'mean_rerun_ms': sum(rerun_totals) / len(rerun_totals) * 1000 if rerun_totals else 0.0,
+        'functions': sorted(rows, key=lambda r: r['total_ms'], reverse=True),
+        'recent': recent,
+    }
+
+
+def reset_profile() -> None:
+    global _rerun_count
+    with _lock:
+        _aggregate.clear()
+        _recent.clear()
+        _rerun_count = 0
@@ -0,0 +1,328 @@
+"""Session Retention Functions
+
+Enforces session.max_history by keeping only the most recently updated
+sessions as individual hot files:
+- Older sessions are packed into sessions/archive.zip (one deflated member each)
+- sessions/archive_index.json lists archived sessions without decompressing
+- Eviction runs in small batches on a background thread, never during a rerun
+- Archived sessions can be searched and are restored transparently when opened
+- Restoring or deleting an archived session only drops it from the index; its
+  member stays in the zip as dead weight until the background thread compacts
+  the archive (once dead members make up COMPACT_DEAD_RATIO of it)
+- clear_archive() removes the whole archive at once (Clear All Sessions)
+"""
+
+import json
+import os
+import threading
+import time
+import warnings
+import zipfile
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from . import session as session_store
+from .locking import file_lock, atomic_write_json, LOCKS_FOLDER
+from .profiler import profiled
+
+ARCHIVE_FILE = 'archive.zip'
+ARCHIVE_INDEX_FILE = 'archive_index.json'
+
+DEFAULT_MAX_HISTORY = 100
+# Sessions archived per pass, so a large backlog is worked off gradually
+EVICTION_BATCH_SIZE = 25
+RETENTION_INTERVAL_SECONDS = 60
+# Never archive a session touched recently, even if it falls outside max_history
+MIN_IDLE_SECONDS = 3600
+# Share of dead (restored, deleted or superseded) members at which the archive is repacked
+COMPACT_DEAD_RATIO = 0.25
+
+# Serializes archive reads/writes within this process
+_archive_lock = threading.RLock()
+
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+_max_history = DEFAULT_MAX_HISTORY
+
+
+def _archive_file_lock():
+    """Cross-process lock for changes to the archive (take before any session lock)"""
+    return file_lock(os.path.join(session_store.SESSIONS_FOLDER, LOCKS_FOLDER, 'archive.lock'))
+
+
+def _archive_path() -> str:
+    return os.path.join(session_store.SESSIONS_FOLDER, ARCHIVE_FILE)
+
+
+def _archive_index_path() -> str:
+    return os.path.join(session_store.SESSIONS_FOLDER, ARCHIVE_INDEX_FILE)
+
+
+def _member_name(session_id: str) -> str:
+    return f"s_{session_id}.json"
+
+
+def _load_archive_index() -> Dict[str, Dict[str, Any]]:
+    """Load the archive index (session id -> metadata)"""
+    try:
+        with open(_archive_index_path(), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_archive_index(index: Dict[str, Dict[str, Any]]) -> None:
+    """Save the archive index atomically"""
+    index_path = _archive_index_path()
+    temp_path = index_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(temp_path, index_path)
+
+
+def _unarchive(session_ids: List[str]) -> None:
+    """Drop sessions from the archive index (take both archive locks); their members are left for compact_archive()"""
+    index = _load_archive_index()
+    for session_id in session_ids:
+        index.pop(session_id, None)
+    _save_archive_index(index)
+
+
+def compact_archive(min_dead_ratio: float = COMPACT_DEAD_RATIO) -> int:
+    """
+    Repack the archive without dead members (zip members cannot be deleted in
+    place): those of sessions no longer in the index, and older copies of a
+    session archived again.
+
+    Args:
+        min_dead_ratio: Only repack when at least this share of members is dead
+
+    Returns:
+        Number of members dropped
+    """
+    archive_path = _archive_path()
+    with _archive_lock, _archive_file_lock():
+        if not os.path.exists(archive_path):
+            return 0
+        live_names = {_member_name(sid) for sid in _load_archive_index()}
+        with zipfile.ZipFile(archive_path, 'r') as src:
+            infos = src.infolist()
+            # A later member of the same name supersedes earlier ones (zipfile reads the last)
+            latest = {info.filename: info for info in infos}
+            keep = [info for name, info in latest.items() if name in live_names]
+            dead = len(infos) - len(keep)
+            if dead == 0 or dead < min_dead_ratio * len(infos):
+                return 0
+            temp_path = archive_path + '.tmp'
+            with zipfile.ZipFile(temp_path, 'w', compression=zipfile.ZIP_DEFLATED) as dst:
+                for info in keep:
+                    dst.writestr(info, src.read(info))
+        os.replace(temp_path, archive_path)
+    return dead
+
+
+def _hot_sessions_by_age() -> List[tuple]:
+    """List (mtime, session_id) for hot session files, newest first, using only stat calls"""
+    entries = []
+    try:
+        with os.scandir(session_store.SESSIONS_FOLDER) as it:
+            for entry in it:
+                if entry.name.startswith('s_') and entry.name.endswith('.json'):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.name[2:-5]))
+                    except OSError:
+                        pass
+    except FileNotFoundError:
+        return []
+    return sorted(entries, reverse=True)
+
+
+def archive_session(session_id: str) -> bool:
+    """Move a single hot session into the archive. Returns True if archived."""
+    session_file = session_store._get_session_file(session_id)
+
+    with _archive_lock, _archive_file_lock(), session_store.session_lock(session_id):
+        try:
+            with open(session_file, 'r') as f:
+                raw = f.read()
+            session = json.loads(raw)
+        except (OSError, ValueError):
+            return False
+
+        index = _load_archive_index()
+        # A dead member of the same name (restored earlier) is superseded by this one
+        with zipfile.ZipFile(_archive_path(), 'a', compression=zipfile.ZIP_DEFLATED) as zf, \
+                warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            zf.writestr(_member_name(session_id), raw)
+
+        index[session_id] = {
+            'updated_at': session.get('updated_at', ''),
+            'archived_at': datetime.now().isoformat()
+        }
+        _save_archive_index(index)
+
+        try:
+            os.remove(session_file)
+        except OSError:
+            pass
+    return True
+
+
+def enforce_retention(max_history: int = DEFAULT_MAX_HISTORY, batch_size: int = EVICTION_BATCH_SIZE) -> int:
+    """
+    Archive the least recently updated sessions beyond max_history.
+
+    Args:
+        max_history: Number of most recently updated sessions to keep hot (<= 0 disables)
+        batch_size: Maximum number of sessions to archive in this pass
+
+    Returns:
+        Number of sessions archived
+    """
+    if max_history <= 0:
+        return 0
+
+    hot = _hot_sessions_by_age()
+    cutoff = time.time() - MIN_IDLE_SECONDS
+    # Oldest first, so each batch evicts the coldest sessions
+    candidates = [sid for mtime, sid in reversed(hot[max_history:]) if mtime < cutoff]
+
+    archived = 0
+    for session_id in candidates[:batch_size]:
+        if archive_session(session_id):
+            archived += 1
+    return archived
+
+
+@profiled('core')
+def list_archived_sessions() -> List[Dict[str, Any]]:
+    """List archived sessions (from the index), sorted by updated date (newest first)"""
+    with _archive_lock:
+        index = _load_archive_index()
+    sessions = [{'id': sid, **meta} for sid, meta in index.items()]
+    return sorted(sessions, key=lambda x: x.get('updated_at', ''), reverse=True)
+
+
+def get_archived_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """Read an archived session without restoring it"""
+    with _archive_lock:
+        if session_id not in _load_archive_index():
+            return None
+        try:
+            with zipfile.ZipFile(_archive_path(), 'r') as zf:
+                session = json.loads(zf.read(_member_name(session_id)))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+    session['id'] = session_id
+    return session
+
+
+@profiled('core')
+def search_archived_sessions(query: str, limit: int = 50) -> List[Dict[str, Any]]:
+    """
+    Case-insensitive substring search over the text fields of archived sessions.
+
+    Returns:
+        Matching archived sessions, newest first (at most `limit`)
+    """
+    needle = query.strip().lower()
+    if not needle:
+        return []
+
+    results = []
+    with _archive_lock:
+        archived = list_archived_sessions()
+        if not archived:
+            return []
+        try:
+            zf = zipfile.ZipFile(_archive_path(), 'r')
+        except (OSError, zipfile.BadZipFile):
+            return []
+        with zf:
+            for meta in archived:
+                try:
+                    session = json.loads(zf.read(_member_name(meta['id'])))
+                except (KeyError, ValueError):
+                    continue
+                if any(isinstance(v, str) and needle in v.lower() for v in session.values()):
+                    session['id'] = meta['id']
+                    results.append(session)
+                    if len(results) >= limit:
+                        break
+    return results
+
+
+@profiled('core')
+def restore_archived_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """Move an archived session back to a hot session file. Returns the session or None."""
+    with _archive_lock, _archive_file_lock():
+        session = get_archived_session(session_id)
+        if session is None:
+            return None
+
+        data = {k: v for k, v in session.items() if k != 'id'}
+        os.makedirs(session_store.SESSIONS_FOLDER, exist_ok=True)
+        with session_store.session_lock(session_id):
+            atomic_write_json(session_store._get_session_file(session_id), data)
+
+        _unarchive([session_id])
+    return session
+
+
+def delete_archived_session(session_id: str) -> None:
+    """Permanently remove a session from the archive"""
+    with _archive_lock, _archive_file_lock():
+        index = _load_archive_index()
+        if session_id not in index:
+            return
+        _unarchive([session_id])
+    from .revisions import delete_revisions
+    delete_revisions(session_id)
+
+
+def clear_archive() -> int:
+    """
+    Permanently remove every archived session: the archive zip, its index,
+    their revision logs and their search index entries.
+
+    Returns:
+        Number of archived sessions removed
+    """
+    from .revisions import delete_revisions
+    from .search import unindex_session
+
+    with _archive_lock, _archive_file_lock():
+        session_ids = list(_load_archive_index())
+        for path in (_archive_path(), _archive_index_path()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+    for session_id in session_ids:
+        delete_revisions(session_id)
+        unindex_session(session_id)
+    return len(session_ids)
+
+
+def _retention_loop() -> None:
+    while True:
+        time.sleep(RETENTION_INTERVAL_SECONDS)
+        try:
+            # Keep going while there is a backlog, one batch at a time
+            while enforce_retention(_max_history) >= EVICTION_BATCH_SIZE:
+                time.sleep(1)
+            compact_archive()
+        except Exception:
+            pass
+
+
+def start_retention_worker(config: dict) -> None:
+    """Start the background retention thread once per process (safe to call every rerun)"""
+    global _worker, _max_history
+    _max_history = int((config.get('session') or {}).get('max_history', DEFAULT_MAX_HISTORY))
+
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_retention_loop, name='session-retention', daemon=True)
+            _worker.start()
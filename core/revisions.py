@@ -0,0 +1,190 @@
+"""Note Revision History
+
+Earlier versions of the note fields (scribe_note, edit_result,
+synthesize_result) are kept in a per-session revision log,
+sessions/r_<id>.json, written by update_session under the session lock:
+- The newest revision is stored in full ('head'); each older one as a
+  line-level delta that turns the next newer revision back into it. New
+  revisions only rewrite the previous head as a delta, and pruning drops the
+  oldest entries without touching the others
+- Every KEYFRAME_INTERVAL-th revision is stored in full, so reconstructing
+  any revision applies fewer than KEYFRAME_INTERVAL deltas
+- Payloads are zlib-compressed when that makes them smaller
+- Each field keeps at most session.max_revisions revisions and
+  session.max_revision_bytes of stored payload; the oldest are pruned first
+"""
+
+import base64
+import difflib
+import json
+import os
+import zlib
+from typing import Optional, Dict, Any, List
+
+from . import session as session_store
+from .locking import atomic_write_json
+from .profiler import profiled
+
+REVISION_FIELDS = ('scribe_note', 'edit_result', 'synthesize_result')
+
+DEFAULT_MAX_REVISIONS = 50
+DEFAULT_MAX_BYTES = 256 * 1024
+KEYFRAME_INTERVAL = 10
+# Payloads shorter than this are stored as plain JSON (compression would not pay off)
+COMPRESS_MIN_BYTES = 256
+
+_max_revisions = DEFAULT_MAX_REVISIONS
+_max_bytes = DEFAULT_MAX_BYTES
+
+
+def configure_revisions(config: dict) -> None:
+    """Apply session.max_revisions (0 disables history) and session.max_revision_bytes"""
+    global _max_revisions, _max_bytes
+    session_config = config.get('session', {}) or {}
+    _max_revisions = int(session_config.get('max_revisions', DEFAULT_MAX_REVISIONS))
+    _max_bytes = int(session_config.get('max_revision_bytes', DEFAULT_MAX_BYTES))
+
+
+def _revisions_file(session_id: str) -> str:
+    return os.path.join(session_store.SESSIONS_FOLDER, f"r_{session_id}.json")
+
+
+def _load(session_id: str) -> Dict[str, Any]:
+    try:
+        with open(_revisions_file(session_id), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _pack(entry: Dict[str, Any], kind: str, value: Any) -> None:
+    raw = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+    if len(raw) >= COMPRESS_MIN_BYTES:
+        packed = base64.b64encode(zlib.compress(raw.encode('utf-8'), 9)).decode('ascii')
+        if len(packed) < len(raw):
+            entry[kind] = packed
+            entry['z'] = True
+            return
+    entry[kind] = value
+
+
+def _unpack(entry: Dict[str, Any], kind: str) -> Any:
+    if entry.get('z'):
+        return json.loads(zlib.decompress(base64.b64decode(entry[kind])))
+    return entry[kind]
+
+
+def _payload_size(entry: Dict[str, Any]) -> int:
+    payload = entry.get('delta', entry.get('key'))
+    if payload is None:
+        return 0
+    return len(payload) if isinstance(payload, str) else len(json.dumps(payload, separators=(',', ':')))
+
+
+def make_delta(newer: str, older: str) -> List[Any]:
+    """Delta turning newer into older: [start, end] copies newer's lines, a string is inserted"""
+    newer_lines = newer.splitlines(keepends=True)
+    older_lines = older.splitlines(keepends=True)
+    ops: List[Any] = []
+    matcher = difflib.SequenceMatcher(None, newer_lines, older_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(''.join(older_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(newer: str, delta: List[Any]) -> str:
+    """Rebuild the older text from newer and make_delta(newer, older)"""
+    lines = newer.splitlines(keepends=True)
+    return ''.join(op if isinstance(op, str) else ''.join(lines[op[0]:op[1]]) for op in delta)
+
+
+def _append(log: Dict[str, Any], text: str, at: Optional[str]) -> None:
+    revisions = log.setdefault('revisions', [])
+    if revisions:
+        # The previous head becomes a keyframe or a delta against the new text
+        previous = revisions[-1]
+        if previous['n'] % KEYFRAME_INTERVAL == 0:
+            _pack(previous, 'key', log['head'])
+        else:
+            _pack(previous, 'delta', make_delta(text, log['head']))
+    number = log.get('next', 1)
+    revisions.append({'n': number, 'at': at, 'chars': len(text)})
+    log['head'] = text
+    log['next'] = number + 1
+
+    # Oldest first; the head always stays
+    while len(revisions) > 1 and (
+            len(revisions) > _max_revisions
+            or len(text) + sum(_payload_size(entry) for entry in revisions) > _max_bytes):
+        revisions.pop(0)
+
+
+def record_revisions(session_id: str, previous: Dict[str, Any], updates: Dict[str, Any], at: str) -> None:
+    """
+    Add changed note fields to the session's revision log. Called by
+    update_session with the session lock held; previous is the session
+    before the update (its text seeds the log of a field with no history yet).
+    """
+    changed = {
+        field: updates[field] for field in REVISION_FIELDS
+        if isinstance(updates.get(field), str) and updates[field] and updates[field] != previous.get(field)
+    }
+    if not changed or _max_revisions <= 0:
+        return
+
+    logs = _load(session_id)
+    for field, text in changed.items():
+        log = logs.setdefault(field, {})
+        if not log.get('revisions') and previous.get(field):
+            _append(log, previous[field], previous.get('updated_at'))
+        if log.get('head') != text:
+            _append(log, text, at)
+    atomic_write_json(_revisions_file(session_id), logs)
+
+
+@profiled('core')
+def list_revisions(session_id: str, field: str) -> List[Dict[str, Any]]:
+    """Revisions of a note field, newest first: [{'n', 'at', 'chars'}]"""
+    revisions = _load(session_id).get(field, {}).get('revisions', [])
+    return [{'n': r['n'], 'at': r['at'], 'chars': r['chars']} for r in reversed(revisions)]
+
+
+@profiled('core')
+def get_revision(session_id: str, field: str, number: int) -> Optional[str]:
+    """Text of revision `number` of a note field, or None if it does not exist (or was pruned)"""
+    log = _load(session_id).get(field, {})
+    revisions = log.get('revisions', [])
+    index = next((i for i, r in enumerate(revisions) if r['n'] == number), None)
+    if index is None:
+        return None
+
+    # Start from the nearest newer keyframe (or the head) and apply deltas back to the revision
+    base = index
+    while base < len(revisions) - 1 and 'key' not in revisions[base]:
+        base += 1
+    text = _unpack(revisions[base], 'key') if 'key' in revisions[base] else log['head']
+    for entry in reversed(revisions[index:base]):
+        text = apply_delta(text, _unpack(entry, 'delta'))
+    return text
+
+
+def read_revision_log(session_id: str) -> Dict[str, Any]:
+    """A session's stored revision log as-is (empty if it has none), for export"""
+    return _load(session_id)
+
+
+def write_revision_log(session_id: str, log: Dict[str, Any], folder: Optional[str] = None) -> None:
+    """Store an exported revision log for a session (in folder, default the sessions folder)"""
+    path = os.path.join(folder, f"r_{session_id}.json") if folder else _revisions_file(session_id)
+    atomic_write_json(path, log)
+
+
+def delete_revisions(session_id: str) -> None:
+    """Remove a session's revision log"""
+    try:
+        os.remove(_revisions_file(session_id))
+    except OSError:
+        pass
@@ -0,0 +1,332 @@
+"""Full-Text Session Search
+
+Inverted index over the text fields of every session (hot and archived):
+- Postings map term -> {session_id: term frequency}, ranked with BM25
+- Kept current incrementally by update_session/delete_session in this process
+- Reconciled against file mtimes on first use and periodically, which picks up
+  writes from other processes without re-reading unchanged sessions
+- Snapshot saved to sessions/search_index.json.gz (debounced, off the rerun path)
+"""
+
+import bisect
+import gzip
+import json
+import math
+import os
+import re
+import threading
+import time
+import zlib
+from typing import Optional, Dict, Any, List
+
+from . import session as session_store
+from .profiler import profiled
+
+SEARCH_INDEX_FILE = 'search_index.json.gz'
+SNAPSHOT_VERSION = 3
+
+# Session keys that are not free text
+NON_TEXT_FIELDS = {'id', 'updated_at'}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+RECONCILE_INTERVAL_SECONDS = 30
+SAVE_DELAY_SECONDS = 30
+SNIPPET_RADIUS = 60
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric terms"""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _session_terms(session: Dict[str, Any]) -> Dict[str, int]:
+    """Term frequencies across all text fields of a session"""
+    terms: Dict[str, int] = {}
+    for key, value in session.items():
+        if key in NON_TEXT_FIELDS or key.startswith('_') or not isinstance(value, str):
+            continue
+        for term in tokenize(value):
+            terms[term] = terms.get(term, 0) + 1
+    return terms
+
+
+class SessionSearchIndex:
+    """In-memory inverted index with BM25 ranking"""
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.docs: Dict[str, Dict[str, Any]] = {}  # id -> {'terms' (the doc's terms), 'length', 'mtime', 'updated_at'}
+        self.total_length = 0
+        self._vocab: Optional[List[str]] = None  # sorted terms for prefix lookup, rebuilt lazily
+        self.lock = threading.RLock()
+
+    def add(self, session_id: str, terms: Dict[str, int], mtime: float, updated_at: str) -> None:
+        """Index (or re-index) a session"""
+        with self.lock:
+            self.remove(session_id)
+            for term, tf in terms.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = {}
+                    self._vocab = None
+                posting[session_id] = tf
+            length = sum(terms.values())
+            self.docs[session_id] = {'terms': terms, 'length': length, 'mtime': mtime, 'updated_at': updated_at}
+            self.total_length += length
+
+    def remove(self, session_id: str) -> None:
+        """Drop a session from the index"""
+        with self.lock:
+            doc = self.docs.pop(session_id, None)
+            if doc is None:
+                return
+            for term in doc['terms']:
+                posting = self.postings.get(term)
+                if posting is not None and posting.pop(session_id, None) is not None and not posting:
+                    del self.postings[term]
+                    self._vocab = None
+            self.total_length -= doc['length']
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        if self._vocab is None:
+            self._vocab = sorted(self.postings)
+        start = bisect.bisect_left(self._vocab, prefix)
+        end = bisect.bisect_left(self._vocab, prefix + '\uffff')
+        return self._vocab[start:end]
+
+    def query(self, text: str, limit: int = 20) -> List[tuple]:
+        """
+        Rank sessions against a query with BM25.
+
+        The last query term also matches as a prefix, so results update while typing.
+
+        Returns:
+            List of (session_id, score), best first
+        """
+        query_terms = tokenize(text)
+        if not query_terms:
+            return []
+
+        with self.lock:
+            n_docs = len(self.docs)
+            if n_docs == 0:
+                return []
+            avg_length = self.total_length / n_docs or 1.0
+
+            expanded = [[t] for t in query_terms[:-1]]
+            last = query_terms[-1]
+            expanded.append(self._expand_prefix(last) if len(last) >= 3 else [last])
+
+            scores: Dict[str, float] = {}
+            for alternatives in expanded:
+                for term in alternatives:
+                    posting = self.postings.get(term)
+                    if not posting:
+                        continue
+                    idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                    for session_id, tf in posting.items():
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.docs[session_id]['length'] / avg_length)
+                        scores[session_id] = scores.get(session_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:limit]
+
+
+_index: Optional[SessionSearchIndex] = None
+_index_lock = threading.Lock()
+_last_reconcile = 0.0
+_save_timer: Optional[threading.Timer] = None
+_save_lock = threading.Lock()
+
+
+def _index_path() -> str:
+    return os.path.join(session_store.SESSIONS_FOLDER, SEARCH_INDEX_FILE)
+
+
+def _load_snapshot(index: SessionSearchIndex) -> None:
+    try:
+        with gzip.open(_index_path(), 'rt') as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError, EOFError, zlib.error):
+        return
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        return
+    # Postings are stored as-is so loading is a single JSON parse; each document keeps
+    # its term list so removing or re-indexing it only touches its own postings
+    with index.lock:
+        index.postings = snapshot['postings']
+        index.docs = snapshot['docs']
+        index.total_length = sum(doc['length'] for doc in index.docs.values())
+        index._vocab = None
+
+
+def _save_snapshot() -> None:
+    """Write the index snapshot atomically"""
+    global _save_timer
+    index = _index
+    if index is None:
+        return
+    # Before taking the snapshot, so a write made while it is taken schedules another save
+    with _index_lock:
+        _save_timer = None
+    with index.lock:
+        docs = {
+            sid: {'terms': list(doc['terms']), 'length': doc['length'], 'mtime': doc['mtime'],
+                  'updated_at': doc['updated_at']}
+            for sid, doc in index.docs.items()
+        }
+        data = json.dumps({'version': SNAPSHOT_VERSION, 'postings': index.postings, 'docs': docs})
+    with _save_lock:
+        try:
+            os.makedirs(session_store.SESSIONS_FOLDER, exist_ok=True)
+            temp_path = _index_path() + '.tmp'
+            with gzip.open(temp_path, 'wb', compresslevel=1) as f:
+                f.write(data.encode('utf-8'))
+            os.replace(temp_path, _index_path())
+        except OSError:
+            pass
+
+
+def _schedule_save() -> None:
+    """Debounce snapshot writes onto a timer thread"""
+    global _save_timer
+    with _index_lock:
+        if _save_timer is None:
+            _save_timer = threading.Timer(SAVE_DELAY_SECONDS, _save_snapshot)
+            _save_timer.daemon = True
+            _save_timer.start()
+
+
+def _read_session_file(session_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(session_store._get_session_file(session_id), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _reconcile(index: SessionSearchIndex) -> bool:
+    """Bring the index in line with the sessions folder, re-reading only changed files"""
+    from .retention import list_archived_sessions
+
+    hot = {}
+    try:
+        with os.scandir(session_store.SESSIONS_FOLDER) as it:
+            for entry in it:
+                if entry.name.startswith('s_') and entry.name.endswith('.json'):
+                    try:
+                        hot[entry.name[2:-5]] = entry.stat().st_mtime
+                    except OSError:
+                        pass
+    except FileNotFoundError:
+        pass
+    archived = {s['id'] for s in list_archived_sessions()}
+
+    changed = False
+    for session_id, mtime in hot.items():
+        doc = index.docs.get(session_id)
+        if doc is not None and doc['mtime'] == mtime:
+            continue
+        session = _read_session_file(session_id)
+        if session is not None:
+            index.add(session_id, _session_terms(session), mtime, session.get('updated_at', ''))
+            changed = True
+
+    # Sessions moved to the archive stay searchable; anything else that vanished was deleted
+    for session_id in list(index.docs):
+        if session_id not in hot and session_id not in archived:
+            index.remove(session_id)
+            changed = True
+    return changed
+
+
+def get_search_index() -> SessionSearchIndex:
+    """Get the process-wide index, loading and reconciling it on first use"""
+    global _index, _last_reconcile
+    with _index_lock:
+        if _index is None:
+            index = SessionSearchIndex()
+            _load_snapshot(index)
+            _index = index
+            stale = True
+        else:
+            stale = time.time() - _last_reconcile > RECONCILE_INTERVAL_SECONDS
+        if stale:
+            _last_reconcile = time.time()
+    if stale and _reconcile(_index):
+        _schedule_save()
+    return _index
+
+
+def index_session(session_id: str, session: Dict[str, Any], mtime: Optional[float] = None) -> None:
+    """Update the index after a session write (no-op until the index has been used)"""
+    if _index is None:
+        return
+    if mtime is None:
+        try:
+            mtime = os.path.getmtime(session_store._get_session_file(session_id))
+        except OSError:
+            mtime = 0.0
+    _index.add(session_id, _session_terms(session), mtime, session.get('updated_at', ''))
+    _schedule_save()
+
+
+def unindex_session(session_id: str) -> None:
+    """Remove a deleted session from the index"""
+    if _index is None:
+        return
+    _index.remove(session_id)
+    _schedule_save()
+
+
+def _snippet(session: Dict[str, Any], query_terms: List[str]) -> str:
+    """Short excerpt around the first matching term"""
+    for key, value in session.items():
+        if key in NON_TEXT_FIELDS or key.startswith('_') or not isinstance(value, str):
+            continue
+        lowered = value.lower()
+        for term in query_terms:
+            pos = lowered.find(term)
+            if pos >= 0:
+                start = max(0, pos - SNIPPET_RADIUS)
+                end = min(len(value), pos + len(term) + SNIPPET_RADIUS)
+                excerpt = value[start:end].replace('\n', ' ')
+                return ('…' if start > 0 else '') + excerpt + ('…' if end < len(value) else '')
+    return ''
+
+
+@profiled('core')
+def search_sessions(query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Ranked full-text search over all sessions.
+
+    Args:
+        query: Free-text query
+        limit: Maximum number of results
+
+    Returns:
+        List of {'id', 'score', 'updated_at', 'archived', 'snippet'}, best first
+    """
+    from .retention import get_archived_session
+
+    index = get_search_index()
+    query_terms = tokenize(query)
+    results = []
+    for session_id, score in index.query(query, limit):
+        session = _read_session_file(session_id)
+        archived = session is None
+        if archived:
+            session = get_archived_session(session_id) or {}
+        results.append({
+            'id': session_id,
+            'score': score,
+            'updated_at': session.get('updated_at', index.docs.get(session_id, {}).get('updated_at', '')),
+            'archived': archived,
+            'snippet': _snippet(session, query_terms)
+        })
+    return results
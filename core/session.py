@@ -4,29 +4,70 @@ Uses individual session files for better concurrency:
 - Each session stored as sessions/s_<id>.json
 - No shared index file - scan folder for session list
 - Safe for multiple users working on different sessions
+- Writes are atomic (temp file + rename) and serialized per session with an
+  advisory file lock, so several app processes can share the folder
+- Every write bumps _version; _field_versions records the version at which
+  each field last changed. update_session(expected_version=...) merges
+  updates to fields nobody else touched and raises SessionConflictError
+  for fields changed since the caller's version
+- Sessions beyond session.max_history are archived (see retention.py) and
+  restored transparently when opened or updated
+- Writes and deletes keep the full-text search index current (see search.py)
+- Earlier versions of the note fields are kept in sessions/r_<id>.json
+  (see revisions.py)
 """
 
 import json
 import os
+import re
 import uuid
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
+from .locking import file_lock, stripe_lock_path, atomic_write_json
+from .metrics import timed_call
+from .profiler import profiled
+
 # Folder for session files
 SESSIONS_FOLDER = 'sessions'
 
+# Ids that are safe to use in file names (s_<id>.json)
+SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]+$')
+
+# Bookkeeping fields that callers cannot set through update_session
+RESERVED_FIELDS = ('id', '_version', '_field_versions')
+
+
+class SessionConflictError(Exception):
+    """Fields were changed by another writer since the caller's expected version"""
+
+    def __init__(self, session_id: str, fields: List[str], current: Dict[str, Any]):
+        super().__init__(f"Session {session_id} was modified elsewhere: {', '.join(fields)}")
+        self.session_id = session_id
+        self.fields = fields
+        self.current = current
+
 
 def _get_session_file(session_id: str) -> str:
     """Get the file path for a session"""
     return os.path.join(SESSIONS_FOLDER, f"s_{session_id}.json")
 
 
+def session_lock(session_id: str):
+    """Exclusive cross-process lock for writing one session (not re-entrant)"""
+    return file_lock(stripe_lock_path(SESSIONS_FOLDER, session_id))
+
+
+@profiled('core')
+@timed_call('session_io_seconds', op='create')
 def create_session() -> Dict[str, Any]:
     """Create a new session"""
     session_id = str(uuid.uuid4())[:8]
     now = datetime.now().isoformat()
     
     session = {
+        "_version": 1,
+        "_field_versions": {},
         "updated_at": now,
         "scribe_transcript": "",
         "scribe_note": "",
@@ -46,15 +87,15 @@ def create_session() -> Dict[str, Any]:
     os.makedirs(SESSIONS_FOLDER, exist_ok=True)
     
     # Save individual session file
-    session_file = _get_session_file(session_id)
-    with open(session_file, 'w') as f:
-        json.dump(session, f, indent=2)
+    atomic_write_json(_get_session_file(session_id), session)
     
     # Return session with ID for convenience
     session['id'] = session_id
     return session
 
 
+@profiled('core')
+@timed_call('session_io_seconds', op='scan')
 def get_all_sessions() -> List[Dict[str, Any]]:
     """Get all sessions by scanning folder, sorted by updated date (newest first)"""
     os.makedirs(SESSIONS_FOLDER, exist_ok=True)
@@ -80,6 +121,37 @@ def get_all_sessions() -> List[Dict[str, Any]]:
     return sorted(sessions, key=lambda x: x.get('updated_at', ''), reverse=True)
 
 
+@profiled('core')
+@timed_call('session_io_seconds', op='scan')
+def list_session_metadata() -> List[Dict[str, Any]]:
+    """
+    List session metadata from directory entries only (no file contents are read).
+    
+    Returns:
+        List of {'id', 'updated_at', 'size'} sorted by last write (newest first);
+        updated_at is derived from the file modification time
+    """
+    os.makedirs(SESSIONS_FOLDER, exist_ok=True)
+    
+    sessions = []
+    with os.scandir(SESSIONS_FOLDER) as it:
+        for entry in it:
+            if entry.name.startswith('s_') and entry.name.endswith('.json'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                sessions.append({
+                    'id': entry.name[2:-5],
+                    'updated_at': datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    'size': stat.st_size
+                })
+    
+    return sorted(sessions, key=lambda x: x['updated_at'], reverse=True)
+
+
+@profiled('core')
+@timed_call('session_io_seconds', op='read')
 def get_session_by_id(session_id: str) -> Optional[Dict[str, Any]]:
     """Get a specific session by ID"""
     session_file = _get_session_file(session_id)
@@ -92,39 +164,94 @@ def get_session_by_id(session_id: str) -> Optional[Dict[str, Any]]:
                 return session
         except:
             pass
-    return None
+        return None
+    
+    # Fall back to the archive - opening an archived session makes it hot again
+    from .retention import restore_archived_session
+    return restore_archived_session(session_id)
 
 
-def update_session(session_id: str, updates: Dict[str, Any]) -> None:
-    """Update session data"""
+@profiled('core')
+@timed_call('session_io_seconds', op='update')
+def update_session(session_id: str, updates: Dict[str, Any], expected_version: Optional[int] = None) -> Optional[int]:
+    """
+    Update session data.
+    
+    Args:
+        session_id: Session to update
+        updates: Fields to set
+        expected_version: The _version the caller's copy was based on. If the
+            session has moved on, updates to fields changed since then raise
+            SessionConflictError; other fields are merged. None writes unconditionally.
+    
+    Returns:
+        The new _version, or None if the session does not exist
+    
+    Raises:
+        SessionConflictError: A field in updates was changed by another writer
+    """
     session_file = _get_session_file(session_id)
-    now = datetime.now().isoformat()
+    updates = {k: v for k, v in updates.items() if k not in RESERVED_FIELDS}
     
-    # Load existing session
-    if os.path.exists(session_file):
+    # Restore from the archive if needed (takes the session lock itself)
+    if not os.path.exists(session_file):
+        from .retention import restore_archived_session
+        restore_archived_session(session_id)
+    
+    with session_lock(session_id):
         try:
             with open(session_file, 'r') as f:
                 session = json.load(f)
-        except:
-            return
-    else:
-        return
-    
-    # Apply updates
-    session.update(updates)
-    session['updated_at'] = now
+        except (OSError, ValueError):
+            return None
+        
+        current_version = session.get('_version', 0)
+        field_versions = session.setdefault('_field_versions', {})
+        
+        if expected_version is not None and expected_version != current_version:
+            conflicts = [
+                field for field, value in updates.items()
+                if field_versions.get(field, 0) > expected_version and session.get(field) != value
+            ]
+            if conflicts:
+                session['id'] = session_id
+                raise SessionConflictError(session_id, conflicts, session)
+        
+        # Note fields' earlier text goes to the revision log (see revisions.py)
+        from .revisions import REVISION_FIELDS, record_revisions
+        previous = {field: session.get(field) for field in (*REVISION_FIELDS, 'updated_at')}
+        
+        # Apply updates
+        new_version = current_version + 1
+        for field, value in updates.items():
+            if session.get(field) != value:
+                field_versions[field] = new_version
+        session.update(updates)
+        session['_version'] = new_version
+        session['updated_at'] = datetime.now().isoformat()
+        
+        atomic_write_json(session_file, session)
+        record_revisions(session_id, previous, updates, session['updated_at'])
     
-    # Save session file
-    with open(session_file, 'w') as f:
-        json.dump(session, f, indent=2)
+    from .search import index_session
+    index_session(session_id, session)
+    return new_version
 
 
+@profiled('core')
+@timed_call('session_io_seconds', op='delete')
 def delete_session(session_id: str) -> None:
-    """Delete a session file"""
+    """Delete a session file and its revision history"""
     session_file = _get_session_file(session_id)
     
-    if os.path.exists(session_file):
-        try:
-            os.remove(session_file)
-        except:
-            pass
+    with session_lock(session_id):
+        if os.path.exists(session_file):
+            try:
+                os.remove(session_file)
+            except:
+                pass
+        from .revisions import delete_revisions
+        delete_revisions(session_id)
+    
+    from .search import unindex_session
+    unindex_session(session_id)
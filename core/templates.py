@@ -1,13 +1,46 @@
-"""Template Loading Functions"""
+"""Template Loading Functions
 
+Templates are templates/<id>.txt (the file content is the template prompt). An
+optional sidecar templates/<id>.yaml can declare generation limits:
+    max_tokens: 1500       # output budget for notes from this template
+    stop: ["</note>"]      # stop sequences
+    grammar: false         # GBNF for llm.grammar_constrained (false: none, default: from headings)
+"""
+
+import logging
 from pathlib import Path
 from typing import Optional, Dict, List, Any
 
-import streamlit as st
+from .profiler import profiled
+
+logger = logging.getLogger(__name__)
+
+# Keys read from a template's .yaml sidecar
+METADATA_KEYS = ('max_tokens', 'stop', 'grammar')
+
+
+def _load_template_metadata(template_file: Path) -> Dict[str, Any]:
+    """Generation limits from the template's .yaml sidecar, if it has one"""
+    sidecar = template_file.with_suffix('.yaml')
+    if not sidecar.exists():
+        return {}
+    import yaml
+    with open(sidecar, 'r') as f:
+        metadata = yaml.safe_load(f) or {}
+    if not isinstance(metadata, dict):
+        raise ValueError(f"{sidecar} must contain a mapping")
+    return {key: metadata[key] for key in METADATA_KEYS if key in metadata}
+
 
+@profiled('core')
+def load_templates(errors: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Load templates from templates folder (.txt files).
 
-def load_templates() -> List[Dict[str, Any]]:
-    """Load templates from templates folder (.txt files)"""
+    Args:
+        errors: If given, receives a message for every template that failed to
+            load (the template is skipped), for the caller to show
+    """
     templates = []
     templates_dir = Path("templates")
     
@@ -23,19 +56,24 @@ def load_templates() -> List[Dict[str, Any]]:
                         'name': template_file.stem.replace('_', ' ').title(),
                         'system_prompt': content.strip()
                     }
-                    templates.append(template)
+                template.update(_load_template_metadata(template_file))
+                templates.append(template)
             except Exception as e:
-                st.warning(f"Failed to load template {template_file}: {e}")
+                logger.warning("Failed to load template %s: %s", template_file, e)
+                if errors is not None:
+                    errors.append(f"Failed to load template {template_file}: {e}")
     
     return templates
 
 
+@profiled('core')
 def get_template_names() -> List[str]:
     """Get list of template names"""
     templates = load_templates()
     return [t['name'] for t in templates]
 
 
+@profiled('core')
 def get_template_by_name(name: str) -> Optional[Dict[str, Any]]:
     """Get template by name"""
     templates = load_templates()
@@ -45,6 +83,7 @@ def get_template_by_name(name: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+@profiled('core')
 def get_fallback_templates() -> List[Dict[str, Any]]:
     """Get fallback templates from config.yaml"""
     from .config import load_config
@@ -0,0 +1,340 @@
+"""Session Export/Import
+
+Bulk backup and migration of sessions as NDJSON (one session per line,
+gzip-compressed when the file name ends in .gz), covering hot and archived
+sessions:
+- Streaming: sessions are read, written and loaded one at a time through
+  generators, so memory use does not grow with the number of sessions
+- Resumable: export appends a gzip member per batch and records a checkpoint
+  (<file>.checkpoint) after each; import records how many lines it applied.
+  Re-running with resume=True continues from the checkpoint
+- Each exported session carries its note revision log (see revisions.py)
+  under '_revisions'; DirectorySink writes it back as r_<id>.json
+- Filterable by updated_at range; since/until are ISO date or datetime
+  prefixes, both inclusive ('2026-01-01' .. '2026-03-31')
+- Imports go to a SessionSink: DirectorySink writes session files (the live
+  sessions folder by default); other storage backends subclass SessionSink
+"""
+
+import gzip
+import json
+import os
+import time
+import zipfile
+from typing import Optional, Dict, Any, Iterator, Callable, List
+
+from . import session as session_store
+from .locking import file_lock, stripe_lock_path, atomic_write_json
+from .profiler import profiled
+from .revisions import read_revision_log, write_revision_log
+
+# Sessions per gzip member / checkpoint
+BATCH_SIZE = 500
+CHECKPOINT_SUFFIX = '.checkpoint'
+IMPORT_CHECKPOINT_SUFFIX = '.import-checkpoint'
+CONFLICT_POLICIES = ('newer', 'skip', 'overwrite')
+
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+def in_date_range(session: Dict[str, Any], since: Optional[str] = None, until: Optional[str] = None) -> bool:
+    """Whether a session's updated_at falls within [since, until] (prefix comparison)"""
+    updated_at = session.get('updated_at', '')
+    if since and updated_at < since:
+        return False
+    if until and updated_at[:len(until)] > until:
+        return False
+    return True
+
+
+def _hot_session_ids() -> List[str]:
+    try:
+        with os.scandir(session_store.SESSIONS_FOLDER) as it:
+            return [e.name[2:-5] for e in it if e.name.startswith('s_') and e.name.endswith('.json')]
+    except FileNotFoundError:
+        return []
+
+
+def iter_sessions(since: Optional[str] = None, until: Optional[str] = None,
+                  after_id: Optional[str] = None, revisions: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every session (hot files, then the archive's own copy if not hot)
+    in session id order, reading one at a time.
+
+    Args:
+        since, until: updated_at range (see in_date_range)
+        after_id: Only sessions with a larger id (to resume)
+        revisions: Attach each session's revision log as '_revisions' (if it has one)
+    """
+    from . import retention
+
+    hot = set(_hot_session_ids())
+    with retention._archive_lock:
+        archive_index = retention._load_archive_index()
+    archived = {sid: meta for sid, meta in archive_index.items() if sid not in hot}
+    ids = sorted(hot | archived.keys())
+    if after_id is not None:
+        ids = [sid for sid in ids if sid > after_id]
+
+    archive = None
+    try:
+        for session_id in ids:
+            if session_id in archived:
+                # The index carries updated_at, so filtered-out members are never decompressed
+                if not in_date_range(archived[session_id], since, until):
+                    continue
+                if archive is None:
+                    archive = zipfile.ZipFile(retention._archive_path(), 'r')
+                try:
+                    session = json.loads(archive.read(retention._member_name(session_id)))
+                except (KeyError, ValueError):
+                    continue
+            else:
+                try:
+                    with open(session_store._get_session_file(session_id), 'r') as f:
+                        session = json.load(f)
+                except (OSError, ValueError):
+                    continue
+            if in_date_range(session, since, until):
+                session['id'] = session_id
+                if revisions:
+                    log = read_revision_log(session_id)
+                    if log:
+                        session['_revisions'] = log
+                yield session
+    finally:
+        if archive is not None:
+            archive.close()
+
+
+def _open_append(path: str):
+    raw = open(path, 'ab')
+    if path.endswith('.gz'):
+        # Each batch is a complete gzip member; concatenated members are a valid gzip file
+        return gzip.GzipFile(fileobj=raw, mode='wb'), raw
+    return raw, raw
+
+
+def _throughput(stats: Dict[str, Any], started: float, done_before: int = 0) -> Dict[str, Any]:
+    """Add seconds and sessions_per_second for this run (excluding sessions done before a resume)"""
+    stats['seconds'] = time.perf_counter() - started
+    stats['sessions_per_second'] = (stats['sessions'] - done_before) / stats['seconds'] if stats['seconds'] > 0 else 0.0
+    return stats
+
+
+@profiled('core')
+def export_sessions(path: str, since: Optional[str] = None, until: Optional[str] = None, resume: bool = False,
+                    progress: Optional[ProgressCallback] = None, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Export sessions to an NDJSON file.
+
+    Args:
+        path: Output file (.ndjson.gz for gzip)
+        since, until: updated_at range (see in_date_range)
+        resume: Continue an interrupted export of the same range from its checkpoint
+        progress: Called with the running stats after every batch
+        batch_size: Sessions per batch (gzip member and checkpoint)
+
+    Returns:
+        Stats: sessions and bytes (in total, including a resumed run's earlier part),
+        seconds and sessions_per_second (this run), resumed_after (id or None)
+
+    Raises:
+        ValueError: resume=True but the checkpoint is for a different date range
+    """
+    checkpoint_path = path + CHECKPOINT_SUFFIX
+    state = {'since': since, 'until': until, 'last_id': None, 'offset': 0, 'sessions': 0}
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r') as f:
+            saved = json.load(f)
+        if (saved.get('since'), saved.get('until')) != (since, until):
+            raise ValueError(f"{checkpoint_path} is for since={saved.get('since')} until={saved.get('until')}")
+        state = saved
+    # Drop anything written after the last checkpoint (a partial batch)
+    with open(path, 'ab') as f:
+        f.truncate(state['offset'])
+
+    started = time.perf_counter()
+    done_before = state['sessions']
+    stats = {'sessions': done_before, 'bytes': state['offset'], 'resumed_after': state['last_id']}
+    batch: List[bytes] = []
+
+    def flush() -> None:
+        out, raw = _open_append(path)
+        with raw:
+            with out:
+                out.writelines(batch)
+            state['offset'] = raw.tell()
+        state['sessions'] += len(batch)
+        batch.clear()
+        atomic_write_json(checkpoint_path, state)
+        stats.update(sessions=state['sessions'], bytes=state['offset'])
+        if progress is not None:
+            progress(_throughput(stats, started, done_before))
+
+    for session in iter_sessions(since, until, after_id=state['last_id'], revisions=True):
+        batch.append((json.dumps(session, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8'))
+        state['last_id'] = session['id']
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return _throughput(stats, started, done_before)
+
+
+def read_sessions(path: str) -> Iterator[bytes]:
+    """Yield the raw lines of an NDJSON export (decompressed, one at a time)"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        yield from f
+
+
+class SessionSink:
+    """Destination for imported sessions; subclass for other storage backends"""
+
+    def updated_at(self, session_id: str) -> Optional[str]:
+        """updated_at of the stored copy, '' if it has none, or None if the session is not stored"""
+        return None
+
+    def put(self, session: Dict[str, Any]) -> None:
+        """Store a session (session['id'] is its id, session['_revisions'] its revision log if exported with one)"""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Finish the import (flush buffered work)"""
+
+
+class DirectorySink(SessionSink):
+    """
+    Writes s_<id>.json files. With no folder, writes to the live sessions
+    folder: session locks are taken, the search index is updated, and a stale
+    archived copy of an imported session is dropped from the archive.
+    """
+
+    def __init__(self, folder: Optional[str] = None):
+        self.live = folder is None
+        self._folder = folder
+        self._archive_index: Dict[str, Dict[str, Any]] = {}
+        self._unarchive: List[str] = []
+        if self.live:
+            from . import retention
+            with retention._archive_lock:
+                self._archive_index = retention._load_archive_index()
+        os.makedirs(self.folder, exist_ok=True)
+
+    @property
+    def folder(self) -> str:
+        return session_store.SESSIONS_FOLDER if self.live else self._folder
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.folder, f"s_{session_id}.json")
+
+    def updated_at(self, session_id: str) -> Optional[str]:
+        try:
+            with open(self._path(session_id), 'r') as f:
+                return json.load(f).get('updated_at', '')
+        except (OSError, ValueError):
+            pass
+        meta = self._archive_index.get(session_id)
+        return None if meta is None else meta.get('updated_at', '')
+
+    def put(self, session: Dict[str, Any]) -> None:
+        session_id = session['id']
+        if not isinstance(session_id, str) or not session_store.SESSION_ID_PATTERN.match(session_id):
+            raise ValueError(f"Invalid session id: {session_id!r}")
+        data = {k: v for k, v in session.items() if k not in ('id', '_revisions')}
+        with file_lock(stripe_lock_path(self.folder, session_id)):
+            atomic_write_json(self._path(session_id), data)
+            if isinstance(session.get('_revisions'), dict):
+                write_revision_log(session_id, session['_revisions'], self._folder)
+        if self.live:
+            from .search import index_session
+            index_session(session_id, data)
+            if session_id in self._archive_index:
+                self._unarchive.append(session_id)
+
+    def close(self) -> None:
+        if not self._unarchive:
+            return
+        from . import retention
+        # One index update for all replaced sessions; the retention worker compacts the zip
+        with retention._archive_lock, retention._archive_file_lock():
+            retention._unarchive(self._unarchive)
+        self._unarchive = []
+
+
+@profiled('core')
+def import_sessions(path: str, sink: Optional[SessionSink] = None, on_conflict: str = 'newer',
+                    since: Optional[str] = None, until: Optional[str] = None, resume: bool = False,
+                    progress: Optional[ProgressCallback] = None, batch_size: int = BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Load sessions from an NDJSON export into a sink.
+
+    Args:
+        path: Export file (.ndjson or .ndjson.gz)
+        sink: Destination (default: DirectorySink() - the live sessions folder)
+        on_conflict: For sessions already stored: 'newer' (replace if the import
+            has a later updated_at), 'skip' or 'overwrite'
+        since, until: Only import sessions in this updated_at range
+        resume: Skip the lines an interrupted import of this file already applied
+        progress: Called with the running stats every batch_size lines
+        batch_size: Lines between checkpoints
+
+    Returns:
+        Stats: sessions (imported), skipped (existing or out of range), invalid
+        (unparseable lines, unsafe session ids or non-string updated_at), truncated (file ended mid-member), seconds, sessions_per_second
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"on_conflict must be one of {', '.join(CONFLICT_POLICIES)}")
+    sink = sink if sink is not None else DirectorySink()
+    checkpoint_path = path + IMPORT_CHECKPOINT_SUFFIX
+    skip_lines = 0
+    if resume and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, 'r') as f:
+            skip_lines = json.load(f).get('lines', 0)
+
+    started = time.perf_counter()
+    stats = {'sessions': 0, 'skipped': 0, 'invalid': 0, 'truncated': False, 'resumed_at_line': skip_lines}
+    line_no = 0
+
+    def checkpoint() -> None:
+        atomic_write_json(checkpoint_path, {'lines': line_no})
+        if progress is not None:
+            progress(_throughput(stats, started))
+
+    try:
+        try:
+            for line in read_sessions(path):
+                line_no += 1
+                if line_no <= skip_lines or not line.strip():
+                    continue
+                try:
+                    session = json.loads(line)
+                    session_id = session['id']
+                    # Ids become file names; anything else could write outside the folder
+                    if not isinstance(session_id, str) or not session_store.SESSION_ID_PATTERN.match(session_id):
+                        raise ValueError(f"Invalid session id: {session_id!r}")
+                    if not isinstance(session.get('updated_at', ''), str):
+                        raise ValueError(f"Invalid updated_at: {session['updated_at']!r}")
+                except (ValueError, KeyError, TypeError):
+                    stats['invalid'] += 1
+                    continue
+                existing = sink.updated_at(session_id) if on_conflict != 'overwrite' else None
+                if not in_date_range(session, since, until) or (existing is not None and (
+                        on_conflict == 'skip' or existing >= session.get('updated_at', ''))):
+                    stats['skipped'] += 1
+                else:
+                    sink.put(session)
+                    stats['sessions'] += 1
+                if line_no % batch_size == 0:
+                    checkpoint()
+        except EOFError:
+            # Export interrupted mid-batch without resume; everything before it was loaded
+            stats['truncated'] = True
+    finally:
+        sink.close()
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return _throughput(stats, started)
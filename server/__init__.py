@@ -0,0 +1,6 @@
+# Server - HTTP API over core/ and api/
+from .app import create_app
+
+__all__ = [
+    'create_app',
+]
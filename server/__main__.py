@@ -0,0 +1,39 @@
+"""
+Run the HTTP API server.
+
+Usage:
+    python -m server
+    python -m server --host 0.0.0.0 --port 8600
+
+Host, port and an optional bearer token come from the api_server section of
+config.yaml; command-line options override them.
+"""
+
+import argparse
+import logging
+
+from aiohttp import web
+
+from core import load_config, configure_revisions
+
+from .app import create_app
+
+
+def main() -> None:
+    config = load_config() or {}
+    server_config = config.get('api_server', {}) or {}
+
+    parser = argparse.ArgumentParser(prog='python -m server', description="DS Med Helper HTTP API")
+    parser.add_argument('--host', default=server_config.get('host', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=server_config.get('port', 8600))
+    args = parser.parse_args()
+    configure_revisions(config)
+
+    # Request and model routing logs
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    web.run_app(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
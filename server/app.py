@@ -0,0 +1,374 @@
+"""HTTP API Server
+
+JSON endpoints over the same api/ and core/ functions the Streamlit UI uses, so
+an EHR integration can call them directly:
+- POST /v1/transcribe    audio (multipart 'file' or raw body, relayed as a stream) -> transcript
+- POST /v1/scribe        transcript + template -> note
+- POST /v1/edit          note + instructions -> edited note
+- POST /v1/synthesize    source documents -> note (copy-forwarded paragraphs collapsed)
+- /v1/sessions[/{id}]    session list/search, create, read, update, delete
+                         (PATCH honours If-Match: <_version>, 409 on conflict)
+- GET /v1/templates, GET /metrics, GET /healthz
+
+Generation endpoints stream Server-Sent Events when the body has "stream": true
+or the request accepts text/event-stream. Passing "session_id" saves inputs and
+results to that session under the same fields as the UI. Session storage calls
+run in worker threads so file I/O does not stall other requests.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+from contextlib import aclosing
+from typing import Dict, Any, Optional
+
+from aiohttp import web
+
+from api import (
+    APIError, asr_transcribe, normalize_transcript, dedupe_sources, llm_stream_chat_completion, llm_streaming_chat_completion, note_generation_kwargs,
+    note_stop_reason, record_note_output,
+    close_client_session, format_note_writing_prompt, format_note_edit_prompt, format_note_synthesis_prompt
+)
+from core import (
+    load_templates, get_fallback_templates, create_session, list_session_metadata, get_session_by_id,
+    update_session, delete_session, search_sessions, SessionConflictError
+)
+from core.metrics import render_prometheus
+from core.session import SESSION_ID_PATTERN
+
+CONFIG_KEY = web.AppKey('config', dict)
+# Bytes per chunk when relaying a raw audio body to the ASR backend
+AUDIO_CHUNK_SIZE = 256 * 1024
+
+
+def _json_error(status: int, message: str) -> web.Response:
+    return web.json_response({'error': message}, status=status)
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    """Report errors as JSON bodies"""
+    try:
+        return await handler(request)
+    except web.HTTPException as e:
+        if e.status < 400:
+            raise
+        return _json_error(e.status, e.text or e.reason)
+    except APIError as e:
+        # Backend (LLM/ASR) failure
+        return _json_error(502, str(e))
+    except SessionConflictError as e:
+        return web.json_response({'error': str(e), 'fields': e.fields, 'current': e.current}, status=409)
+
+
+def auth_middleware(api_key: str):
+    """Require 'Authorization: Bearer <api_key>' on /v1 routes and /metrics (/healthz stays open for probes)"""
+    expected = f'Bearer {api_key}'.encode()
+
+    @web.middleware
+    async def middleware(request: web.Request, handler):
+        if request.path.startswith('/v1/') or request.path == '/metrics':
+            # Constant-time comparison, so response timing does not leak the key
+            if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected):
+                return _json_error(401, "Missing or invalid API key")
+        return await handler(request)
+    return middleware
+
+
+async def _read_json(request: web.Request) -> Dict[str, Any]:
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(text="Request body must be a JSON object")
+    return body
+
+
+def _require(body: Dict[str, Any], *fields: str) -> None:
+    missing = [f for f in fields if not str(body.get(f) or '').strip()]
+    if missing:
+        raise web.HTTPBadRequest(text=f"Missing required field(s): {', '.join(missing)}")
+
+
+def _require_text(body: Dict[str, Any], *fields: str) -> None:
+    """Text fields must be strings when given (null, numbers and objects are rejected)"""
+    invalid = [f for f in fields if f in body and not isinstance(body[f], str)]
+    if invalid:
+        raise web.HTTPBadRequest(text=f"Field(s) must be strings: {', '.join(invalid)}")
+
+
+def _check_session_id(session_id: str) -> str:
+    if not SESSION_ID_PATTERN.match(session_id):
+        raise web.HTTPBadRequest(text="Invalid session id")
+    return session_id
+
+
+async def _require_session(session_id: Optional[str]) -> Optional[str]:
+    """Validate an optional session_id from a request body"""
+    if not session_id:
+        return None
+    _check_session_id(str(session_id))
+    if await asyncio.to_thread(get_session_by_id, session_id) is None:
+        raise web.HTTPNotFound(text=f"Session {session_id} not found")
+    return session_id
+
+
+def _resolve_template(name: Optional[str]) -> Dict[str, Any]:
+    """Template by id or display name (first available if not given)"""
+    templates = load_templates() or get_fallback_templates()
+    if not templates:
+        raise web.HTTPInternalServerError(text="No templates available")
+    if not name:
+        return templates[0]
+    for template in templates:
+        if name in (template.get('id'), template['name']):
+            return template
+    raise web.HTTPBadRequest(text=f"Unknown template '{name}'")
+
+
+def _wants_stream(request: web.Request, body: Dict[str, Any]) -> bool:
+    return bool(body.get('stream')) or 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> bytes:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n".encode()
+
+
+async def _generate(request: web.Request, body: Dict[str, Any], task: str, prompt: str, session_id: Optional[str],
+                    result_field: str, inputs: Dict[str, Any], template: Dict[str, Any],
+                    reproduced_text: str = "") -> web.StreamResponse:
+    """Run a completion, save it to the session and respond as JSON or SSE"""
+    llm_kwargs = await asyncio.to_thread(
+        note_generation_kwargs, request.app[CONFIG_KEY].get('llm', {}), template, task, prompt, reproduced_text
+    )
+
+    async def save(text: str) -> Optional[str]:
+        if session_id:
+            await asyncio.to_thread(update_session, session_id, {**inputs, result_field: text})
+        stop_reason = note_stop_reason(llm_kwargs)
+        if stop_reason is None:
+            await asyncio.to_thread(record_note_output, template, text, llm_kwargs['stream_state'].usage)
+        return stop_reason
+
+    if not _wants_stream(request, body):
+        text = "".join(await llm_streaming_chat_completion(prompt, **llm_kwargs))
+        stop_reason = await save(text)
+        return web.json_response({'text': text, 'session_id': session_id, 'stop_reason': stop_reason, 'route': llm_kwargs['route']})
+
+    response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+    await response.prepare(request)
+    chunks = []
+    try:
+        # aclosing() closes the upstream stream promptly if the client disconnects
+        async with aclosing(llm_stream_chat_completion(prompt, **llm_kwargs)) as stream:
+            async for chunk in stream:
+                chunks.append(chunk)
+                await response.write(_sse({'delta': chunk}))
+    except APIError as e:
+        await response.write(_sse({'error': str(e)}, event='error'))
+        return response
+
+    text = "".join(chunks)
+    stop_reason = await save(text)
+    await response.write(_sse(
+        {'text': text, 'session_id': session_id, 'stop_reason': stop_reason, 'route': llm_kwargs['route']}, event='done'
+    ))
+    await response.write_eof()
+    return response
+
+
+# Generation
+
+async def handle_transcribe(request: web.Request) -> web.Response:
+    session_id = request.query.get('session_id')
+    # Audio is passed on to the ASR backend as a stream, never read into memory whole
+    if request.content_type.startswith('multipart/'):
+        # aiohttp spools uploaded files to a temporary file
+        form = await request.post()
+        upload = form.get('file')
+        if not isinstance(upload, web.FileField):
+            raise web.HTTPBadRequest(text="Multipart request needs a 'file' field")
+        audio = upload.file
+        if not audio.seek(0, os.SEEK_END):
+            raise web.HTTPBadRequest(text="No audio in request")
+        audio.seek(0)
+        session_id = form.get('session_id') or session_id
+    else:
+        if not request.body_exists or request.content_length == 0:
+            raise web.HTTPBadRequest(text="No audio in request")
+        audio = request.content.iter_chunked(AUDIO_CHUNK_SIZE)
+    session_id = await _require_session(session_id)
+
+    config_stt = request.app[CONFIG_KEY].get('stt', {})
+    raw_text = await asr_transcribe(
+        audio,
+        config_stt.get('endpoint', ''),
+        config_stt.get('model', 'google/medasr'),
+        config_stt.get('api_key', '')
+    )
+    text, normalization = normalize_transcript(raw_text, config_stt.get('normalize'))
+    if session_id:
+        await asyncio.to_thread(update_session, session_id, {
+            'scribe_transcript': text, 'scribe_transcript_raw': raw_text, 'scribe_normalization': normalization
+        })
+    return web.json_response({'text': text, 'raw_text': raw_text, 'normalization': normalization, 'session_id': session_id})
+
+
+async def handle_scribe(request: web.Request) -> web.StreamResponse:
+    body = await _read_json(request)
+    _require_text(body, 'transcript', 'context', 'template')
+    _require(body, 'transcript')
+    session_id = await _require_session(body.get('session_id'))
+    template = await asyncio.to_thread(_resolve_template, body.get('template'))
+    context = body.get('context', '')
+
+    prompt = format_note_writing_prompt(body['transcript'].strip(), template['system_prompt'], context.strip())
+    inputs = {'scribe_transcript': body['transcript'], 'scribe_context': context, 'scribe_template': template['name']}
+    return await _generate(request, body, 'scribe', prompt, session_id, 'scribe_note', inputs, template)
+
+
+async def handle_edit(request: web.Request) -> web.StreamResponse:
+    body = await _read_json(request)
+    _require_text(body, 'note', 'instructions', 'template')
+    _require(body, 'note', 'instructions')
+    session_id = await _require_session(body.get('session_id'))
+    template = await asyncio.to_thread(_resolve_template, body.get('template'))
+
+    prompt = format_note_edit_prompt(body['note'].strip(), body['instructions'].strip(), template['system_prompt'])
+    inputs = {'edit_original': body['note'], 'edit_instructions': body['instructions']}
+    return await _generate(request, body, 'edit', prompt, session_id, 'edit_result', inputs, template, body['note'])
+
+
+async def handle_synthesize(request: web.Request) -> web.StreamResponse:
+    body = await _read_json(request)
+    _require_text(body, 'instructions', 'hp', 'consults', 'studies', 'progress', 'template')
+    _require(body, 'instructions')
+    sources = {field: body.get(field, '') for field in ('hp', 'consults', 'studies', 'progress')}
+    if not any(s.strip() for s in sources.values()):
+        raise web.HTTPBadRequest(text="At least one of hp, consults, studies, progress is required")
+    session_id = await _require_session(body.get('session_id'))
+    template = await asyncio.to_thread(_resolve_template, body.get('template'))
+
+    # Copy-forward de-duplication (synthesize.dedup, overridable per request with "dedup")
+    config_synthesize = request.app[CONFIG_KEY].get('synthesize', {}) or {}
+    prompt_sources = {field: text.strip() for field, text in sources.items()}
+    if body.get('dedup', config_synthesize.get('dedup', True)):
+        prompt_sources, _ = await asyncio.to_thread(dedupe_sources, prompt_sources, config_synthesize.get('dedup_threshold'))
+    prompt = format_note_synthesis_prompt(
+        instructions=body['instructions'].strip(),
+        template_prompt=template['system_prompt'],
+        **prompt_sources
+    )
+    inputs = {'synthesize_instructions': body['instructions'], **{f'synthesize_{f}': t for f, t in sources.items()}}
+    return await _generate(request, body, 'synthesize', prompt, session_id, 'synthesize_result', inputs, template,
+                           prompt_sources['hp'])
+
+
+# Sessions
+
+async def handle_list_sessions(request: web.Request) -> web.Response:
+    try:
+        limit = int(request.query.get('limit', 50))
+        offset = int(request.query.get('offset', 0))
+    except ValueError:
+        raise web.HTTPBadRequest(text="limit and offset must be integers")
+    query = request.query.get('q', '').strip()
+    if query:
+        results = await asyncio.to_thread(search_sessions, query, limit)
+        return web.json_response({'sessions': results})
+    sessions = await asyncio.to_thread(list_session_metadata)
+    return web.json_response({'sessions': sessions[offset:offset + limit], 'total': len(sessions)})
+
+
+async def handle_create_session(request: web.Request) -> web.Response:
+    fields = await _read_json(request) if request.can_read_body else {}
+    session = await asyncio.to_thread(create_session)
+    if fields:
+        await asyncio.to_thread(update_session, session['id'], fields)
+        session = await asyncio.to_thread(get_session_by_id, session['id'])
+    return web.json_response(session, status=201)
+
+
+async def handle_get_session(request: web.Request) -> web.Response:
+    session_id = _check_session_id(request.match_info['session_id'])
+    session = await asyncio.to_thread(get_session_by_id, session_id)
+    if session is None:
+        raise web.HTTPNotFound(text=f"Session {session_id} not found")
+    return web.json_response(session)
+
+
+async def handle_update_session(request: web.Request) -> web.Response:
+    session_id = await _require_session(_check_session_id(request.match_info['session_id']))
+    fields = await _read_json(request)
+    expected_version = None
+    if 'If-Match' in request.headers:
+        try:
+            expected_version = int(request.headers['If-Match'].strip('"W/'))
+        except ValueError:
+            raise web.HTTPBadRequest(text="If-Match must be a session _version")
+    await asyncio.to_thread(update_session, session_id, fields, expected_version)
+    return web.json_response(await asyncio.to_thread(get_session_by_id, session_id))
+
+
+async def handle_delete_session(request: web.Request) -> web.Response:
+    session_id = await _require_session(_check_session_id(request.match_info['session_id']))
+    await asyncio.to_thread(delete_session, session_id)
+    return web.Response(status=204)
+
+
+# Misc
+
+async def handle_templates(request: web.Request) -> web.Response:
+    templates = await asyncio.to_thread(lambda: load_templates() or get_fallback_templates())
+    return web.json_response({'templates': [{'id': t.get('id'), 'name': t['name']} for t in templates]})
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render_prometheus(), content_type='text/plain')
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    return web.json_response({'status': 'ok'})
+
+
+async def _close_client_session(app: web.Application) -> None:
+    await close_client_session()
+
+
+def create_app(config: dict) -> web.Application:
+    """
+    Build the API server application.
+
+    Args:
+        config: Application configuration (uses the `llm`, `stt` and `api_server` sections)
+
+    Returns:
+        aiohttp Application
+    """
+    server_config = config.get('api_server', {}) or {}
+    middlewares = [error_middleware]
+    if server_config.get('api_key'):
+        middlewares.append(auth_middleware(server_config['api_key']))
+
+    app = web.Application(middlewares=middlewares, client_max_size=server_config.get('max_upload_mb', 200) * 1024 ** 2)
+    app[CONFIG_KEY] = config
+    app.add_routes([
+        web.post('/v1/transcribe', handle_transcribe),
+        web.post('/v1/scribe', handle_scribe),
+        web.post('/v1/edit', handle_edit),
+        web.post('/v1/synthesize', handle_synthesize),
+        web.get('/v1/sessions', handle_list_sessions),
+        web.post('/v1/sessions', handle_create_session),
+        web.get('/v1/sessions/{session_id}', handle_get_session),
+        web.patch('/v1/sessions/{session_id}', handle_update_session),
+        web.delete('/v1/sessions/{session_id}', handle_delete_session),
+        web.get('/v1/templates', handle_templates),
+        web.get('/metrics', handle_metrics),
+        web.get('/healthz', handle_health),
+    ])
+    # Connection pool to the LLM/ASR backends is shared by all requests
+    app.on_cleanup.append(_close_client_session)
+    return app
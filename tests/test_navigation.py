@@ -0,0 +1,48 @@
+"""Mode switching: widget values of hidden modes must survive"""
+
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.run()
+    return at
+
+
+def switch_mode(at, mode):
+    at.radio(key='active_mode').set_value(mode).run()
+
+
+def test_inputs_survive_mode_switch(app):
+    app.text_area(key='transcript_edit').input('patient has a cough').run()
+    switch_mode(app, 'edit')
+    app.text_area(key='edit_instr').input('shorten').run()
+    switch_mode(app, 'synthesize')
+    switch_mode(app, 'scribe')
+    assert app.text_area(key='transcript_edit').value == 'patient has a cough'
+    switch_mode(app, 'edit')
+    assert app.text_area(key='edit_instr').value == 'shorten'
+
+
+@pytest.mark.parametrize('mode', ['scribe', 'edit', 'synthesize'])
+def test_candidate_count_survives_mode_switch(app, mode):
+    switch_mode(app, mode)
+    app.number_input(key=f'{mode}_candidate_count').set_value(3).run()
+    switch_mode(app, 'sessions')
+    switch_mode(app, mode)
+    assert app.number_input(key=f'{mode}_candidate_count').value == 3
+
+
+def test_dedup_toggle_survives_mode_switch(app):
+    switch_mode(app, 'synthesize')
+    app.toggle(key='synthesize_dedup').set_value(False).run()
+    switch_mode(app, 'scribe')
+    switch_mode(app, 'synthesize')
+    assert app.toggle(key='synthesize_dedup').value is False
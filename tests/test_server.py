@@ -0,0 +1,47 @@
+"""API server request validation"""
+
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from server.app import create_app
+
+
+def post(path, body):
+    async def request():
+        async with TestClient(TestServer(create_app({}))) as client:
+            resp = await client.post(path, json=body)
+            return resp.status, await resp.json()
+    return asyncio.run(request())
+
+
+@pytest.fixture(autouse=True)
+def sessions_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize('path, body, field', [
+    ('/v1/scribe', {'transcript': 'cough', 'context': None}, 'context'),
+    ('/v1/scribe', {'transcript': 42}, 'transcript'),
+    ('/v1/scribe', {'transcript': ['cough']}, 'transcript'),
+    ('/v1/scribe', {'transcript': 'cough', 'template': {'name': 'x'}}, 'template'),
+    ('/v1/edit', {'note': 'note', 'instructions': None}, 'instructions'),
+    ('/v1/edit', {'note': {'text': 'note'}, 'instructions': 'shorten'}, 'note'),
+    ('/v1/synthesize', {'instructions': 'summarize', 'hp': None, 'progress': 'day 2'}, 'hp'),
+    ('/v1/synthesize', {'instructions': 'summarize', 'consults': 3}, 'consults'),
+])
+def test_non_string_fields_are_rejected(path, body, field):
+    status, payload = post(path, body)
+    assert status == 400
+    assert field in payload['error']
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/v1/scribe', {'transcript': '   '}),
+    ('/v1/edit', {'note': 'note'}),
+    ('/v1/synthesize', {'instructions': 'summarize'}),
+])
+def test_missing_fields_are_rejected(path, body):
+    status, _ = post(path, body)
+    assert status == 400
@@ -0,0 +1,48 @@
+"""Transcript normalization: clinical content must survive filler and repeat removal"""
+
+import pytest
+
+from api.transcript import normalize_transcript
+
+
+def normalize(text, **options):
+    return normalize_transcript(text, options)[0]
+
+
+@pytest.mark.parametrize('text', [
+    "history of AH (alcoholic hepatitis)",
+    "vision is HM in the left eye",
+    "UM is not a filler when capitalised",
+])
+def test_all_caps_tokens_are_not_fillers(text):
+    assert normalize(text) == text
+
+
+def test_fillers_are_dropped():
+    assert normalize("um the patient uh reports hmm chest pain") == "the patient reports chest pain"
+
+
+@pytest.mark.parametrize('text', [
+    "Pupils 3 3 3 mm",
+    "strength 5 5 5 5 in all extremities",
+    "strength five five five five",
+    "blood pressure 120/80 120/80 120/80",
+])
+def test_repeated_numbers_are_kept(text):
+    assert normalize(text) == text
+
+
+def test_repeat_keeps_first_copy_casing():
+    assert normalize("No no no chest pain") == "No chest pain"
+
+
+def test_repeat_keeps_last_copy_punctuation():
+    assert normalize("She denies fever fever fever.") == "She denies fever."
+
+
+def test_phrase_loop_collapses():
+    assert normalize("thank you thank you thank you for coming") == "thank you for coming"
+
+
+def test_two_copies_are_kept():
+    assert normalize("the the patient") == "the the patient"
@@ -5,6 +5,9 @@ from .synthesize import render_synthesize_mode
 from .settings import render_settings
 from .session_manager import render_session_manager
 from .session_picker import render_session_picker
+from .profiler_panel import render_profiler_panel
+from .navigation import render_mode_router
+from .autosave import autosave, save_fields, track_session_version, render_autosave_conflict
 
 __all__ = [
     'render_scribe_mode',
@@ -13,4 +16,10 @@ __all__ = [
     'render_settings',
     'render_session_manager',
     'render_session_picker',
+    'render_profiler_panel',
+    'render_mode_router',
+    'autosave',
+    'save_fields',
+    'track_session_version',
+    'render_autosave_conflict',
 ]
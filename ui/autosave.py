@@ -0,0 +1,94 @@
+"""Autosave UI Helper
+
+Saves text areas to the session with optimistic concurrency. Each browser
+remembers, per session field, the session version its copy is based on; a
+save only fails if another tab or app process changed that same field since.
+Conflicts are shown as a banner offering to keep this tab's text or load theirs.
+The tab's own unconditional writes (transcription, Clear All, ...) go through
+save_fields() so they move the baselines of the fields they wrote.
+"""
+
+from typing import Optional
+
+import streamlit as st
+
+from core import update_session, SessionConflictError
+
+
+def _baselines(session_id: str) -> dict:
+    return st.session_state.setdefault('autosave_versions', {}).setdefault(session_id, {})
+
+
+def track_session_version(session: Optional[dict]) -> None:
+    """Record the version a session was first loaded at in this browser (call once per rerun)"""
+    if session:
+        _baselines(session['id']).setdefault('_loaded', session.get('_version', 0))
+
+
+def save_fields(session_id: str, updates: dict) -> Optional[int]:
+    """
+    Write fields unconditionally (this tab's own change, e.g. a transcription or
+    Clear All) and base this tab's later autosaves of them on the new version.
+
+    Returns:
+        The new _version, or None if the session does not exist
+    """
+    version = update_session(session_id, updates)
+    if version is not None:
+        baselines = _baselines(session_id)
+        for field in updates:
+            baselines[field] = version
+    return version
+
+
+def autosave(session_id: str, field: str, state_key: str) -> bool:
+    """
+    Save st.session_state[state_key] to the session field (use from on_change callbacks).
+
+    Returns:
+        False if another writer changed the field first (a conflict banner is queued)
+    """
+    baselines = _baselines(session_id)
+    value = st.session_state.get(state_key)
+    try:
+        version = update_session(session_id, {field: value}, expected_version=baselines.get(field, baselines.get('_loaded')))
+    except SessionConflictError as e:
+        st.session_state['autosave_conflict'] = {
+            'session_id': session_id,
+            'field': field,
+            'state_key': state_key,
+            'theirs': e.current.get(field, ''),
+            'version': e.current.get('_version', 0),
+        }
+        return False
+    if version is not None:
+        baselines[field] = version
+    return True
+
+
+def _keep_mine() -> None:
+    conflict = st.session_state.pop('autosave_conflict')
+    save_fields(conflict['session_id'], {conflict['field']: st.session_state.get(conflict['state_key'])})
+
+
+def _load_theirs() -> None:
+    conflict = st.session_state.pop('autosave_conflict')
+    st.session_state[conflict['state_key']] = conflict['theirs']
+    _baselines(conflict['session_id'])[conflict['field']] = conflict['version']
+
+
+def render_autosave_conflict() -> None:
+    """Show the pending save conflict, if any, with options to resolve it"""
+    conflict = st.session_state.get('autosave_conflict')
+    if not conflict:
+        return
+
+    field_label = conflict['field'].replace('_', ' ').capitalize()
+    st.warning(f"**{field_label}** was changed in another tab or window since you opened it. Your edit has not been saved.")
+    with st.expander("Their version"):
+        st.code(conflict['theirs'] or "(empty)", language=None)
+    col_mine, col_theirs, _ = st.columns([1, 1, 4])
+    with col_mine:
+        st.button("Keep mine", key="autosave_keep_mine", on_click=_keep_mine)
+    with col_theirs:
+        st.button("Load theirs", key="autosave_load_theirs", on_click=_load_theirs)
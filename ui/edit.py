@@ -2,10 +2,16 @@
 
 import streamlit as st
 
-from api import llm_streaming_chat_completion, format_note_edit_prompt, run_async
-from core import load_templates, get_fallback_templates, update_session
+from api import format_note_edit_prompt
+from core import load_templates, get_fallback_templates
+from core.profiler import profiled
 
+from .autosave import autosave, save_fields
+from .generation import clear_generation, candidate_count_input, start_note_generation, render_generation, warm_note_prompt
+from .history import render_note_history
 
+
+@profiled('ui')
 def render_edit_mode(config: dict, session: dict) -> None:
     """Render the Note Edit Mode interface
     
@@ -38,11 +44,13 @@ def render_edit_mode(config: dict, session: dict) -> None:
                     st.session_state['original_note_area'] = ''
                     st.session_state['edit_instr'] = ''
                     st.session_state['edit_result'] = ''
-                    # Clear in persistent storage
-                    update_session(session['id'], {
+                    # Stop a running generation and clear in persistent storage
+                    clear_generation(session['id'], 'edit')
+                    save_fields(session['id'], {
                         'edit_original': '',
                         'edit_instructions': '',
-                        'edit_result': ''
+                        'edit_result': '',
+                        'edit_result_partial': None
                     })
                     st.session_state['edit_show_clear_confirm'] = False
                     st.rerun()
@@ -62,7 +70,10 @@ def render_edit_mode(config: dict, session: dict) -> None:
     st.divider()
     
     # Get templates - first try loading from folder, fall back to config
-    templates = load_templates()
+    template_errors = []
+    templates = load_templates(template_errors)
+    for message in template_errors:
+        st.warning(message)
     if not templates:
         templates = get_fallback_templates()
     
@@ -73,9 +84,20 @@ def render_edit_mode(config: dict, session: dict) -> None:
     with col1:
         st.subheader("Original Note")
         
+        # Prefill the LLM prompt cache as the inputs settle (llm.prefill_warmup)
+        def warm_up():
+            template = template_options.get(st.session_state.get('edit_template'))
+            note_text = st.session_state.get('original_note_area', '').strip()
+            if template and note_text:
+                prompt = format_note_edit_prompt(
+                    note_text, st.session_state.get('edit_instr', '').strip(), template['system_prompt']
+                )
+                warm_note_prompt(session['id'], 'edit', prompt, config.get('llm', {}))
+        
         # Auto-save original note
         def save_original_note():
-            update_session(session['id'], {'edit_original': st.session_state.original_note_area})
+            autosave(session['id'], 'edit_original', 'original_note_area')
+            warm_up()
         
         original_note = st.text_area(
             "Paste your clinical note here",
@@ -89,7 +111,8 @@ def render_edit_mode(config: dict, session: dict) -> None:
         
         # Auto-save instructions
         def save_instructions():
-            update_session(session['id'], {'edit_instructions': st.session_state.edit_instr})
+            autosave(session['id'], 'edit_instructions', 'edit_instr')
+            warm_up()
         
         instructions = st.text_area(
             "Describe what changes you want",
@@ -104,8 +127,10 @@ def render_edit_mode(config: dict, session: dict) -> None:
             "Select note template",
             options=list(template_options.keys()),
             index=0,
-            key="edit_template"
+            key="edit_template",
+            on_change=warm_up
         )
+        candidates = candidate_count_input('edit')
         
         can_edit = original_note and instructions
         if st.button("Generate Edited Note", type="primary", key="generate_edit_btn", icon="📝", disabled=not can_edit):
@@ -115,31 +140,14 @@ def render_edit_mode(config: dict, session: dict) -> None:
                 
                 prompt = format_note_edit_prompt(original_note.strip(), instructions.strip(), template['system_prompt'])
                 
-                with st.spinner("Editing note..."):
-                    chunks = run_async(llm_streaming_chat_completion(
-                        prompt=prompt,
-                        system_prompt=config_llm.get('system_prompt', ''),
-                        endpoint=config_llm.get('endpoint', ''),
-                        model=config_llm.get('model', ''),
-                        api_key=config_llm.get('api_key', ''),
-                        max_tokens=config_llm.get('max_tokens', -1),
-                        temperature=config_llm.get('temperature', 0.8),
-                        top_k=config_llm.get('top_k', 40),
-                        top_p=config_llm.get('top_p', 0.95),
-                        min_p=config_llm.get('min_p', 0.05),
-                        extra_api_params=config_llm.get('extra_api_params')
-                    ))
-                    
-                    edited_output = "".join(chunks)
-                    
-                    if edited_output:
-                        update_session(session['id'], {
-                            'edit_result': edited_output
-                        })
-                        st.session_state['edit_result'] = edited_output
-                        st.success("Edit complete!")
+                start_note_generation(session['id'], 'edit', prompt, config_llm, 'edit_result',
+                                      template, reproduced_text=original_note, candidates=candidates)
+    
+    # Progress of a running generation, or the outcome of the last one
+    render_generation(session, 'edit', 'edit_result', "Edit complete!", config.get('llm', {}))
     
     # Show edited note if it exists in session state
     if st.session_state.get('edit_result'):
         st.subheader("Edited Note")
         st.code(st.session_state['edit_result'], language=None)
+        render_note_history(session['id'], 'edit_result', st.session_state['edit_result'])
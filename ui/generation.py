@@ -0,0 +1,211 @@
+"""Generation Progress UI Component
+
+Note generations run in the background (see api/generation.py). While one is
+running, a fragment polls it so only that part of the page reruns: it shows
+the partial note and a Cancel button. When the generation finishes the whole
+app reruns once to show the result. With several candidates they stream side
+by side, and the first is saved until another one is picked.
+
+Streamed text is checkpointed to the session field <result_field>_partial. If a
+generation breaks off (backend dropped, app restarted), the next render offers
+to continue from the checkpoint instead of starting over. Cancelling, or
+clearing the mode's fields, drops the checkpoint.
+"""
+
+import time
+from datetime import datetime
+
+import streamlit as st
+
+from api import (
+    start_generation, get_generation, cancel_generation, pop_finished_generation,
+    note_generation_kwargs, note_stop_reason, record_note_output, warmup_kwargs, schedule_warmup, use_warmup
+)
+from core import update_session
+
+POLL_SECONDS = 0.5
+MAX_CANDIDATES = 4
+
+
+def candidate_count_input(mode: str) -> int:
+    """Number input for how many candidate notes to generate"""
+    return st.number_input(
+        "Candidates",
+        min_value=1,
+        max_value=MAX_CANDIDATES,
+        value=1,
+        key=f"{mode}_candidate_count",
+        help="Generate several alternative notes at once and pick one"
+    )
+
+
+def warm_note_prompt(session_id: str, mode: str, prompt: str, config_llm: dict) -> None:
+    """Warm the LLM server's prompt cache for the note these inputs would produce (if llm.prefill_warmup)"""
+    if config_llm.get('prefill_warmup'):
+        schedule_warmup((session_id, mode), prompt, warmup_kwargs(config_llm, mode, prompt))
+
+
+def start_note_generation(session_id: str, mode: str, prompt: str, config_llm: dict, result_field: str,
+                          template: dict, reproduced_text: str = "", candidates: int = 1,
+                          continue_from: str = "") -> None:
+    """
+    Start (or restart) the generation for a session and mode; the result is saved to result_field.
+    The model is routed by mode and prompt size (see api/routing.py); the output
+    budget comes from the template and reproduced_text (see api/budget.py).
+    Candidates are requested as configured by llm.candidates_mode (parallel or n).
+    continue_from resumes a partial note (sent as an assistant prefill).
+    """
+    st.session_state.pop(f"candidates_{mode}", None)
+    llm_kwargs = note_generation_kwargs(config_llm, template, mode, prompt, reproduced_text)
+    if continue_from:
+        llm_kwargs['assistant_prefix'] = continue_from
+    elif config_llm.get('prefill_warmup'):
+        use_warmup((session_id, mode), prompt, llm_kwargs)
+    partial_field = f"{result_field}_partial"
+    candidates = 1 if continue_from else candidates
+    candidates_mode = config_llm.get('candidates_mode', 'parallel')
+    # With the n parameter the reported usage sums all candidates, so the note is estimated instead
+    shared_usage = candidates > 1 and candidates_mode == 'n'
+    generation = None
+
+    # A cancelled generation's last checkpoint or save may already be in a worker thread
+    def checkpoint(text: str) -> None:
+        if generation is not None and generation.cancel_requested:
+            return
+        update_session(session_id, {partial_field: {
+            'text': text,
+            'prompt': prompt,
+            'template': template,
+            'saved_at': datetime.now().isoformat(),
+        }})
+
+    def save(text: str) -> None:
+        if generation is not None and generation.cancel_requested:
+            return
+        update_session(session_id, {result_field: text, partial_field: None})
+        if note_stop_reason(llm_kwargs) is None:
+            record_note_output(template, text, None if shared_usage else llm_kwargs['stream_state'].usage)
+
+    generation = start_generation(
+        (session_id, mode), prompt, llm_kwargs, on_complete=save, on_checkpoint=checkpoint,
+        candidates=candidates, candidates_mode=candidates_mode
+    )
+
+
+def clear_generation(session_id: str, mode: str) -> None:
+    """Cancel and forget the session's generation for a mode (when its fields are cleared)"""
+    cancel_generation((session_id, mode))
+    pop_finished_generation((session_id, mode))
+    st.session_state.pop(f"candidates_{mode}", None)
+
+
+def _cancel(key: tuple, partial_field: str) -> None:
+    # A cancelled note is not offered for continuing
+    cancel_generation(key)
+    update_session(key[0], {partial_field: None})
+
+
+@st.fragment(run_every=POLL_SECONDS)
+def _render_running(key: tuple, partial_field: str) -> None:
+    generation = get_generation(key)
+    if generation is None:
+        return
+    if not generation.running:
+        st.rerun(scope="app")
+
+    col_status, col_cancel = st.columns([6, 1])
+    with col_status:
+        st.caption(f"Generating... {time.time() - generation.started_at:.0f}s, {len(generation.chunks)} chunks")
+    with col_cancel:
+        st.button("Cancel", key=f"cancel_generation_{key[1]}", icon="⏹️", on_click=_cancel, args=(key, partial_field))
+    texts = generation.candidate_texts
+    if len(texts) > 1:
+        for i, (column, text) in enumerate(zip(st.columns(len(texts)), texts)):
+            with column:
+                st.caption(f"Candidate {i + 1}")
+                st.code(text, language=None)
+    elif generation.chunks:
+        st.code(generation.text, language=None)
+
+
+def _use_candidate(session_id: str, mode: str, state_key: str, text: str) -> None:
+    st.session_state[state_key] = text
+    st.session_state.pop(f"candidates_{mode}", None)
+    update_session(session_id, {state_key: text})
+
+
+def _render_candidates(session_id: str, mode: str, state_key: str) -> None:
+    candidates = st.session_state.get(f"candidates_{mode}")
+    if not candidates or candidates['session_id'] != session_id:
+        return
+    texts = candidates['texts']
+    st.caption(f"{len(texts)} candidates - candidate 1 is saved until you pick another")
+    for i, (column, text) in enumerate(zip(st.columns(len(texts)), texts)):
+        with column:
+            st.button(
+                f"Use candidate {i + 1}",
+                key=f"use_candidate_{mode}_{i}",
+                disabled=not text,
+                on_click=_use_candidate,
+                args=(session_id, mode, state_key, text)
+            )
+            st.code(text or "(no text)", language=None)
+
+
+def _render_partial(session: dict, mode: str, state_key: str, config_llm: dict) -> None:
+    partial_field = f"{state_key}_partial"
+    partial = session.get(partial_field)
+    if not partial or not partial.get('text'):
+        return
+
+    def resume() -> None:
+        start_note_generation(session['id'], mode, partial['prompt'], config_llm, state_key,
+                              partial['template'], continue_from=partial['text'])
+
+    def discard() -> None:
+        update_session(session['id'], {partial_field: None})
+
+    st.warning(f"A previous generation stopped after {len(partial['text'])} characters.")
+    with st.expander("Partial note"):
+        st.code(partial['text'], language=None)
+    col_continue, col_discard, _ = st.columns([1, 1, 4])
+    with col_continue:
+        st.button("Continue", key=f"continue_generation_{mode}", icon="▶️", on_click=resume)
+    with col_discard:
+        st.button("Discard", key=f"discard_partial_{mode}", on_click=discard)
+
+
+def render_generation(session: dict, mode: str, state_key: str, success_message: str, config_llm: dict) -> None:
+    """
+    Render the progress or outcome of the session's generation for a mode.
+    A successful result is copied into st.session_state[state_key]; a picked
+    candidate is also saved to the session field of the same name. A partial
+    note left by an interrupted generation is offered for continuing.
+    """
+    session_id = session['id']
+    key = (session_id, mode)
+    generation = pop_finished_generation(key)
+    if generation is not None:
+        if generation.status == 'done' and generation.chunks:
+            st.session_state[state_key] = generation.text
+            texts = generation.candidate_texts
+            if len(texts) > 1:
+                st.session_state[f"candidates_{mode}"] = {'session_id': session_id, 'texts': texts}
+            if generation.stop_reason == 'repetition':
+                st.warning("Stopped early: the model started repeating itself. Review the end of the note.")
+            elif generation.stop_reason == 'length':
+                st.warning("Stopped at the output limit; the note may be incomplete. Review the end of the note.")
+            else:
+                st.success(success_message)
+        elif generation.status == 'done':
+            st.warning("The model returned no text")
+        elif generation.status == 'cancelled':
+            st.info("Generation cancelled")
+        else:
+            st.error(generation.error)
+
+    if get_generation(key) is not None:
+        _render_running(key, f"{state_key}_partial")
+    else:
+        _render_candidates(session_id, mode, state_key)
+        _render_partial(session, mode, state_key, config_llm)
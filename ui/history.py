@@ -0,0 +1,63 @@
+"""Note History UI Component
+
+Lists the earlier versions of a note field kept in the session's revision
+log (see core/revisions.py), shows any of them in full or as a diff against
+the current note, and restores one as the current note.
+"""
+
+import difflib
+
+import streamlit as st
+
+from core import list_revisions, get_revision, update_session
+
+
+def _label(revision: dict, current: bool) -> str:
+    at = (revision['at'] or '')[:16].replace('T', ' ') or "earlier"
+    return f"#{revision['n']} - {at} - {revision['chars']:,} chars" + (" (current)" if current else "")
+
+
+def _restore(session_id: str, field: str, text: str) -> None:
+    st.session_state[field] = text
+    update_session(session_id, {field: text})
+
+
+def render_note_history(session_id: str, field: str, current_text: str) -> None:
+    """Render the revision history of a note field below the note"""
+    revisions = list_revisions(session_id, field)
+    if len(revisions) < 2:
+        return
+
+    with st.expander(f"🕘 History ({len(revisions)} versions)"):
+        labels = {r['n']: _label(r, i == 0) for i, r in enumerate(revisions)}
+        number = st.selectbox(
+            "Version",
+            options=list(labels),
+            index=1,
+            format_func=labels.get,
+            # A new version resets the choice to the one before it
+            key=f"history_{field}_version_{revisions[0]['n']}"
+        )
+        text = get_revision(session_id, field, number)
+        if text is None:
+            st.info("This version is no longer available.")
+            return
+
+        show_diff = st.toggle("Show changes against the current note", key=f"history_{field}_diff")
+        if show_diff:
+            diff = difflib.unified_diff(
+                text.splitlines(), current_text.splitlines(),
+                fromfile=f"version {number}", tofile="current", lineterm=""
+            )
+            st.code('\n'.join(diff) or "(identical)", language="diff")
+        else:
+            st.code(text, language=None)
+
+        st.button(
+            "Restore this version",
+            key=f"history_{field}_restore",
+            icon="↩️",
+            disabled=text == current_text,
+            on_click=_restore,
+            args=(session_id, field, text)
+        )
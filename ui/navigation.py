@@ -0,0 +1,66 @@
+"""Mode Navigation UI Component
+
+Only the active mode's render function runs on each rerun. Streamlit drops the
+state of widgets that were not rendered in the previous run, so the widget keys
+of every mode are re-committed at the start of each rerun to survive switching.
+"""
+
+import streamlit as st
+
+# Mode id -> navigation label
+MODES = {
+    'scribe': "📝 Scribe",
+    'edit': "✏️ Edit",
+    'synthesize': "📋 Synthesize",
+    'sessions': "📚 Sessions",
+    'settings': "⚙️ Settings",
+}
+DEFAULT_MODE = 'scribe'
+
+# Widget keys whose values must survive while their mode is not rendered
+PERSISTENT_WIDGET_KEYS = (
+    'transcript_edit', 'scribe_context_input', 'scribe_template',
+    'original_note_area', 'edit_instr', 'edit_template',
+    'synthesize_instructions', 'synthesize_hp', 'synthesize_consults', 'synthesize_studies',
+    'synthesize_progress', 'synthesize_template', 'synthesize_dedup',
+    'scribe_candidate_count', 'edit_candidate_count', 'synthesize_candidate_count',
+    'session_search_query', 'archive_search_query',
+    'session_manager_sort', 'session_manager_page_size', 'session_manager_page',
+)
+PERSISTENT_WIDGET_PREFIXES = ('settings_',)
+
+
+def preserve_widget_state() -> None:
+    """Re-commit widget values so Streamlit keeps them while their mode is hidden"""
+    for key in list(st.session_state.keys()):
+        if key in PERSISTENT_WIDGET_KEYS or key.startswith(PERSISTENT_WIDGET_PREFIXES):
+            st.session_state[key] = st.session_state[key]
+
+
+def render_mode_router() -> str:
+    """
+    Render the mode selector and return the active mode id.
+    The active mode is mirrored to the URL (?mode=...) so reloads and bookmarks keep it.
+
+    Returns:
+        One of the MODES keys
+    """
+    preserve_widget_state()
+
+    if 'active_mode' not in st.session_state:
+        url_mode = st.query_params.get('mode')
+        st.session_state['active_mode'] = url_mode if url_mode in MODES else DEFAULT_MODE
+
+    mode = st.radio(
+        "Mode",
+        options=list(MODES.keys()),
+        format_func=lambda m: MODES[m],
+        horizontal=True,
+        key="active_mode",
+        label_visibility="collapsed"
+    )
+
+    if st.query_params.get('mode') != mode:
+        st.query_params['mode'] = mode
+
+    return mode
@@ -0,0 +1,49 @@
+"""Profiler Panel UI Component"""
+
+import os
+
+import streamlit as st
+
+from core.profiler import format_timings, get_profile_summary, reset_profile
+
+
+def render_profiler_panel(rerun_profile: dict) -> None:
+    """Render the per-rerun timing breakdown in the sidebar
+    
+    Args:
+        rerun_profile: Result of the profile_rerun() block for the rerun that just finished
+    """
+    with st.sidebar:
+        st.header("⏱️ Profiler")
+        
+        if rerun_profile.get('prof_path'):
+            st.session_state['profiler_last_prof'] = rerun_profile['prof_path']
+        
+        st.metric("Last rerun", f"{rerun_profile.get('total', 0.0) * 1000:.1f} ms")
+        rows = format_timings(rerun_profile.get('timings', {}))
+        if rows:
+            st.dataframe(rows, width='stretch', hide_index=True)
+        
+        summary = get_profile_summary()
+        with st.expander(f"Across {summary['reruns']} reruns (mean {summary['mean_rerun_ms']:.1f} ms)"):
+            st.dataframe(summary['functions'], width='stretch', hide_index=True)
+            if st.button("Reset Profiler", key="profiler_reset", icon="🔄"):
+                reset_profile()
+                st.rerun()
+        
+        if st.button("Capture cProfile of next rerun", key="profiler_capture_btn", icon="📸"):
+            st.session_state['profiler_capture_next'] = True
+            st.rerun()
+        
+        prof_path = st.session_state.get('profiler_last_prof')
+        if prof_path and os.path.exists(prof_path):
+            with open(prof_path, 'rb') as f:
+                st.download_button(
+                    "Download .prof",
+                    data=f.read(),
+                    file_name=os.path.basename(prof_path),
+                    mime="application/octet-stream",
+                    key="profiler_download",
+                    icon="💾",
+                    help="Open with snakeviz, flameprof or python -m pstats"
+                )
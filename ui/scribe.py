@@ -2,10 +2,16 @@
 
 import streamlit as st
 
-from api import asr_transcribe, llm_streaming_chat_completion, format_note_writing_prompt, run_async
-from core import load_templates, get_fallback_templates, update_session
+from api import asr_transcribe, normalize_transcript, format_note_writing_prompt, run_async, ASRError
+from core import load_templates, get_fallback_templates
+from core.profiler import profiled
 
+from .autosave import autosave, save_fields
+from .generation import clear_generation, candidate_count_input, start_note_generation, render_generation, warm_note_prompt
+from .history import render_note_history
 
+
+@profiled('ui')
 def render_scribe_mode(config: dict, session: dict) -> None:
     """Render the Scribe Mode interface
     
@@ -41,10 +47,14 @@ def render_scribe_mode(config: dict, session: dict) -> None:
                     st.session_state['scribe_note'] = ''
                     st.session_state['scribe_context_input'] = ''
                     st.session_state['scribe_audio_bytes'] = None
-                    # Clear in persistent storage
-                    update_session(session['id'], {
+                    # Stop a running generation and clear in persistent storage
+                    clear_generation(session['id'], 'scribe')
+                    save_fields(session['id'], {
                         'scribe_transcript': '',
+                        'scribe_transcript_raw': '',
+                        'scribe_normalization': None,
                         'scribe_note': '',
+                        'scribe_note_partial': None,
                         'scribe_context': ''
                     })
                     st.session_state['scribe_show_clear_confirm'] = False
@@ -65,7 +75,10 @@ def render_scribe_mode(config: dict, session: dict) -> None:
     st.divider()
     
     # Get templates - first try loading from folder, fall back to config
-    templates = load_templates()
+    template_errors = []
+    templates = load_templates(template_errors)
+    for message in template_errors:
+        st.warning(message)
     if not templates:
         templates = get_fallback_templates()
     
@@ -114,6 +127,16 @@ def render_scribe_mode(config: dict, session: dict) -> None:
                 st.session_state['scribe_audio_bytes'] = audio_bytes
                 st.rerun()
     
+    # Prefill the LLM prompt cache as the inputs settle (llm.prefill_warmup)
+    def warm_up():
+        template = template_options.get(st.session_state.get('scribe_template'))
+        transcript_text = st.session_state.get('transcript_edit', '').strip()
+        if template and transcript_text:
+            prompt = format_note_writing_prompt(
+                transcript_text, template['system_prompt'], st.session_state.get('scribe_context_input', '').strip()
+            )
+            warm_note_prompt(session['id'], 'scribe', prompt, config.get('llm', {}))
+    
     # Transcribe button and result
     st.subheader("📝 Transcription")
     
@@ -124,27 +147,52 @@ def render_scribe_mode(config: dict, session: dict) -> None:
         if st.button("Transcribe Audio", type="primary", key="transcribe_btn", icon="📝"):
             with st.spinner("Transcribing..."):
                 config_stt = config.get('stt', {})
-                transcript_result = run_async(asr_transcribe(
-                    audio_bytes,
-                    config_stt.get('endpoint', ''),
-                    config_stt.get('model', 'google/medasr'),
-                    config_stt.get('api_key', '')
-                ))
+                # Written by the upload on the background loop, drawn here while waiting
+                upload = {'sent': 0, 'total': len(audio_bytes)}
+                upload_bar = st.progress(0.0, text="Uploading audio...")
+                
+                def report_upload(sent, total):
+                    upload['sent'] = sent
+                
+                def show_upload():
+                    if upload['sent'] < upload['total']:
+                        upload_bar.progress(upload['sent'] / upload['total'], text=f"Uploading audio... {upload['sent'] / 1024 ** 2:.1f} / {upload['total'] / 1024 ** 2:.1f} MB")
+                    else:
+                        upload_bar.progress(1.0, text="Waiting for transcript...")
+                
+                try:
+                    transcript_result = run_async(asr_transcribe(
+                        audio_bytes,
+                        config_stt.get('endpoint', ''),
+                        config_stt.get('model', 'google/medasr'),
+                        config_stt.get('api_key', ''),
+                        progress=report_upload
+                    ), on_wait=show_upload)
+                except ASRError as e:
+                    st.error(str(e))
+                    transcript_result = ""
+                upload_bar.empty()
                 
                 if transcript_result:
+                    # Fillers, timestamps and ASR loops only cost prompt tokens; the raw text is kept
+                    normalized, normalization = normalize_transcript(transcript_result, config_stt.get('normalize'))
                     # Update persistent session storage
-                    update_session(session['id'], {
-                        'scribe_transcript': transcript_result
+                    save_fields(session['id'], {
+                        'scribe_transcript': normalized,
+                        'scribe_transcript_raw': transcript_result,
+                        'scribe_normalization': normalization
                     })
                     # Update session state and rerun
-                    st.session_state['transcript_edit'] = transcript_result
+                    st.session_state['transcript_edit'] = normalized
+                    warm_up()
                     st.rerun()
     else:
         st.info("Record audio or upload a file to begin")
     
     # Editable transcription area
     def save_transcript():
-        update_session(session['id'], {'scribe_transcript': st.session_state.transcript_edit})
+        autosave(session['id'], 'scribe_transcript', 'transcript_edit')
+        warm_up()
     
     transcript = st.text_area(
         "Edit transcription",
@@ -154,11 +202,31 @@ def render_scribe_mode(config: dict, session: dict) -> None:
         placeholder="Transcription will appear here after recording"
     )
     
+    # Original ASR output, if normalization changed it
+    raw_transcript = session.get('scribe_transcript_raw', '')
+    normalization = session.get('scribe_normalization') or {}
+    if raw_transcript and normalization.get('tokens_saved'):
+        def restore_raw():
+            st.session_state['transcript_edit'] = raw_transcript
+            save_fields(session['id'], {'scribe_transcript': raw_transcript})
+            warm_up()
+        
+        removed = [
+            f"{normalization[field]} {label}" for field, label in (
+                ('fillers', 'fillers'), ('repeats', 'repeated words'), ('timestamps', 'timestamps'), ('commands', 'dictation commands')
+            ) if normalization.get(field)
+        ]
+        st.caption(f"Normalized: {', '.join(removed)} - about {normalization['tokens_saved']} tokens saved")
+        with st.expander("Original transcript"):
+            st.code(raw_transcript, language=None)
+            st.button("Restore original", key="restore_raw_transcript", on_click=restore_raw)
+    
     # Additional context/instructions
     st.subheader("📋 Additional Context / Instructions")
     
     def save_context():
-        update_session(session['id'], {'scribe_context': st.session_state.scribe_context_input})
+        autosave(session['id'], 'scribe_context', 'scribe_context_input')
+        warm_up()
     
     context = st.text_area(
         "Optional: Add pre-existing notes, context, or special instructions",
@@ -171,13 +239,18 @@ def render_scribe_mode(config: dict, session: dict) -> None:
     # Template selection
     st.subheader("📄 Note Generation")
     
+    def save_template():
+        save_fields(session['id'], {'scribe_template': st.session_state.get('scribe_template')})
+        warm_up()
+    
     selected_template_name = st.selectbox(
         "Select note template",
         options=list(template_options.keys()),
         index=0,
         key="scribe_template",
-        on_change=lambda: update_session(session['id'], {'scribe_template': selected_template_name})
+        on_change=save_template
     )
+    candidates = candidate_count_input('scribe')
     
     #has_transcript = bool(st.session_state.get('transcript_edit', '').strip())
     if st.button("Generate Note", type="primary", key="generate_note_btn", icon="📝", disabled=not transcript):
@@ -187,33 +260,15 @@ def render_scribe_mode(config: dict, session: dict) -> None:
             
             prompt = format_note_writing_prompt(transcript.strip(), template['system_prompt'], context.strip())
             
-            with st.spinner("Generating clinical note..."):
-                chunks = run_async(llm_streaming_chat_completion(
-                    prompt=prompt,
-                    system_prompt=config_llm.get('system_prompt', ''),
-                    endpoint=config_llm.get('endpoint', ''),
-                    model=config_llm.get('model', ''),
-                    api_key=config_llm.get('api_key', ''),
-                    max_tokens=config_llm.get('max_tokens', -1),
-                    temperature=config_llm.get('temperature', 0.8),
-                    top_k=config_llm.get('top_k', 40),
-                    top_p=config_llm.get('top_p', 0.95),
-                    min_p=config_llm.get('min_p', 0.05),
-                    extra_api_params=config_llm.get('extra_api_params')
-                ))
-                
-                note_output = "".join(chunks)
-                
-                if note_output:
-                    update_session(session['id'], {
-                        'scribe_note': note_output
-                    })
-                    st.session_state['scribe_note'] = note_output
-                    st.success("Note generated!")
-                    st.rerun()
+            start_note_generation(session['id'], 'scribe', prompt, config_llm, 'scribe_note', template,
+                                  candidates=candidates)
+    
+    # Progress of a running generation, or the outcome of the last one
+    render_generation(session, 'scribe', 'scribe_note', "Note generated!", config.get('llm', {}))
     
     # Show generated note
     generated_note = st.session_state.get('scribe_note') or session.get('scribe_note', '')
     if generated_note:
         st.subheader("📃 Generated Clinical Note")
         st.code(generated_note, language=None)
+        render_note_history(session['id'], 'scribe_note', generated_note)
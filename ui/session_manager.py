@@ -2,9 +2,23 @@
 
 import streamlit as st
 
-from core import get_all_sessions, create_session, delete_session
+from core import (
+    list_session_metadata, get_session_by_id, create_session, delete_session,
+    list_archived_sessions, search_archived_sessions, restore_archived_session, search_sessions, clear_archive
+)
+from core.profiler import profiled
 
 
+PAGE_SIZES = [10, 25, 50, 100]
+
+# Sort label -> (key function over session metadata, descending)
+SORT_OPTIONS = {
+    "Newest first": (lambda s: s['updated_at'], True),
+    "Oldest first": (lambda s: s['updated_at'], False),
+    "Largest first": (lambda s: s['size'], True),
+    "Session ID": (lambda s: s['id'], False),
+}
+
 # Confirmation dialogs
 if 'confirm_delete_session_id' not in st.session_state:
     st.session_state['confirm_delete_session_id'] = None
@@ -35,13 +49,19 @@ def render_clear_all_confirmation():
     """Render confirmation dialog for clearing all sessions"""
     @st.dialog("Clear All Sessions?")
     def confirm():
-        sessions = get_all_sessions()
-        st.warning(f"Are you sure you want to delete all {len(sessions)} sessions? This cannot be undone.")
+        sessions = list_session_metadata()
+        archived = len(list_archived_sessions())
+        st.warning(
+            f"Are you sure you want to delete all {len(sessions)} sessions"
+            + (f" and {archived} archived sessions" if archived else "")
+            + ", including their note history? This cannot be undone."
+        )
         col_yes, col_no = st.columns(2)
         with col_yes:
             if st.button("Confirm", type="primary"):
                 for session in sessions:
                     delete_session(session['id'])
+                clear_archive()
                 new_session = create_session()
                 st.session_state['selected_session_id'] = new_session['id']
                 st.query_params['session_id'] = new_session['id']
@@ -54,6 +74,133 @@ def render_clear_all_confirmation():
     confirm()
 
 
+def render_bulk_delete_confirmation(session_ids: list):
+    """Render confirmation dialog for deleting the selected sessions"""
+    @st.dialog(f"Delete {len(session_ids)} Sessions?")
+    def confirm():
+        st.warning(f"Are you sure you want to delete {len(session_ids)} selected sessions? This cannot be undone.")
+        col_yes, col_no = st.columns(2)
+        with col_yes:
+            if st.button("Confirm", type="primary"):
+                for session_id in session_ids:
+                    delete_session(session_id)
+                if st.session_state.get('selected_session_id') in session_ids:
+                    st.session_state.pop('selected_session_id', None)
+                st.session_state['session_manager_selected'] = set()
+                st.rerun()
+        with col_no:
+            if st.button("Cancel"):
+                st.rerun()
+    
+    confirm()
+
+
+def toggle_selection(session_id: str) -> None:
+    """Checkbox callback keeping the bulk selection across pages"""
+    selected = st.session_state.setdefault('session_manager_selected', set())
+    if st.session_state.get(f"select_{session_id}"):
+        selected.add(session_id)
+    else:
+        selected.discard(session_id)
+
+
+def render_session_row(meta: dict) -> None:
+    """Render one session row; contents are loaded only when the row is expanded"""
+    session_id = meta['id']
+    selected = st.session_state.get('session_manager_selected', set())
+    expanded = st.session_state.get('session_manager_expanded_id') == session_id
+    
+    col_select, col_info, col_view, col_switch, col_delete = st.columns([0.5, 4, 1, 1, 1])
+    with col_select:
+        st.checkbox(
+            "Select",
+            value=session_id in selected,
+            key=f"select_{session_id}",
+            on_change=toggle_selection,
+            args=(session_id,),
+            label_visibility="collapsed"
+        )
+    with col_info:
+        st.markdown(f"**{session_id}** - {meta['updated_at'][:19]} · {meta['size'] / 1024:.1f} KB")
+    with col_view:
+        if st.button("Hide" if expanded else "View", key=f"view_{session_id}", icon="🔍"):
+            st.session_state['session_manager_expanded_id'] = None if expanded else session_id
+            st.rerun()
+    with col_switch:
+        if st.button("Switch", key=f"load_{session_id}", type="primary", icon="🔄"):
+            st.session_state['selected_session_id'] = session_id
+            st.query_params['session_id'] = session_id
+            st.rerun()
+    with col_delete:
+        if st.button("Delete", key=f"delete_{session_id}", type="secondary", icon="🗑️"):
+            st.session_state['confirm_delete_session_id'] = session_id
+            st.rerun()
+    
+    if expanded:
+        session = get_session_by_id(session_id)
+        with st.container(border=True):
+            if session:
+                st.json(session)
+            else:
+                st.info("Session no longer exists.")
+
+
+@profiled('ui')
+def render_archived_sessions() -> None:
+    """Render search and restore controls for sessions moved to the archive"""
+    archived = list_archived_sessions()
+    
+    with st.expander(f"🗄️ Archived Sessions ({len(archived)})", expanded=False):
+        if not archived:
+            st.info("No archived sessions. Sessions beyond the history limit are archived automatically.")
+            return
+        
+        query = st.text_input("Search archived sessions", key="archive_search_query", placeholder="e.g. patient name, diagnosis")
+        if query.strip():
+            results = search_archived_sessions(query)
+            if not results:
+                st.info("No archived sessions match your search.")
+        else:
+            results = archived[:20]
+        
+        for session in results:
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.markdown(f"**{session['id']}** - {session.get('updated_at', 'Unknown')[:19]}")
+            with col2:
+                if st.button("Restore", key=f"restore_{session['id']}", icon="♻️"):
+                    restore_archived_session(session['id'])
+                    st.session_state['selected_session_id'] = session['id']
+                    st.query_params['session_id'] = session['id']
+                    st.rerun()
+
+
+@profiled('ui')
+def render_search_results(query: str) -> None:
+    """Render ranked full-text search results with switch buttons"""
+    results = search_sessions(query)
+    
+    if not results:
+        st.info("No sessions match your search.")
+        return
+    
+    for result in results:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            archived_label = " *(archived)*" if result['archived'] else ""
+            st.markdown(f"**{result['id']}** - {result.get('updated_at', 'Unknown')[:19]}{archived_label}")
+            if result['snippet']:
+                st.caption(result['snippet'])
+        with col2:
+            if st.button("Switch", key=f"search_load_{result['id']}", icon="🔄"):
+                if result['archived']:
+                    restore_archived_session(result['id'])
+                st.session_state['selected_session_id'] = result['id']
+                st.query_params['session_id'] = result['id']
+                st.rerun()
+
+
+@profiled('ui')
 def render_session_manager() -> None:
     """Render session manager"""
     st.header("📚 Session Manager")
@@ -78,30 +225,50 @@ def render_session_manager() -> None:
         if st.button("Clear All Sessions", type="secondary", icon="🗑️"):
             render_clear_all_confirmation()
     
+    render_archived_sessions()
+    
     st.divider()
     
-    # Session list
-    sessions = get_all_sessions()
+    # Full-text search across transcripts, notes and sources
+    query = st.text_input("🔍 Search sessions", key="session_search_query", placeholder="Search transcripts, notes and sources")
+    if query.strip():
+        render_search_results(query)
+        return
+    
+    # Session list - paginated over directory metadata, contents loaded on demand
+    sessions = list_session_metadata()
     
     if not sessions:
         st.info("No previous sessions found.")
         return
     
-    # Create a container for each session
-    for session in sessions:
-        with st.expander(f"Session {session['id']} - {session.get('updated_at', 'Unknown')[:19]}", expanded=False):
-            st.json(session)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if st.button(f"Switch to Session {session['id']}", key=f"load_{session['id']}", type="primary", icon="🔄"):
-                    st.session_state['selected_session_id'] = session['id']
-                    st.query_params['session_id'] = session['id']
-                    st.success(f"Switched to session {session['id']}")
-                    st.rerun()
-            
-            with col2:
-                if st.button(f"Delete Session {session['id']}", key=f"delete_{session['id']}", type="secondary", icon="🗑️"):
-                    st.session_state['confirm_delete_session_id'] = session['id']
-                    st.rerun()
+    col_sort, col_size, col_page = st.columns([2, 1, 1])
+    with col_sort:
+        sort_label = st.selectbox("Sort by", options=list(SORT_OPTIONS.keys()), key="session_manager_sort")
+    with col_size:
+        page_size = st.selectbox("Per page", options=PAGE_SIZES, key="session_manager_page_size")
+    
+    page_count = max(1, (len(sessions) + page_size - 1) // page_size)
+    if st.session_state.get('session_manager_page', 1) > page_count:
+        st.session_state['session_manager_page'] = page_count
+    with col_page:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, key="session_manager_page")
+    
+    sort_key, descending = SORT_OPTIONS[sort_label]
+    sessions = sorted(sessions, key=sort_key, reverse=descending)
+    page_sessions = sessions[(page - 1) * page_size:page * page_size]
+    
+    # Bulk actions on the selection (which may span pages)
+    existing_ids = {s['id'] for s in sessions}
+    selected = st.session_state.setdefault('session_manager_selected', set())
+    selected &= existing_ids
+    
+    col_info, col_bulk = st.columns([4, 1])
+    with col_info:
+        st.caption(f"Showing {len(page_sessions)} of {len(sessions)} sessions · {len(selected)} selected")
+    with col_bulk:
+        if st.button(f"Delete Selected ({len(selected)})", type="secondary", icon="🗑️", disabled=not selected):
+            render_bulk_delete_confirmation(sorted(selected))
+    
+    for meta in page_sessions:
+        render_session_row(meta)
@@ -2,7 +2,8 @@
 
 import streamlit as st
 
-from core import get_all_sessions, get_session_by_id, create_session
+from core import list_session_metadata, get_session_by_id, create_session, search_sessions
+from core.profiler import profiled
 
 
 def init_session_state():
@@ -20,7 +21,7 @@ def init_session_state():
     
     # If no URL param or session doesn't exist, use session state or default
     if 'selected_session_id' not in st.session_state:
-        sessions = get_all_sessions()
+        sessions = list_session_metadata()
         if sessions:
             st.session_state['selected_session_id'] = sessions[0]['id']
         else:
@@ -47,6 +48,7 @@ def get_selected_session() -> dict:
     return new_session
 
 
+@profiled('ui')
 def render_session_picker() -> dict:
     """
     Render session picker at the top of the app.
@@ -58,16 +60,31 @@ def render_session_picker() -> dict:
     # Initialize session state FIRST (may create session)
     init_session_state()
     
-    # Get sessions AFTER init (so we have the latest)
-    sessions = get_all_sessions()
+    # Get sessions AFTER init (so we have the latest) - metadata only, no file reads
+    sessions = list_session_metadata()
     
-    col1, col2 = st.columns([3, 1])
+    col_search, col1, col2 = st.columns([1, 2, 1])
+    
+    with col_search:
+        query = st.text_input(
+            "Search sessions",
+            key="session_picker_search",
+            placeholder="🔍 Search sessions",
+            label_visibility="collapsed"
+        )
     
     with col1:
         if sessions:
             session_options = {s['id']: f"{s['id']} ({s.get('updated_at', '')[:10]})" for s in sessions}
             current_id = st.session_state.get('selected_session_id', sessions[0]['id'])
             
+            if query.strip():
+                # Narrow the picker to ranked matches, keeping the current session selectable
+                matches = {r['id']: f"{r['id']} ({r.get('updated_at', '')[:10]})" for r in search_sessions(query)}
+                if current_id in session_options:
+                    matches.setdefault(current_id, session_options[current_id])
+                session_options = matches
+            
             selected_id = st.selectbox(
                 "Session",
                 options=list(session_options.keys()),
@@ -98,6 +115,6 @@ def render_session_picker() -> dict:
     if selected_id:
         return get_session_by_id(selected_id)
     elif sessions:
-        return sessions[0]
+        return get_session_by_id(sessions[0]['id'])
     else:
         return create_session()
@@ -5,6 +5,8 @@ import json
 import streamlit as st
 
 from core import save_config
+from core.metrics import get_metrics_snapshot, render_prometheus, reset_metrics
+from core.profiler import profiled
 
 
 def reset_settings_session():
@@ -20,6 +22,7 @@ def init_settings_session(config: dict) -> None:
         server_config = config.get('server', {})
         llm_config = config.get('llm', {})
         stt_config = config.get('stt', {})
+        session_config = config.get('session', {})
         
         st.session_state['settings_host'] = server_config.get('host', '0.0.0.0')
         st.session_state['settings_port'] = server_config.get('port', 8501)
@@ -28,6 +31,8 @@ def init_settings_session(config: dict) -> None:
         st.session_state['settings_model'] = llm_config.get('model', 'google/medgemma-27b-text-it')
         st.session_state['settings_system_prompt'] = llm_config.get('system_prompt', '')
         st.session_state['settings_max_tokens'] = llm_config.get('max_tokens', -1)
+        st.session_state['settings_prefill_warmup'] = bool(llm_config.get('prefill_warmup', False))
+        st.session_state['settings_grammar_constrained'] = bool(llm_config.get('grammar_constrained', False))
         st.session_state['settings_temperature'] = llm_config.get('temperature', 0.8)
         st.session_state['settings_top_k'] = llm_config.get('top_k', 40)
         st.session_state['settings_top_p'] = llm_config.get('top_p', 0.95)
@@ -35,11 +40,16 @@ def init_settings_session(config: dict) -> None:
         st.session_state['settings_stt_endpoint'] = stt_config.get('endpoint', 'http://localhost:8000')
         st.session_state['settings_stt_api_key'] = stt_config.get('api_key', '')
         st.session_state['settings_stt_model'] = stt_config.get('model', 'google/medasr')
+        st.session_state['settings_stt_normalize'] = bool((stt_config.get('normalize') or {}).get('enabled', True))
+        st.session_state['settings_max_history'] = session_config.get('max_history', 100)
+        st.session_state['settings_max_revisions'] = session_config.get('max_revisions', 50)
+        st.session_state['settings_storage_file'] = session_config.get('storage_file', 'sessions/session_data.json')
         
         extra_params = llm_config.get('extra_api_params', {})
         st.session_state['settings_extra_api_params'] = json.dumps(extra_params) if extra_params else ''
 
 
+@profiled('ui')
 def render_settings(config: dict) -> None:
     """Render settings page"""
     st.header("⚙️ Settings")
@@ -72,7 +82,9 @@ def render_settings(config: dict) -> None:
         st.text_input("API Key", key="settings_llm_api_key", type="password", help="Bearer token for authenticated endpoints")
         st.text_input("Model Name", key="settings_model")
         st.text_area("System Prompt", key="settings_system_prompt", height=150, help="Instructions for the LLM")
-        st.number_input("Max Tokens", key="settings_max_tokens", min_value=-1)
+        st.number_input("Max Tokens", key="settings_max_tokens", min_value=-1, help="-1: per-template automatic budget; a positive value caps every note")
+        st.checkbox("Warm prompt cache while editing", key="settings_prefill_warmup", help="Send prefill-only requests as note inputs settle so Generate starts decoding sooner (llama.cpp prompt cache)")
+        st.checkbox("Enforce template headings", key="settings_grammar_constrained", help="Send a grammar built from the template's headings so notes start with the first heading and keep every heading in order (llama.cpp; ignored by servers that reject it)")
         
         st.markdown("**Sampling Parameters**")
         c1, c2, c3, c4 = st.columns(4)
@@ -97,19 +109,79 @@ def render_settings(config: dict) -> None:
         st.text_input("STT Endpoint", key="settings_stt_endpoint", help="Base URL for ASR server")
         st.text_input("API Key", key="settings_stt_api_key", type="password", help="Bearer token for authenticated endpoints")
         st.text_input("STT Model", key="settings_stt_model", help="ASR model name")
+        st.checkbox("Normalize transcripts", key="settings_stt_normalize", help="Remove fillers, timestamps and repeated phrases from ASR output and apply dictation commands (the original is kept)")
+    
+    # Session Storage
+    with st.expander("Session Storage", expanded=False):
+        st.number_input(
+            "Max History",
+            key="settings_max_history",
+            min_value=0,
+            help="Number of most recently updated sessions kept hot; older sessions are archived in the background (0 disables)"
+        )
+        st.number_input(
+            "Note Versions Kept",
+            key="settings_max_revisions",
+            min_value=0,
+            help="Versions kept per note (generated, edited and synthesized), including the current one, for the History viewer; the oldest are pruned first (0 disables)"
+        )
+    
+    render_metrics_panel()
+
+
+@profiled('ui')
+def render_metrics_panel() -> None:
+    """Render the runtime metrics admin panel"""
+    with st.expander("📈 Runtime Metrics", expanded=False):
+        st.caption("Process-wide request and session I/O timings since startup (quantiles are bucket upper bounds).")
+        
+        rows = []
+        for name, metric in get_metrics_snapshot().items():
+            for series in metric['series']:
+                labels = ", ".join(f"{k}={v}" for k, v in series['labels'].items())
+                rows.append({
+                    'metric': name,
+                    'labels': labels,
+                    'count': series['count'],
+                    'mean': round(series['mean'], 4),
+                    'p50': series['p50'],
+                    'p95': series['p95'],
+                    'p99': series['p99'],
+                })
+        
+        if rows:
+            st.dataframe(rows, width='stretch', hide_index=True)
+        else:
+            st.info("No requests recorded yet.")
+        
+        col_download, col_reset = st.columns([1, 1])
+        with col_download:
+            st.download_button(
+                "Download Prometheus Metrics",
+                data=render_prometheus(),
+                file_name="metrics.prom",
+                mime="text/plain",
+                icon="💾"
+            )
+        with col_reset:
+            if st.button("Reset Metrics", icon="🔄"):
+                reset_metrics()
+                st.rerun()
 
 
 def save_settings_from_session():
     """Save settings from session state to config file"""
     import streamlit as st
-    from core import save_config
+    from core import load_config, save_config
     
-    config = {}
+    # Start from the saved config so sections not edited here (e.g. metrics) are kept
+    config = load_config() or {}
     config['server'] = {
         'host': st.session_state.get('settings_host', '0.0.0.0'),
         'port': int(st.session_state.get('settings_port', 8501))
     }
     config['llm'] = {
+        **config.get('llm', {}),
         'endpoint': st.session_state.get('settings_llm_endpoint', 'http://localhost:8080'),
         'api_key': st.session_state.get('settings_llm_api_key', ''),
         'model': st.session_state.get('settings_model', 'google/medgemma-27b-text-it'),
@@ -119,6 +191,8 @@ def save_settings_from_session():
         'top_k': st.session_state.get('settings_top_k', 40),
         'top_p': st.session_state.get('settings_top_p', 0.95),
         'min_p': st.session_state.get('settings_min_p', 0.05),
+        'prefill_warmup': bool(st.session_state.get('settings_prefill_warmup', False)),
+        'grammar_constrained': bool(st.session_state.get('settings_grammar_constrained', False)),
     }
     
     extra_params_str = st.session_state.get('settings_extra_api_params', '').strip()
@@ -136,9 +210,20 @@ def save_settings_from_session():
     else:
         config['llm']['extra_api_params'] = {}
     config['stt'] = {
+        **config.get('stt', {}),
         'endpoint': st.session_state.get('settings_stt_endpoint', 'http://localhost:8000'),
         'api_key': st.session_state.get('settings_stt_api_key', ''),
-        'model': st.session_state.get('settings_stt_model', 'google/medasr')
+        'model': st.session_state.get('settings_stt_model', 'google/medasr'),
+        'normalize': {
+            **(config.get('stt', {}).get('normalize') or {}),
+            'enabled': bool(st.session_state.get('settings_stt_normalize', True)),
+        },
+    }
+    config['session'] = {
+        **(config.get('session') or {}),
+        'max_history': int(st.session_state.get('settings_max_history', 100)),
+        'max_revisions': int(st.session_state.get('settings_max_revisions', 50)),
+        'storage_file': st.session_state.get('settings_storage_file', 'sessions/session_data.json')
     }
     
     save_config(config)
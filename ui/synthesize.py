@@ -2,10 +2,16 @@
 
 import streamlit as st
 
-from api import llm_streaming_chat_completion, format_note_synthesis_prompt, run_async
-from core import load_templates, get_fallback_templates, update_session
+from api import format_note_synthesis_prompt, dedupe_sources
+from core import load_templates, get_fallback_templates
+from core.profiler import profiled
 
+from .autosave import autosave, save_fields
+from .generation import clear_generation, candidate_count_input, start_note_generation, render_generation, warm_note_prompt
+from .history import render_note_history
 
+
+@profiled('ui')
 def render_synthesize_mode(config: dict, session: dict) -> None:
     """Render the Synthesize Mode interface
     
@@ -47,14 +53,16 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
                     st.session_state['synthesize_studies'] = ''
                     st.session_state['synthesize_progress'] = ''
                     st.session_state['synthesize_result'] = ''
-                    # Clear in persistent storage
-                    update_session(session['id'], {
+                    # Stop a running generation and clear in persistent storage
+                    clear_generation(session['id'], 'synthesize')
+                    save_fields(session['id'], {
                         'synthesize_instructions': '',
                         'synthesize_hp': '',
                         'synthesize_consults': '',
                         'synthesize_studies': '',
                         'synthesize_progress': '',
-                        'synthesize_result': ''
+                        'synthesize_result': '',
+                        'synthesize_result_partial': None
                     })
                     st.session_state['synthesize_show_clear_confirm'] = False
                     st.rerun()
@@ -74,19 +82,44 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
     st.divider()
     
     # Get templates - first try loading from folder, fall back to config
-    templates = load_templates()
+    template_errors = []
+    templates = load_templates(template_errors)
+    for message in template_errors:
+        st.warning(message)
     if not templates:
         templates = get_fallback_templates()
     
     template_options = {t['name']: t for t in templates}
     
     st.subheader("Input Information")
+    
+    config_synthesize = config.get('synthesize', {}) or {}
+    
+    # Sources as they go into the prompt: copy-forwarded paragraphs collapsed when enabled
+    def prompt_sources():
+        sources = {field: st.session_state.get(f'synthesize_{field}', '').strip() for field in ('hp', 'consults', 'studies', 'progress')}
+        if st.session_state.get('synthesize_dedup', config_synthesize.get('dedup', True)):
+            return dedupe_sources(sources, config_synthesize.get('dedup_threshold'))
+        return sources, None
+    
+    # Prefill the LLM prompt cache as the inputs settle (llm.prefill_warmup)
+    def warm_up():
+        template = template_options.get(st.session_state.get('synthesize_template'))
+        sources, _ = prompt_sources()
+        if template and any(sources.values()):
+            prompt = format_note_synthesis_prompt(
+                instructions=st.session_state.get('synthesize_instructions', '').strip(),
+                template_prompt=template['system_prompt'],
+                **sources
+            )
+            warm_note_prompt(session['id'], 'synthesize', prompt, config.get('llm', {}))
 
     col1, col2 = st.columns(2)
 
     with col1:
         def save_instructions():
-            update_session(session['id'], {'synthesize_instructions': st.session_state.synthesize_instructions})
+            autosave(session['id'], 'synthesize_instructions', 'synthesize_instructions')
+            warm_up()
         
         instructions = st.text_area(
             "Synthesize Instructions",
@@ -97,7 +130,8 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
         )
         
         def save_hp():
-            update_session(session['id'], {'synthesize_hp': st.session_state.synthesize_hp})
+            autosave(session['id'], 'synthesize_hp', 'synthesize_hp')
+            warm_up()
         
         hp = st.text_area(
             "History and Physical",
@@ -107,7 +141,8 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
         )
         
         def save_consults():
-            update_session(session['id'], {'synthesize_consults': st.session_state.synthesize_consults})
+            autosave(session['id'], 'synthesize_consults', 'synthesize_consults')
+            warm_up()
         
         consults = st.text_area(
             "Consult Note(s)",
@@ -118,7 +153,8 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
     
     with col2:
         def save_studies():
-            update_session(session['id'], {'synthesize_studies': st.session_state.synthesize_studies})
+            autosave(session['id'], 'synthesize_studies', 'synthesize_studies')
+            warm_up()
         
         studies = st.text_area(
             "Studies and Procedures",
@@ -128,7 +164,8 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
         )
         
         def save_progress():
-            update_session(session['id'], {'synthesize_progress': st.session_state.synthesize_progress})
+            autosave(session['id'], 'synthesize_progress', 'synthesize_progress')
+            warm_up()
         
         progress = st.text_area(
             "Progress Note(s)",
@@ -144,11 +181,35 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
         "Select Note Template",
         options=list(template_options.keys()),
         index=0,
-        key="synthesize_template"
+        key="synthesize_template",
+        on_change=warm_up
+    )
+    candidates = candidate_count_input('synthesize')
+    
+    st.toggle(
+        "Collapse copy-forwarded text",
+        value=config_synthesize.get('dedup', True),
+        key="synthesize_dedup",
+        on_change=warm_up,
+        help="Replace near-duplicate paragraphs with a marker, keeping only the most recent copy (progress notes are newest)"
     )
     
     has_content = any([hp, consults, studies, progress])
     can_synthesize = instructions and has_content
+    sources, dedup_stats = prompt_sources()
+    if dedup_stats and dedup_stats['collapsed']:
+        st.caption(
+            f"Collapsed {dedup_stats['collapsed']} of {dedup_stats['paragraphs']} paragraphs as copy-forwarded: "
+            f"~{dedup_stats['tokens_before']:,} → ~{dedup_stats['tokens_after']:,} tokens "
+            f"({dedup_stats['tokens_saved'] / dedup_stats['tokens_before']:.0%} fewer)"
+        )
+        with st.expander("Sources as sent to the model"):
+            for field, label in (('hp', "History and Physical"), ('consults', "Consult Note(s)"),
+                                 ('studies', "Studies and Procedures"), ('progress', "Progress Note(s)")):
+                if sources[field]:
+                    st.caption(label)
+                    st.code(sources[field], language=None)
+    
     if st.button("Generate Synthesized Note", type="primary", key="generate_synthesize_btn", icon="📝", disabled=not can_synthesize):
         if can_synthesize:
             config_llm = config.get('llm', {})
@@ -157,38 +218,17 @@ def render_synthesize_mode(config: dict, session: dict) -> None:
             prompt = format_note_synthesis_prompt(
                 instructions=instructions.strip(),
                 template_prompt=template['system_prompt'],
-                hp=hp.strip(),
-                consults=consults.strip(),
-                studies=studies.strip(),
-                progress=progress.strip()
+                **sources
             )
             
-            with st.spinner("Synthesizing clinical note..."):
-                chunks = run_async(llm_streaming_chat_completion(
-                    prompt=prompt,
-                    system_prompt=config_llm.get('system_prompt', ''),
-                    endpoint=config_llm.get('endpoint', ''),
-                    model=config_llm.get('model', ''),
-                    api_key=config_llm.get('api_key', ''),
-                    max_tokens=config_llm.get('max_tokens', -1),
-                    temperature=config_llm.get('temperature', 0.8),
-                    top_k=config_llm.get('top_k', 40),
-                    top_p=config_llm.get('top_p', 0.95),
-                    min_p=config_llm.get('min_p', 0.05),
-                    extra_api_params=config_llm.get('extra_api_params')
-                ))
-                
-                note_output = "".join(chunks)
-                
-                if note_output:
-                    update_session(session['id'], {
-                        'synthesize_result': note_output
-                    })
-                    st.session_state['synthesize_result'] = note_output
-                    st.success("Note synthesized!")
-                    st.rerun()
+            start_note_generation(session['id'], 'synthesize', prompt, config_llm, 'synthesize_result',
+                                  template, reproduced_text=sources['hp'], candidates=candidates)
+    
+    # Progress of a running generation, or the outcome of the last one
+    render_generation(session, 'synthesize', 'synthesize_result', "Note synthesized!", config.get('llm', {}))
     
     # Show synthesized note
     if st.session_state.get('synthesize_result'):
         st.subheader("📃 Synthesized Clinical Note")
         st.code(st.session_state['synthesize_result'], language=None)
+        render_note_history(session['id'], 'synthesize_result', st.session_state['synthesize_result'])